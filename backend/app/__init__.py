@@ -14,6 +14,23 @@ def create_app(config_class=Config):
 
     db.init_app(app)
     migrate.init_app(app, db)
+    from .utils.principal_cache import principal_cache
+    from .utils.http_client import http_client
+    from .utils.circuit_breaker import gemini_breaker
+    from .utils.rate_limiter import gemini_limiter
+    from .utils.single_flight import model_flight
+    from .utils.metrics import metrics
+    from .services.llm_cache import llm_cache
+    from .services.post_scorer import post_scorer
+    principal_cache.init_app(app)
+    http_client.init_app(app)
+    gemini_breaker.init_app(app)
+    gemini_limiter.init_app(app)
+    model_flight.init_app(app)
+    metrics.init_app(app)
+    llm_cache.init_app(app)
+    post_scorer.init_app(app)
+
     CORS(app, resources={r"/api/*": {"origins": app.config["FRONTEND_URL"]}},
          supports_credentials=True)
 
@@ -21,11 +38,20 @@ def create_app(config_class=Config):
     from .routes.profile import profile_bp
     from .routes.content import content_bp
     from .routes.social import social_bp
+    from .routes.diagnostics import diagnostics_bp
+    from .routes.jobs import jobs_bp
+    from .routes.metrics import metrics_bp
 
     app.register_blueprint(auth_bp, url_prefix="/api/auth")
     app.register_blueprint(profile_bp, url_prefix="/api/profile")
     app.register_blueprint(content_bp, url_prefix="/api/content")
     app.register_blueprint(social_bp, url_prefix="/api/social")
+    app.register_blueprint(diagnostics_bp, url_prefix="/api/diagnostics")
+    app.register_blueprint(jobs_bp, url_prefix="/api/jobs")
+    app.register_blueprint(metrics_bp, url_prefix="/api/metrics")
+
+    from .cli import register_cli
+    register_cli(app)
 
     @app.route("/api/health")
     def health():
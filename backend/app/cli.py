@@ -0,0 +1,81 @@
+import os
+import click
+from flask import current_app
+from flask.cli import AppGroup
+
+jobs_cli = AppGroup("jobs", help="Background job queue.")
+calendars_cli = AppGroup("calendars", help="Bulk calendar maintenance.")
+tokens_cli = AppGroup("tokens", help="Social account OAuth tokens.")
+publish_cli = AppGroup("publish", help="Scheduled publishing.")
+
+
+@jobs_cli.command("work")
+@click.option("--concurrency", type=int, default=None, help="Jobs run in parallel (default JOB_WORKER_CONCURRENCY).")
+@click.option("--poll-interval", type=float, default=1.0, show_default=True, help="Seconds to sleep when idle.")
+@click.option("--burst", is_flag=True, help="Exit once the queue is empty.")
+def work(concurrency, poll_interval, burst):
+    """Run queued generate/improve/engaging/regenerate jobs."""
+    from .services.job_queue import run_worker
+
+    app = current_app._get_current_object()
+    concurrency = concurrency or app.config["JOB_WORKER_CONCURRENCY"]
+    click.echo(f"Job worker started with {concurrency} threads")
+    run_worker(app, concurrency=concurrency, poll_interval=poll_interval, burst=burst)
+
+
+@calendars_cli.command("regenerate")
+@click.option("--days", type=int, default=5, show_default=True, help="Days per calendar.")
+@click.option("--chunk-size", type=int, default=200, show_default=True, help="Profiles per transaction.")
+@click.option("--processes", type=int, default=os.cpu_count() or 1, show_default=True)
+@click.option("--source", type=click.Choice(["template", "model"]), default="template", show_default=True,
+              help="template = fallback_generator, model = generation engine (Gemini with per-day fallback).")
+@click.option("--checkpoint", default=None, help="Checkpoint file (default: instance/regenerate.checkpoint).")
+@click.option("--restart", is_flag=True, help="Ignore an existing checkpoint and start from the first profile.")
+def regenerate(days, chunk_size, processes, source, checkpoint, restart):
+    """Regenerate calendars for every user with a firm profile; resumable."""
+    from .services.bulk_regenerate import regenerate_all
+
+    app = current_app._get_current_object()
+    if checkpoint is None:
+        os.makedirs(app.instance_path, exist_ok=True)
+        checkpoint = os.path.join(app.instance_path, "regenerate.checkpoint")
+    regenerate_all(days=days, chunk_size=chunk_size, processes=processes, source=source,
+                   checkpoint=checkpoint, restart=restart, echo=click.echo)
+
+
+@tokens_cli.command("refresh")
+@click.option("--batch-size", type=int, default=None, help="Accounts per batch (default TOKEN_REFRESH_BATCH_SIZE).")
+@click.option("--concurrency", type=int, default=None,
+              help="Parallel token requests (default TOKEN_REFRESH_CONCURRENCY).")
+@click.option("--interval", type=float, default=60.0, show_default=True, help="Seconds to sleep when nothing is due.")
+@click.option("--once", is_flag=True, help="Exit once no account is due.")
+def refresh(batch_size, concurrency, interval, once):
+    """Refresh OAuth tokens that are close to expiry."""
+    from .services.token_refresh import run_refresher
+
+    app = current_app._get_current_object()
+    batch_size = batch_size or app.config["TOKEN_REFRESH_BATCH_SIZE"]
+    concurrency = concurrency or app.config["TOKEN_REFRESH_CONCURRENCY"]
+    click.echo(f"Token refresher started ({batch_size} per batch, {concurrency} in parallel)")
+    run_refresher(app, batch_size=batch_size, concurrency=concurrency, interval=interval, once=once, echo=click.echo)
+
+
+@publish_cli.command("run")
+@click.option("--batch-size", type=int, default=None, help="Items per batch (default PUBLISH_BATCH_SIZE).")
+@click.option("--interval", type=float, default=30.0, show_default=True, help="Seconds to sleep when nothing is due.")
+@click.option("--once", is_flag=True, help="Exit once no item is due.")
+def publish_run(batch_size, interval, once):
+    """Publish calendar items whose scheduled time has passed."""
+    from .services.publisher import run_publisher
+
+    app = current_app._get_current_object()
+    batch_size = batch_size or app.config["PUBLISH_BATCH_SIZE"]
+    click.echo(f"Publisher started ({batch_size} per batch)")
+    run_publisher(app, batch_size=batch_size, interval=interval, once=once, echo=click.echo)
+
+
+def register_cli(app):
+    app.cli.add_command(jobs_cli)
+    app.cli.add_command(calendars_cli)
+    app.cli.add_command(tokens_cli)
+    app.cli.add_command(publish_cli)
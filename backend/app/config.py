@@ -15,6 +15,11 @@ class Config:
     # JWT
     JWT_SECRET_KEY = os.environ.get("JWT_SECRET_KEY", "jwt-secret-change-in-production")
     JWT_ACCESS_TOKEN_EXPIRES = timedelta(days=7)
+    # Verified-principal cache (per worker process); TTL is also capped by token exp
+    JWT_PRINCIPAL_CACHE_SIZE = int(os.environ.get("JWT_PRINCIPAL_CACHE_SIZE", 1024))
+    JWT_PRINCIPAL_CACHE_TTL = int(os.environ.get("JWT_PRINCIPAL_CACHE_TTL", 300))
+    # /api/diagnostics answers only requests sending this value as X-Diagnostics-Token; unset disables it
+    DIAGNOSTICS_TOKEN = os.environ.get("DIAGNOSTICS_TOKEN", "")
 
     # Google OAuth
     GOOGLE_CLIENT_ID = os.environ.get("GOOGLE_CLIENT_ID", "")
@@ -25,7 +30,49 @@ class Config:
 
     # Gemini
     GEMINI_API_KEY = os.environ.get("GEMINI_API_KEY", "")
-    GEMINI_MODEL = os.environ.get("GEMINI_MODEL", "gemini-2.0-flash")
+    GEMINI_MODEL = os.environ.get("GEMINI_MODEL", "gemini-2.0-flash")  # "stub" = offline model
+    GEMINI_MAX_CONCURRENCY = int(os.environ.get("GEMINI_MAX_CONCURRENCY", 5))
+    GEMINI_CALL_TIMEOUT = float(os.environ.get("GEMINI_CALL_TIMEOUT", 20))
+    GEMINI_STUB_LATENCY = float(os.environ.get("GEMINI_STUB_LATENCY", 0))
+    # per_day = one concurrent call per day; stream = one streamed call for the whole plan
+    GEMINI_PLAN_MODE = os.environ.get("GEMINI_PLAN_MODE", "per_day")
+
+    # Circuit breaker around Gemini calls: opens when FAILURE_RATE of the last WINDOW
+    # calls (MIN_CALLS at least) failed or took over SLOW_CALL seconds; probes after RESET
+    GEMINI_BREAKER_WINDOW = int(os.environ.get("GEMINI_BREAKER_WINDOW", 20))
+    GEMINI_BREAKER_MIN_CALLS = int(os.environ.get("GEMINI_BREAKER_MIN_CALLS", 5))
+    GEMINI_BREAKER_FAILURE_RATE = float(os.environ.get("GEMINI_BREAKER_FAILURE_RATE", 0.5))
+    GEMINI_BREAKER_SLOW_CALL = float(os.environ.get("GEMINI_BREAKER_SLOW_CALL", 8.0))
+    GEMINI_BREAKER_RESET = float(os.environ.get("GEMINI_BREAKER_RESET", 30.0))
+    # Gemini quota: token buckets (memory / sql store), global and per user; 0 per minute = unlimited.
+    # Calls wait up to MAX_WAIT seconds for a token, then fall back to template/local content
+    GEMINI_RATE_STORE = os.environ.get("GEMINI_RATE_STORE", "memory")
+    GEMINI_RATE_PER_MINUTE = int(os.environ.get("GEMINI_RATE_PER_MINUTE", 0))
+    GEMINI_RATE_BURST = int(os.environ.get("GEMINI_RATE_BURST", 0))
+    GEMINI_RATE_USER_PER_MINUTE = int(os.environ.get("GEMINI_RATE_USER_PER_MINUTE", 0))
+    GEMINI_RATE_USER_BURST = int(os.environ.get("GEMINI_RATE_USER_BURST", 5))  # one 5-day plan at once
+    GEMINI_RATE_MAX_WAIT = float(os.environ.get("GEMINI_RATE_MAX_WAIT", 1.0))
+    # Identical concurrent model calls share one upstream call; set a directory to also
+    # coalesce across workers on one host (needs a shared LLM_CACHE_BACKEND: sql or disk)
+    SINGLE_FLIGHT_LOCK_DIR = os.environ.get("SINGLE_FLIGHT_LOCK_DIR", "")
+    # profile saves queue a background calendar draft that /generate hands out while fresh
+    CALENDAR_PRECOMPUTE = os.environ.get("CALENDAR_PRECOMPUTE", "1").lower() in ("1", "true", "yes")
+    CALENDAR_DRAFT_MAX_AGE = int(os.environ.get("CALENDAR_DRAFT_MAX_AGE", 86400))
+    # POST /api/content/generate without ?mode=: full (replace the calendar) or incremental
+    CALENDAR_GENERATE_MODE = os.environ.get("CALENDAR_GENERATE_MODE", "full")
+    # /rate-post answers from the local scorer if Gemini hasn't replied by then (0 = wait)
+    RATE_POST_HEDGE_DEADLINE = float(os.environ.get("RATE_POST_HEDGE_DEADLINE", 2.5))
+
+    # Model response cache: memory / sql / disk / none
+    LLM_CACHE_BACKEND = os.environ.get("LLM_CACHE_BACKEND", "memory")
+    LLM_CACHE_TTL = int(os.environ.get("LLM_CACHE_TTL", 3600))
+    LLM_CACHE_MAX_BYTES = int(os.environ.get("LLM_CACHE_MAX_BYTES", 16 * 1024 * 1024))
+    LLM_CACHE_DIR = os.environ.get("LLM_CACHE_DIR", "")
+
+    # /rate-post results, keyed by a hash of the post content
+    POST_SCORE_CACHE_SIZE = int(os.environ.get("POST_SCORE_CACHE_SIZE", 4096))
+    POST_SCORE_CACHE_TTL = int(os.environ.get("POST_SCORE_CACHE_TTL", 86400))
+    RATE_POSTS_MAX_ITEMS = int(os.environ.get("RATE_POSTS_MAX_ITEMS", 500))
 
     # Meta (Facebook / Instagram)
     META_APP_ID = os.environ.get("META_APP_ID", "")
@@ -41,5 +88,40 @@ class Config:
         "YOUTUBE_REDIRECT_URI", "http://localhost:5000/api/social/callback/youtube"
     )
 
+    # Background jobs
+    JOB_WORKER_CONCURRENCY = int(os.environ.get("JOB_WORKER_CONCURRENCY", 4))
+    JOB_MAX_ATTEMPTS = int(os.environ.get("JOB_MAX_ATTEMPTS", 3))
+    JOB_LEASE_SECONDS = int(os.environ.get("JOB_LEASE_SECONDS", 300))
+    JOB_RETRY_BACKOFF = float(os.environ.get("JOB_RETRY_BACKOFF", 30))  # seconds, doubled per attempt
+    JOB_RETENTION_SECONDS = int(os.environ.get("JOB_RETENTION_SECONDS", 7 * 86400))  # then finished jobs are deleted
+
+    # Outbound HTTP (shared pooled client)
+    HTTP_CONNECT_TIMEOUT = float(os.environ.get("HTTP_CONNECT_TIMEOUT", 3.05))
+    HTTP_READ_TIMEOUT = float(os.environ.get("HTTP_READ_TIMEOUT", 15))
+    HTTP_POOL_MAXSIZE = int(os.environ.get("HTTP_POOL_MAXSIZE", 10))
+    HTTP_RETRIES = int(os.environ.get("HTTP_RETRIES", 2))
+    HTTP_BACKOFF_FACTOR = float(os.environ.get("HTTP_BACKOFF_FACTOR", 0.3))
+    # host=base_url pairs, e.g. to point Google/Meta/Gemini at local stubs
+    HTTP_UPSTREAM_OVERRIDES = os.environ.get("HTTP_UPSTREAM_OVERRIDES", "")
+
+    # OAuth token refresher (`flask tokens refresh`): refresh this long before expiry
+    TOKEN_REFRESH_MARGIN_GOOGLE = int(os.environ.get("TOKEN_REFRESH_MARGIN_GOOGLE", 600))
+    TOKEN_REFRESH_MARGIN_META = int(os.environ.get("TOKEN_REFRESH_MARGIN_META", 7 * 86400))
+    TOKEN_REFRESH_BATCH_SIZE = int(os.environ.get("TOKEN_REFRESH_BATCH_SIZE", 100))
+    TOKEN_REFRESH_CONCURRENCY = int(os.environ.get("TOKEN_REFRESH_CONCURRENCY", 8))
+    TOKEN_REFRESH_MAX_BACKOFF = int(os.environ.get("TOKEN_REFRESH_MAX_BACKOFF", 3600))
+
+    # scheduled publishing (`flask publish run`)
+    PUBLISH_BATCH_SIZE = int(os.environ.get("PUBLISH_BATCH_SIZE", 50))
+    PUBLISH_CONCURRENCY_META = int(os.environ.get("PUBLISH_CONCURRENCY_META", 4))
+    PUBLISH_RETRIES = int(os.environ.get("PUBLISH_RETRIES", 2))
+    PUBLISH_RETRY_BACKOFF = float(os.environ.get("PUBLISH_RETRY_BACKOFF", 1.0))
+    PUBLISH_MAX_ATTEMPTS = int(os.environ.get("PUBLISH_MAX_ATTEMPTS", 5))
+    PUBLISH_MAX_BACKOFF = int(os.environ.get("PUBLISH_MAX_BACKOFF", 3600))
+
+    # /api/metrics: per-worker snapshots are merged through this directory under gunicorn
+    METRICS_DIR = os.environ.get("METRICS_DIR", "")
+    METRICS_FLUSH_INTERVAL = float(os.environ.get("METRICS_FLUSH_INTERVAL", 5.0))
+
     # Frontend
     FRONTEND_URL = os.environ.get("FRONTEND_URL", "http://localhost:5173")
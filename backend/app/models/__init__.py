@@ -2,5 +2,10 @@ from .user import User
 from .firm_profile import FirmProfile
 from .content_calendar import ContentCalendar
 from .social_account import SocialAccount
+from .llm_cache_entry import LLMCacheEntry
+from .job import Job
+from .rate_limit_bucket import RateLimitBucket
+from .calendar_draft import CalendarDraft
 
-__all__ = ["User", "FirmProfile", "ContentCalendar", "SocialAccount"]
+__all__ = ["User", "FirmProfile", "ContentCalendar", "SocialAccount", "LLMCacheEntry", "Job", "RateLimitBucket",
+           "CalendarDraft"]
@@ -0,0 +1,12 @@
+from datetime import datetime
+from .. import db
+
+
+class CalendarDraft(db.Model):
+    __tablename__ = "calendar_drafts"
+
+    id = db.Column(db.Integer, primary_key=True)
+    user_id = db.Column(db.Integer, db.ForeignKey("users.id"), nullable=False, unique=True)
+    source_hash = db.Column(db.String(64), nullable=False)  # calendar_drafts.plan_hash of the profile
+    days = db.Column(db.Text, nullable=False)  # JSON list of generated days
+    created_at = db.Column(db.DateTime, default=datetime.utcnow)
@@ -11,17 +11,35 @@ class ContentCalendar(db.Model):
     platform = db.Column(db.String(64))  # instagram / facebook / youtube
     content_idea = db.Column(db.Text)
     hook = db.Column(db.Text)
-    caption = db.Column(db.Text)
+    # large bodies are deferred: list views don't load them, undefer_group("body") when needed
+    caption = db.deferred(db.Column(db.Text), group="body")
     hashtags = db.Column(db.Text)
-    script = db.Column(db.Text)
+    script = db.deferred(db.Column(db.Text), group="body")
     cta = db.Column(db.Text)
     seo_title = db.Column(db.String(512))
-    seo_description = db.Column(db.Text)
+    seo_description = db.deferred(db.Column(db.Text), group="body")
     seo_tags = db.Column(db.Text)
     is_published = db.Column(db.Boolean, default=False)
+    # sha256 of the profile inputs the day was generated from (calendar_store.source_hash)
+    source_hash = db.Column(db.String(64))
+    edited_at = db.Column(db.DateTime)  # last hand edit through PUT; incremental generation keeps the day
+    # publishing (services/publisher): when to post, and what the platform returned
+    scheduled_at = db.Column(db.DateTime)
+    published_at = db.Column(db.DateTime)
+    platform_post_id = db.Column(db.String(256))
+    publish_error = db.Column(db.Text)
+    publish_attempts = db.Column(db.Integer, nullable=False, default=0, server_default="0")
+    publish_not_before = db.Column(db.DateTime)
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
     updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
 
+    __table_args__ = (
+        # calendar listing: WHERE user_id = ? ORDER BY day
+        db.Index("ix_content_calendar_user_id_day", "user_id", "day"),
+        # publisher: WHERE NOT is_published AND scheduled_at <= ? ORDER BY scheduled_at
+        db.Index("ix_content_calendar_published_scheduled", "is_published", "scheduled_at"),
+    )
+
     def to_dict(self):
         return {
             "id": self.id,
@@ -38,6 +56,11 @@ class ContentCalendar(db.Model):
             "seo_description": self.seo_description,
             "seo_tags": self.seo_tags,
             "is_published": self.is_published,
+            "edited_at": self.edited_at.isoformat() if self.edited_at else None,
+            "scheduled_at": self.scheduled_at.isoformat() if self.scheduled_at else None,
+            "published_at": self.published_at.isoformat() if self.published_at else None,
+            "platform_post_id": self.platform_post_id,
+            "publish_error": self.publish_error,
             "created_at": self.created_at.isoformat(),
             "updated_at": self.updated_at.isoformat() if self.updated_at else None,
         }
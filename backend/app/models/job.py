@@ -0,0 +1,42 @@
+import json
+from datetime import datetime
+from .. import db
+
+
+class Job(db.Model):
+    __tablename__ = "jobs"
+
+    id = db.Column(db.Integer, primary_key=True)
+    user_id = db.Column(db.Integer, db.ForeignKey("users.id"), nullable=False)
+    kind = db.Column(db.String(32), nullable=False)  # generate / improve / engaging / regenerate / precompute
+    payload = db.Column(db.Text)  # JSON
+    status = db.Column(db.String(16), nullable=False, default="queued")  # queued / running / succeeded / failed / superseded
+    result = db.Column(db.Text)  # JSON
+    error = db.Column(db.Text)
+    attempts = db.Column(db.Integer, nullable=False, default=0)
+    locked_by = db.Column(db.String(64))
+    locked_at = db.Column(db.DateTime)
+    run_after = db.Column(db.DateTime)  # retry backoff: not claimed before this
+    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+    updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+    finished_at = db.Column(db.DateTime)
+
+    __table_args__ = (
+        # claim path: WHERE status = 'queued' ORDER BY id
+        db.Index("ix_jobs_status_id", "status", "id"),
+        # retention sweep: WHERE status IN (...) AND finished_at < ?
+        db.Index("ix_jobs_finished_at", "finished_at"),
+    )
+
+    def to_dict(self):
+        return {
+            "id": self.id,
+            "kind": self.kind,
+            "status": self.status,
+            "result": json.loads(self.result) if self.result else None,
+            "error": self.error,
+            "attempts": self.attempts,
+            "created_at": self.created_at.isoformat(),
+            "updated_at": self.updated_at.isoformat() if self.updated_at else None,
+            "finished_at": self.finished_at.isoformat() if self.finished_at else None,
+        }
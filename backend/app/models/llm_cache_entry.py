@@ -0,0 +1,15 @@
+from datetime import datetime
+from .. import db
+
+
+class LLMCacheEntry(db.Model):
+    __tablename__ = "llm_response_cache"
+
+    key = db.Column(db.String(64), primary_key=True)  # sha256 of model + prompts
+    model = db.Column(db.String(128))
+    response = db.Column(db.Text, nullable=False)
+    size_bytes = db.Column(db.Integer, nullable=False, default=0)
+    latency_ms = db.Column(db.Float, default=0.0)  # upstream latency of the original call
+    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+    expires_at = db.Column(db.DateTime, nullable=False)
+    last_hit_at = db.Column(db.DateTime, default=datetime.utcnow, index=True)
@@ -0,0 +1,9 @@
+from .. import db
+
+
+class RateLimitBucket(db.Model):
+    __tablename__ = "rate_limit_buckets"
+
+    key = db.Column(db.String(128), primary_key=True)  # e.g. "gemini:global", "gemini:user:42"
+    tokens = db.Column(db.Float, nullable=False)
+    refilled_at = db.Column(db.Float, nullable=False)  # unix time of the last update
@@ -13,11 +13,19 @@ class SocialAccount(db.Model):
     access_token = db.Column(db.Text)
     refresh_token = db.Column(db.Text)
     token_expires_at = db.Column(db.DateTime)
+    # token refresher bookkeeping: failed attempts in a row, and when to try again
+    refresh_failures = db.Column(db.Integer, nullable=False, default=0, server_default="0")
+    refresh_not_before = db.Column(db.DateTime)
+    # the provider revoked the grant: no more refresh attempts until the user reconnects
+    needs_reconnect = db.Column(db.Boolean, nullable=False, default=False, server_default=db.false())
     is_active = db.Column(db.Boolean, default=True)
     connected_at = db.Column(db.DateTime, default=datetime.utcnow)
+    updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
 
     __table_args__ = (
         db.UniqueConstraint("user_id", "platform", name="uq_user_platform"),
+        # token refresher: WHERE is_active AND token_expires_at <= ? ORDER BY token_expires_at
+        db.Index("ix_social_accounts_active_expires", "is_active", "token_expires_at"),
     )
 
     def to_dict(self):
@@ -28,5 +36,6 @@ class SocialAccount(db.Model):
             "account_id": self.account_id,
             "account_name": self.account_name,
             "is_active": self.is_active,
+            "needs_reconnect": self.needs_reconnect,
             "connected_at": self.connected_at.isoformat(),
         }
@@ -1,5 +1,7 @@
 from datetime import datetime
+from sqlalchemy import exists
 from .. import db
+from .firm_profile import FirmProfile
 
 
 class User(db.Model):
@@ -11,6 +13,8 @@ class User(db.Model):
     email = db.Column(db.String(256), unique=True, nullable=False)
     picture = db.Column(db.String(512))
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
+    # loaded with the row as an EXISTS subquery instead of a lazy firm_profile load
+    has_profile = db.column_property(exists().where(FirmProfile.user_id == id))
 
     firm_profile = db.relationship("FirmProfile", backref="user", uselist=False, cascade="all, delete-orphan")
     content_calendar = db.relationship("ContentCalendar", backref="user", cascade="all, delete-orphan")
@@ -23,5 +27,5 @@ class User(db.Model):
             "email": self.email,
             "picture": self.picture,
             "created_at": self.created_at.isoformat(),
-            "has_profile": self.firm_profile is not None,
+            "has_profile": self.has_profile,
         }
@@ -2,5 +2,8 @@ from .auth import auth_bp
 from .profile import profile_bp
 from .content import content_bp
 from .social import social_bp
+from .diagnostics import diagnostics_bp
+from .jobs import jobs_bp
+from .metrics import metrics_bp
 
-__all__ = ["auth_bp", "profile_bp", "content_bp", "social_bp"]
+__all__ = ["auth_bp", "profile_bp", "content_bp", "social_bp", "diagnostics_bp", "jobs_bp", "metrics_bp"]
@@ -1,8 +1,10 @@
-import requests
+from urllib.parse import quote
 from flask import Blueprint, redirect, request, jsonify, current_app
 from .. import db
 from ..models.user import User
+from ..utils.http_client import http_client
 from ..utils.jwt_utils import generate_token, jwt_required
+from ..utils.principal_cache import principal_cache
 
 auth_bp = Blueprint("auth", __name__)
 
@@ -21,7 +23,7 @@ def google_login():
         "access_type": "offline",
         "prompt": "consent",
     }
-    query = "&".join(f"{k}={requests.utils.quote(str(v))}" for k, v in params.items())
+    query = "&".join(f"{k}={quote(str(v))}" for k, v in params.items())
     return redirect(f"{GOOGLE_AUTH_URL}?{query}")
 
 
@@ -32,7 +34,7 @@ def google_callback():
         return redirect(f"{current_app.config['FRONTEND_URL']}/login?error=auth_failed")
 
     # Exchange code for token
-    token_resp = requests.post(
+    token_resp = http_client.post(
         GOOGLE_TOKEN_URL,
         data={
             "code": code,
@@ -41,6 +43,7 @@ def google_callback():
             "redirect_uri": current_app.config["GOOGLE_REDIRECT_URI"],
             "grant_type": "authorization_code",
         },
+        retries=0,  # an authorization code is single-use
     )
     if token_resp.status_code != 200:
         return redirect(f"{current_app.config['FRONTEND_URL']}/login?error=token_exchange_failed")
@@ -48,7 +51,7 @@ def google_callback():
     access_token = token_resp.json().get("access_token")
 
     # Fetch user info
-    userinfo_resp = requests.get(
+    userinfo_resp = http_client.get(
         GOOGLE_USERINFO_URL,
         headers={"Authorization": f"Bearer {access_token}"},
     )
@@ -72,6 +75,7 @@ def google_callback():
             user = User(google_id=google_id, name=name, email=email, picture=picture)
             db.session.add(user)
     db.session.commit()
+    principal_cache.invalidate_user(user.id)
 
     jwt_token = generate_token(user.id)
     frontend_url = current_app.config["FRONTEND_URL"]
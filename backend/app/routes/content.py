@@ -1,130 +1,257 @@
-from flask import Blueprint, request, jsonify
+import json
+import time
+from datetime import datetime, timezone
+from flask import Blueprint, Response, current_app, request, jsonify, stream_with_context
 from urllib.parse import quote
+from sqlalchemy import func, select
+from sqlalchemy.orm import undefer_group
 from .. import db
 from ..models.content_calendar import ContentCalendar
 from ..models.firm_profile import FirmProfile
-from ..services.fallback_generator import (
-    generate_fallback_5_days,
-    improve_fallback,
-    engaging_fallback,
-    regenerate_fallback,
-    build_image_prompt,
+from ..services.fallback_generator import build_image_prompt
+from ..services.calendar_drafts import take_draft
+from ..services.calendar_store import (
+    PAGE_MAX,
+    decode_cursor,
+    list_calendar,
+    parse_fields,
+    replace_calendar,
+    with_source_hash,
 )
+from ..services.content_ops import (
+    BATCH_OPERATIONS,
+    ContentError,
+    commit_item,
+    batch_apply,
+    validate_batch,
+    get_item,
+    get_profile,
+    generate_calendar,
+    improve_item,
+    engaging_item,
+    regenerate_item,
+)
+from ..services.generation_engine import iter_plan
+from ..services.job_queue import enqueue_job
+from ..services.post_scorer import content_hash, model_rating, normalize_post, post_scorer
+from ..utils.circuit_breaker import gemini_breaker, hedged
+from ..utils.conditional import conditional_response, make_etag
 from ..utils.jwt_utils import jwt_required
+from ..utils.rate_limiter import gemini_limiter
+from ..utils.serialize import json_response
+from ..utils.single_flight import model_flight
 
 content_bp = Blueprint("content", __name__)
 
 
+def _wants_async() -> bool:
+    return request.args.get("async", "").lower() in ("1", "true", "yes")
+
+
+def _enqueue(kind: str, payload: dict = None):
+    job = enqueue_job(request.current_user.id, kind, payload)
+    return jsonify({"job": job.to_dict()}), 202, {"Location": f"/api/jobs/{job.id}"}
+
+
 @content_bp.route("/generate", methods=["POST"])
 @jwt_required
 def generate_content():
     user = request.current_user
-    profile = FirmProfile.query.filter_by(user_id=user.id).first()
+    # incremental: keep fresh and hand-edited days, regenerate the rest in place
+    mode = request.args.get("mode") or current_app.config["CALENDAR_GENERATE_MODE"]
+    if mode not in ("full", "incremental"):
+        return jsonify({"error": "mode must be full or incremental"}), 400
+    incremental = mode == "incremental"
+    try:
+        if _wants_async():
+            get_profile(user.id)
+            return _enqueue("generate", {"incremental": incremental})
+        records = generate_calendar(user.id, incremental=incremental)
+    except ContentError as exc:
+        return jsonify({"error": exc.message}), exc.status
+    return jsonify({"calendar": records}), 201
+
+
+def _sse(event: str, data) -> str:
+    return f"event: {event}\ndata: {json.dumps(data)}\n\n"
+
+
+@content_bp.route("/generate/stream", methods=["POST"])
+@jwt_required
+def generate_content_stream():
+    """Server-Sent Events variant of /generate: one `day` event per generated day, then `done`.
+
+    Nothing is written until the plan is complete: `done` carries the stored
+    calendar, so readers never see old and new days side by side, and a failed
+    or abandoned run leaves the old calendar as it was.
+    """
+    user_id = request.current_user.id
+    profile = FirmProfile.query.filter_by(user_id=user_id).first()
     if not profile:
         return jsonify({"error": "Please complete your firm profile first"}), 400
 
-    ContentCalendar.query.filter_by(user_id=user.id).delete()
-    db.session.commit()
-
-    days = generate_fallback_5_days(profile)
-
-    records = []
-    for day_data in days:
-        record = ContentCalendar(
-            user_id=user.id,
-            day=day_data.get("day"),
-            platform=day_data.get("platform"),
-            content_idea=day_data.get("content_idea"),
-            hook=day_data.get("hook"),
-            caption=day_data.get("caption"),
-            hashtags=day_data.get("hashtags"),
-            script=day_data.get("script"),
-            cta=day_data.get("cta"),
-            seo_title=day_data.get("seo_title"),
-            seo_description=day_data.get("seo_description"),
-            seo_tags=day_data.get("seo_tags"),
-        )
-        db.session.add(record)
-        records.append(record)
-
-    db.session.commit()
-    return jsonify({"calendar": [r.to_dict() for r in records]}), 201
+    def events():
+        started = time.perf_counter()
+        days = []
+        try:
+            # a draft precomputed on profile save streams out at once; it is deleted in
+            # the same transaction that stores the calendar
+            plan = take_draft(user_id, profile) or iter_plan(profile, days=5)
+            for day in plan:
+                days.append(day)
+                yield _sse("day", day)
+            records = replace_calendar(user_id, with_source_hash(profile, days))
+        except GeneratorExit:
+            db.session.rollback()
+            raise
+        except Exception:
+            db.session.rollback()
+            yield _sse("error", {"error": "Generation failed", "count": len(days)})
+            return
+        yield _sse("done", {"count": len(records), "calendar": records,
+                            "elapsed_ms": round((time.perf_counter() - started) * 1000)})
+
+    return Response(
+        stream_with_context(events()),
+        mimetype="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
 
 
 @content_bp.route("/calendar", methods=["GET"])
 @jwt_required
 def get_calendar():
-    items = (
-        ContentCalendar.query
-        .filter_by(user_id=request.current_user.id)
-        .order_by(ContentCalendar.day.asc())
-        .all()
-    )
-    return jsonify({"calendar": [i.to_dict() for i in items]}), 200
+    user_id = request.current_user.id
+    count, last_modified, max_id = db.session.execute(
+        select(func.count(ContentCalendar.id), func.max(ContentCalendar.updated_at), func.max(ContentCalendar.id))
+        .where(ContentCalendar.user_id == user_id)
+    ).one()
+
+    try:
+        fields = parse_fields(request.args.get("fields", ""))
+        limit = request.args.get("limit", type=int)
+        if limit is not None and not 1 <= limit <= PAGE_MAX:
+            raise ValueError(f"limit must be between 1 and {PAGE_MAX}")
+        cursor = request.args.get("cursor") or None
+        if cursor:
+            decode_cursor(cursor)
+    except ValueError as exc:
+        return jsonify({"error": str(exc)}), 400
+
+    def build():
+        items, next_cursor = list_calendar(user_id, fields=fields, limit=limit, cursor=cursor)
+        body = {"calendar": items}
+        if limit is not None:
+            body["next_cursor"] = next_cursor
+        return json_response(body)
+
+    etag = make_etag("calendar", user_id, count, max_id, last_modified, fields, limit, cursor)
+    return conditional_response(etag, last_modified, build)
+
+
+@content_bp.route("/<int:content_id>", methods=["GET"])
+@jwt_required
+def get_content(content_id):
+    """Full body of one item (list views fetch it when the item is opened)."""
+    try:
+        item = get_item(request.current_user.id, content_id)
+    except ContentError as exc:
+        return jsonify({"error": exc.message}), exc.status
+    etag = make_etag("content", item.id, item.updated_at)
+    return conditional_response(etag, item.updated_at, lambda: (jsonify({"content": item.to_dict()}), 200))
+
+
+def _parse_schedule(value):
+    """ISO 8601 string (naive = UTC) or None -> naive UTC datetime."""
+    if value is None:
+        return None
+    when = datetime.fromisoformat(str(value).replace("Z", "+00:00"))
+    if when.tzinfo is not None:
+        when = when.astimezone(timezone.utc).replace(tzinfo=None)
+    return when
 
 
 @content_bp.route("/<int:content_id>", methods=["PUT"])
 @jwt_required
 def update_content(content_id):
-    item = ContentCalendar.query.filter_by(id=content_id, user_id=request.current_user.id).first()
+    item = (
+        ContentCalendar.query
+        .options(undefer_group("body"))
+        .filter_by(id=content_id, user_id=request.current_user.id)
+        .first()
+    )
     if not item:
         return jsonify({"error": "Content not found"}), 404
 
     data = request.get_json() or {}
     updatable = ["content_idea", "hook", "caption", "hashtags", "script", "cta",
                  "seo_title", "seo_description", "seo_tags"]
-    for field in updatable:
-        if field in data:
-            setattr(item, field, data[field])
-
-    db.session.commit()
-    return jsonify({"content": item.to_dict()}), 200
+    edited = [field for field in updatable if field in data]
+    for field in edited:
+        setattr(item, field, data[field])
+    if edited:
+        item.edited_at = datetime.utcnow()
+
+    if "scheduled_at" in data:
+        if item.is_published:
+            return jsonify({"error": "Content is already published"}), 409
+        try:
+            item.scheduled_at = _parse_schedule(data["scheduled_at"])
+        except ValueError:
+            return jsonify({"error": "scheduled_at must be an ISO 8601 datetime or null"}), 400
+        # a new schedule gets a fresh set of publish attempts
+        item.publish_attempts, item.publish_not_before, item.publish_error = 0, None, None
+
+    return jsonify({"content": commit_item(item)}), 200
+
+
+def _run_item_op(kind: str, op, content_id: int):
+    """Run an item operation inline, or queue it when ?async=1."""
+    user_id = request.current_user.id
+    try:
+        if _wants_async():
+            get_item(user_id, content_id)
+            return _enqueue(kind, {"content_id": content_id})
+        return jsonify({"content": op(user_id, content_id)}), 200
+    except ContentError as exc:
+        return jsonify({"error": exc.message}), exc.status
 
 
 @content_bp.route("/<int:content_id>/improve", methods=["POST"])
 @jwt_required
 def improve(content_id):
-    item = ContentCalendar.query.filter_by(id=content_id, user_id=request.current_user.id).first()
-    if not item:
-        return jsonify({"error": "Content not found"}), 404
-
-    improved = improve_fallback(item)
-    for k, v in improved.items():
-        if hasattr(item, k) and v:
-            setattr(item, k, v)
-    db.session.commit()
-    return jsonify({"content": item.to_dict()}), 200
+    return _run_item_op("improve", improve_item, content_id)
 
 
 @content_bp.route("/<int:content_id>/engaging", methods=["POST"])
 @jwt_required
 def engaging(content_id):
-    item = ContentCalendar.query.filter_by(id=content_id, user_id=request.current_user.id).first()
-    if not item:
-        return jsonify({"error": "Content not found"}), 404
-
-    improved = engaging_fallback(item)
-    for k, v in improved.items():
-        if hasattr(item, k) and v:
-            setattr(item, k, v)
-    db.session.commit()
-    return jsonify({"content": item.to_dict()}), 200
+    return _run_item_op("engaging", engaging_item, content_id)
 
 
 @content_bp.route("/<int:content_id>/regenerate", methods=["POST"])
 @jwt_required
 def regenerate(content_id):
-    item = ContentCalendar.query.filter_by(id=content_id, user_id=request.current_user.id).first()
-    if not item:
-        return jsonify({"error": "Content not found"}), 404
+    return _run_item_op("regenerate", regenerate_item, content_id)
+
 
-    profile = FirmProfile.query.filter_by(user_id=request.current_user.id).first()
-    new_data = regenerate_fallback(item.day, item.platform, profile)
-    for k, v in new_data.items():
-        if hasattr(item, k) and v:
-            setattr(item, k, v)
-    db.session.commit()
-    return jsonify({"content": item.to_dict()}), 200
+@content_bp.route("/batch", methods=["POST"])
+@jwt_required
+def batch():
+    """Apply improve / engaging / regenerate to many items in one round trip."""
+    data = request.get_json(silent=True) or {}
+    ids = data.get("ids")
+    operation = data.get("operation")
+    if not isinstance(ids, list) or operation not in BATCH_OPERATIONS:
+        return jsonify({"error": f"Provide ids (list) and operation in {BATCH_OPERATIONS}"}), 400
+    user_id = request.current_user.id
+    try:
+        if _wants_async():
+            return _enqueue("batch", {"ids": validate_batch(user_id, ids, operation), "operation": operation})
+        records = batch_apply(user_id, ids, operation)
+    except ContentError as exc:
+        return jsonify({"error": exc.message}), exc.status
+    return jsonify({"content": records}), 200
 
 
 @content_bp.route("/confirm-plan", methods=["POST"])
@@ -158,92 +285,49 @@ def confirm_plan():
 @content_bp.route("/rate-post", methods=["POST"])
 @jwt_required
 def rate_post():
-    """Rate a social media post using Gemini AI or smart template fallback."""
-    import random, requests as req
-    from flask import current_app
-
+    """Rate a social media post using Gemini AI or the local scorer."""
+    post = normalize_post(request.get_json(silent=True) or {})
+    cached = post_scorer.cached(post)
+    if cached is not None:
+        return jsonify(cached), 200
+
+    api_key = current_app.config.get("GEMINI_API_KEY", "")
+    if api_key and not gemini_breaker.short_circuits():
+        user_id = request.current_user.id
+        app = current_app._get_current_object()
+
+        def ask_model():
+            # runs on a hedge thread: the sql limiter store needs the app context
+            with app.app_context():
+                # over quota: score locally right away rather than queue behind the bucket
+                if not gemini_limiter.acquire(user_id, wait=0):
+                    return None
+                return gemini_breaker.call(model_rating, post, api_key)
+        try:
+            # tabs rating the same post share one call; past the deadline the local
+            # score is served and the late answer dropped
+            rating = hedged(lambda: model_flight.do(f"rate-post-{content_hash(post)}", ask_model),
+                            current_app.config["RATE_POST_HEDGE_DEADLINE"], lambda: None)
+        except Exception:
+            rating = None
+        if rating:
+            post_scorer.remember(post, rating)
+            return jsonify(rating), 200
+
+    return jsonify(post_scorer.score(post)), 200
+
+
+@content_bp.route("/rate-posts", methods=["POST"])
+@jwt_required
+def rate_posts():
+    """Score many posts at once with the local scorer (no model calls)."""
     data = request.get_json(silent=True) or {}
-    caption   = data.get("caption", "").strip()
-    url       = data.get("url", "").strip()
-    has_image = data.get("has_image", False)
-    platform  = data.get("platform", "instagram")
-
-    # --- Try Gemini ---
-    gemini_result = None
-    try:
-        api_key = current_app.config.get("GEMINI_API_KEY", "")
-        prompt = (
-            f"You are a social media expert. Rate this {platform} post out of 10 "
-            f"(be realistic, score between 5 and 8).\n"
-            f"Caption: {caption or 'No caption provided'}\n"
-            f"URL: {url or 'No URL'}\n"
-            f"Has image: {has_image}\n\n"
-            "Respond ONLY as JSON with keys: score (int 5-8), reason (2-3 sentences), "
-            "suggestions (list of 3 strings)."
-        )
-        resp = req.post(
-            f"https://generativelanguage.googleapis.com/v1beta/models/gemini-1.5-flash:generateContent?key={api_key}",
-            json={"contents": [{"parts": [{"text": prompt}]}]},
-            timeout=10,
-        )
-        text = resp.json()["candidates"][0]["content"]["parts"][0]["text"]
-        import json, re
-        match = re.search(r"\{.*\}", text, re.DOTALL)
-        if match:
-            parsed = json.loads(match.group())
-            score = max(5, min(8, int(parsed.get("score", 6))))
-            gemini_result = {
-                "score": score,
-                "reason": parsed.get("reason", ""),
-                "suggestions": parsed.get("suggestions", []),
-            }
-    except Exception:
-        pass
-
-    if gemini_result:
-        return jsonify(gemini_result), 200
-
-    # --- Smart template fallback ---
-    score = random.randint(5, 8)
-
-    reasons = {
-        5: "Your post has potential but needs more work. The caption lacks a clear hook and doesn't immediately communicate value to your audience. Without a compelling opening line, most users will scroll past before reading further.",
-        6: "Your content shows promise with a decent message, but it could be stronger. The caption is informative but doesn't create urgency or emotional connection. Engagement metrics will likely be average without stronger storytelling.",
-        7: "Good post overall! The content is relevant and the message is clear. However, it could benefit from a stronger call-to-action and more targeted hashtags to reach a wider audience and drive meaningful interaction.",
-        8: "Solid post with a clear message and good structure. The caption flows well and shows personality. A few tweaks to the CTA and hashtag strategy could push this into top-performing territory for your niche.",
-    }
-
-    suggestions_pool = {
-        5: [
-            "Add a strong hook in the first line — start with a bold question or surprising fact.",
-            "Include a clear CTA like 'Comment below' or 'Tag a friend who needs to see this'.",
-            "Add 8–12 relevant hashtags mixing popular and niche tags for maximum reach.",
-        ],
-        6: [
-            "Use storytelling — share a personal experience or client story to build emotional connection.",
-            "Break up long captions with line breaks and emojis to improve readability.",
-            "Post at peak hours (7–9 AM or 6–9 PM) for your target audience's timezone.",
-        ],
-        7: [
-            "Test carousel posts — they drive 3x more engagement than single images on average.",
-            "Respond to every comment within the first hour to boost algorithmic reach.",
-            "Add a location tag if relevant — it increases discoverability by up to 79%.",
-        ],
-        8: [
-            "Collaborate with a micro-influencer in your niche to amplify this content.",
-            "Repurpose this content as a Reel or YouTube Short for additional reach.",
-            "Pin this post to the top of your profile if it performs above your average.",
-        ],
-    }
-
-    if not caption:
-        score = max(5, score - 1)
-    if not has_image:
-        score = max(5, score - 1)
-
-    return jsonify({
-        "score": score,
-        "reason": reasons[score],
-        "suggestions": suggestions_pool[score],
-    }), 200
+    posts = data.get("posts")
+    if not isinstance(posts, list) or not all(isinstance(p, dict) for p in posts):
+        return jsonify({"error": "posts must be a list of objects"}), 400
+    limit = current_app.config["RATE_POSTS_MAX_ITEMS"]
+    if len(posts) > limit:
+        return jsonify({"error": f"At most {limit} posts per request"}), 400
+    ratings = post_scorer.score_many([normalize_post(p) for p in posts])
+    return jsonify({"ratings": ratings}), 200
 
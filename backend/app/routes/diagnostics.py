@@ -0,0 +1,35 @@
+import hmac
+from flask import Blueprint, current_app, jsonify, request
+from ..services.fallback_generator import profile_cache_info
+from ..services.generation_engine import engine_stats
+from ..services.llm_cache import llm_cache
+from ..services.post_scorer import post_scorer
+from ..utils.circuit_breaker import gemini_breaker, hedge_stats
+from ..utils.http_client import http_client
+from ..utils.principal_cache import principal_cache
+from ..utils.rate_limiter import gemini_limiter
+from ..utils.single_flight import model_flight
+
+diagnostics_bp = Blueprint("diagnostics", __name__)
+
+
+@diagnostics_bp.route("", methods=["GET"])
+def diagnostics():
+    # internal cache and upstream state: for operators only, never for app users
+    expected = current_app.config["DIAGNOSTICS_TOKEN"]
+    if not expected:
+        return jsonify({"error": "Not found"}), 404
+    if not hmac.compare_digest(request.headers.get("X-Diagnostics-Token", ""), expected):
+        return jsonify({"error": "Forbidden"}), 403
+    return jsonify({
+        "principal_cache": principal_cache.stats(),
+        "generation_engine": engine_stats(),
+        "fallback_profiles": profile_cache_info(),
+        "llm_cache": llm_cache.stats(),
+        "post_scores": post_scorer.stats(),
+        "outbound": http_client.stats(),
+        "circuit_breakers": {"gemini": gemini_breaker.stats()},
+        "hedged_calls": hedge_stats(),
+        "rate_limits": {"gemini": gemini_limiter.stats()},
+        "single_flight": model_flight.stats(),
+    }), 200
@@ -0,0 +1,14 @@
+from flask import Blueprint, request, jsonify
+from ..models.job import Job
+from ..utils.jwt_utils import jwt_required
+
+jobs_bp = Blueprint("jobs", __name__)
+
+
+@jobs_bp.route("/<int:job_id>", methods=["GET"])
+@jwt_required
+def get_job(job_id):
+    job = Job.query.filter_by(id=job_id, user_id=request.current_user.id).first()
+    if not job:
+        return jsonify({"error": "Job not found"}), 404
+    return jsonify({"job": job.to_dict()}), 200
@@ -1,7 +1,12 @@
-from flask import Blueprint, request, jsonify
+from flask import Blueprint, current_app, request, jsonify
+from sqlalchemy import select
 from .. import db
 from ..models.firm_profile import FirmProfile
+from ..services.calendar_drafts import plan_hash
+from ..services.job_queue import enqueue_job
+from ..utils.conditional import conditional_response, make_etag
 from ..utils.jwt_utils import jwt_required
+from ..utils.principal_cache import principal_cache
 
 profile_bp = Blueprint("profile", __name__)
 
@@ -13,10 +18,20 @@ VALID_FREQUENCIES = {"daily", "3x/week", "weekly"}
 @profile_bp.route("", methods=["GET"])
 @jwt_required
 def get_profile():
-    profile = FirmProfile.query.filter_by(user_id=request.current_user.id).first()
-    if not profile:
-        return jsonify({"profile": None}), 200
-    return jsonify({"profile": profile.to_dict()}), 200
+    user_id = request.current_user.id
+    version = db.session.execute(
+        select(FirmProfile.id, FirmProfile.updated_at).where(FirmProfile.user_id == user_id)
+    ).first()
+    last_modified = version.updated_at if version else None
+
+    def build():
+        profile = FirmProfile.query.filter_by(user_id=user_id).first()
+        if not profile:
+            return jsonify({"profile": None}), 200
+        return jsonify({"profile": profile.to_dict()}), 200
+
+    etag = make_etag("profile", user_id, tuple(version) if version else None)
+    return conditional_response(etag, last_modified, build)
 
 
 @profile_bp.route("", methods=["POST"])
@@ -37,6 +52,7 @@ def upsert_profile():
         return jsonify({"error": f"primary_goal must be one of {VALID_GOALS}"}), 400
 
     profile = FirmProfile.query.filter_by(user_id=request.current_user.id).first()
+    created = profile is None
     if profile:
         profile.business_name = data["business_name"]
         profile.industry = data["industry"]
@@ -56,5 +72,12 @@ def upsert_profile():
         )
         db.session.add(profile)
 
+    if current_app.config["CALENDAR_PRECOMPUTE"]:
+        # draft the calendar in the background so Generate is instant; a newer save supersedes it.
+        # Queued in the profile's transaction: both are saved or neither is.
+        enqueue_job(request.current_user.id, "precompute", {"source_hash": plan_hash(profile)}, supersede=True,
+                    commit=False)
     db.session.commit()
+    if created:
+        principal_cache.invalidate_user(request.current_user.id)  # cached has_profile is stale
     return jsonify({"profile": profile.to_dict()}), 200
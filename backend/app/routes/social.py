@@ -1,26 +1,75 @@
-import requests
+from urllib.parse import quote
 from flask import Blueprint, request, jsonify, redirect, current_app
+from sqlalchemy import func, select
+from sqlalchemy.exc import IntegrityError
 from .. import db
 from ..models.social_account import SocialAccount
+from ..services.token_refresh import GOOGLE_TOKEN_URL, META_DEFAULT_EXPIRES_IN, META_TOKEN_URL, expires_at
+from ..utils.conditional import conditional_response, make_etag
+from ..utils.http_client import http_client
 from ..utils.jwt_utils import jwt_required
+from ..utils.serialize import json_response, select_dicts
 
 social_bp = Blueprint("social", __name__)
 
 META_OAUTH_URL = "https://www.facebook.com/v18.0/dialog/oauth"
-META_TOKEN_URL = "https://graph.facebook.com/v18.0/oauth/access_token"
 META_ME_URL = "https://graph.facebook.com/v18.0/me"
 
 GOOGLE_OAUTH_URL = "https://accounts.google.com/o/oauth2/v2/auth"
-GOOGLE_TOKEN_URL = "https://oauth2.googleapis.com/token"
 YOUTUBE_CHANNEL_URL = "https://www.googleapis.com/youtube/v3/channels"
 YOUTUBE_SCOPES = "https://www.googleapis.com/auth/youtube.readonly"
 
+# the SocialAccount.to_dict fields, selected directly
+ACCOUNT_COLUMNS = (
+    SocialAccount.id, SocialAccount.user_id, SocialAccount.platform, SocialAccount.account_id,
+    SocialAccount.account_name, SocialAccount.is_active, SocialAccount.needs_reconnect, SocialAccount.connected_at,
+)
+
+
+def _save_account(user_id: int, platform: str, **values):
+    """Create or reactivate the user's account for `platform` and commit."""
+    def apply(account):
+        for key, value in values.items():
+            setattr(account, key, value)
+        account.is_active = True
+        account.refresh_failures, account.refresh_not_before, account.needs_reconnect = 0, None, False
+
+    account = SocialAccount.query.filter_by(user_id=user_id, platform=platform).first()
+    if account is None:
+        account = SocialAccount(user_id=user_id, platform=platform)
+        db.session.add(account)
+    apply(account)
+    try:
+        db.session.commit()
+    except IntegrityError:
+        # a concurrent callback for the same user/platform inserted first: update that row
+        db.session.rollback()
+        account = SocialAccount.query.filter_by(user_id=user_id, platform=platform).one()
+        apply(account)
+        db.session.commit()
+    return account
+
 
 @social_bp.route("/accounts", methods=["GET"])
 @jwt_required
 def get_accounts():
-    accounts = SocialAccount.query.filter_by(user_id=request.current_user.id, is_active=True).all()
-    return jsonify({"accounts": [a.to_dict() for a in accounts]}), 200
+    user_id = request.current_user.id
+    changed = func.coalesce(SocialAccount.updated_at, SocialAccount.connected_at)
+    count, last_modified, id_sum = db.session.execute(
+        select(func.count(SocialAccount.id), func.max(changed), func.sum(SocialAccount.id))
+        .where(SocialAccount.user_id == user_id, SocialAccount.is_active.is_(True))
+    ).one()
+
+    def build():
+        accounts = select_dicts(
+            select(*ACCOUNT_COLUMNS)
+            .where(SocialAccount.user_id == user_id, SocialAccount.is_active.is_(True))
+            .order_by(SocialAccount.id)
+        )
+        return json_response({"accounts": accounts})
+
+    etag = make_etag("accounts", user_id, count, id_sum, last_modified)
+    return conditional_response(etag, last_modified, build)
 
 
 @social_bp.route("/connect/instagram", methods=["GET"])
@@ -33,7 +82,7 @@ def connect_instagram():
         "response_type": "code",
         "state": f"instagram:{request.current_user.id}",
     }
-    query = "&".join(f"{k}={requests.utils.quote(str(v))}" for k, v in params.items())
+    query = "&".join(f"{k}={quote(str(v))}" for k, v in params.items())
     return jsonify({"oauth_url": f"{META_OAUTH_URL}?{query}"}), 200
 
 
@@ -47,7 +96,7 @@ def connect_facebook():
         "response_type": "code",
         "state": f"facebook:{request.current_user.id}",
     }
-    query = "&".join(f"{k}={requests.utils.quote(str(v))}" for k, v in params.items())
+    query = "&".join(f"{k}={quote(str(v))}" for k, v in params.items())
     return jsonify({"oauth_url": f"{META_OAUTH_URL}?{query}"}), 200
 
 
@@ -62,7 +111,7 @@ def connect_youtube():
         "access_type": "offline",
         "state": f"youtube:{request.current_user.id}",
     }
-    query = "&".join(f"{k}={requests.utils.quote(str(v))}" for k, v in params.items())
+    query = "&".join(f"{k}={quote(str(v))}" for k, v in params.items())
     return jsonify({"oauth_url": f"{GOOGLE_OAUTH_URL}?{query}"}), 200
 
 
@@ -76,35 +125,23 @@ def meta_callback():
     if not code or not user_id:
         return redirect(f"{current_app.config['FRONTEND_URL']}/accounts?error=oauth_failed")
 
-    token_resp = requests.get(META_TOKEN_URL, params={
+    token_resp = http_client.get(META_TOKEN_URL, params={
         "client_id": current_app.config["META_APP_ID"],
         "client_secret": current_app.config["META_APP_SECRET"],
         "redirect_uri": current_app.config["META_REDIRECT_URI"],
         "code": code,
-    })
+    }, retries=0)  # an authorization code is single-use
     if token_resp.status_code != 200:
         return redirect(f"{current_app.config['FRONTEND_URL']}/accounts?error=token_failed")
 
-    access_token = token_resp.json().get("access_token")
-    me_resp = requests.get(META_ME_URL, params={"access_token": access_token, "fields": "id,name"})
+    tokens = token_resp.json()
+    access_token = tokens.get("access_token")
+    me_resp = http_client.get(META_ME_URL, params={"access_token": access_token, "fields": "id,name"})
     me_data = me_resp.json()
 
-    account = SocialAccount.query.filter_by(user_id=user_id, platform=platform).first()
-    if account:
-        account.access_token = access_token
-        account.account_id = me_data.get("id")
-        account.account_name = me_data.get("name")
-        account.is_active = True
-    else:
-        account = SocialAccount(
-            user_id=user_id,
-            platform=platform,
-            access_token=access_token,
-            account_id=me_data.get("id"),
-            account_name=me_data.get("name"),
-        )
-        db.session.add(account)
-    db.session.commit()
+    _save_account(user_id, platform, access_token=access_token,
+                  token_expires_at=expires_at(tokens.get("expires_in"), default=META_DEFAULT_EXPIRES_IN),
+                  account_id=me_data.get("id"), account_name=me_data.get("name"))
 
     return redirect(f"{current_app.config['FRONTEND_URL']}/accounts?success={platform}")
 
@@ -119,18 +156,18 @@ def youtube_callback():
     if not code or not user_id:
         return redirect(f"{current_app.config['FRONTEND_URL']}/accounts?error=oauth_failed")
 
-    token_resp = requests.post(GOOGLE_TOKEN_URL, data={
+    token_resp = http_client.post(GOOGLE_TOKEN_URL, data={
         "code": code,
         "client_id": current_app.config["YOUTUBE_CLIENT_ID"],
         "client_secret": current_app.config["YOUTUBE_CLIENT_SECRET"],
         "redirect_uri": current_app.config["YOUTUBE_REDIRECT_URI"],
         "grant_type": "authorization_code",
-    })
+    }, retries=0)  # an authorization code is single-use
     tokens = token_resp.json()
     access_token = tokens.get("access_token")
     refresh_token = tokens.get("refresh_token")
 
-    channel_resp = requests.get(
+    channel_resp = http_client.get(
         YOUTUBE_CHANNEL_URL,
         params={"part": "snippet", "mine": "true"},
         headers={"Authorization": f"Bearer {access_token}"},
@@ -140,24 +177,11 @@ def youtube_callback():
     channel_id = channel.get("id", "")
     channel_title = channel.get("snippet", {}).get("title", "YouTube Channel")
 
-    account = SocialAccount.query.filter_by(user_id=user_id, platform="youtube").first()
-    if account:
-        account.access_token = access_token
-        account.refresh_token = refresh_token
-        account.account_id = channel_id
-        account.account_name = channel_title
-        account.is_active = True
-    else:
-        account = SocialAccount(
-            user_id=user_id,
-            platform="youtube",
-            access_token=access_token,
-            refresh_token=refresh_token,
-            account_id=channel_id,
-            account_name=channel_title,
-        )
-        db.session.add(account)
-    db.session.commit()
+    # Google sends a refresh token only on first consent; a reconnect keeps the stored one
+    extra = {"refresh_token": refresh_token} if refresh_token else {}
+    _save_account(user_id, "youtube", access_token=access_token,
+                  token_expires_at=expires_at(tokens.get("expires_in"), default=3600),
+                  account_id=channel_id, account_name=channel_title, **extra)
 
     return redirect(f"{current_app.config['FRONTEND_URL']}/accounts?success=youtube")
 
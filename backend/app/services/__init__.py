@@ -1,4 +1,5 @@
 from .openai_service import generate_5_day_plan, improve_content, make_more_engaging, regenerate_single_day
+from .generation_engine import generate_plan, iter_plan
 from .prompt_templates import build_generation_prompt
 
 __all__ = [
@@ -6,5 +7,7 @@ __all__ = [
     "improve_content",
     "make_more_engaging",
     "regenerate_single_day",
+    "generate_plan",
+    "iter_plan",
     "build_generation_prompt",
 ]
@@ -0,0 +1,126 @@
+"""
+Regenerate every user's calendar, e.g. after a template or prompt change.
+
+Profiles are streamed in id order (a server-side cursor on Postgres, keyset
+pages elsewhere), generated on a process pool and written back one chunk per
+transaction. After each commit the last profile id is saved to a checkpoint
+file, so an interrupted run resumes where it stopped.
+"""
+
+import json
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+from types import SimpleNamespace
+from flask import current_app
+from sqlalchemy import func, select
+from .. import db
+from ..models.firm_profile import FirmProfile
+from .calendar_store import replace_calendars, with_source_hash
+from .fallback_generator import generate_fallback_calendars
+
+PROFILE_COLUMNS = (
+    FirmProfile.id, FirmProfile.user_id, FirmProfile.business_name, FirmProfile.industry,
+    FirmProfile.target_audience, FirmProfile.brand_tone, FirmProfile.primary_goal,
+    FirmProfile.posting_frequency,
+)
+
+_worker_app = None
+
+
+def _init_worker(source: str, config: dict):
+    """Process-pool initializer; the model source needs an app context per worker, built from the caller's config."""
+    global _worker_app
+    if source == "model":
+        from .. import create_app
+        _worker_app = create_app(SimpleNamespace(**config))
+
+
+def _generate_batch(profiles: list, days: int, source: str) -> list:
+    profiles = [SimpleNamespace(**p) for p in profiles]
+    if source == "template":
+        # tagged like the engine's fallback days, so with_source_hash leaves them unhashed
+        return [[{**d, "fallback": True} for d in plan] for plan in generate_fallback_calendars(profiles, days=days)]
+    from .generation_engine import generate_plan
+    with _worker_app.app_context():
+        return [generate_plan(p, days=days) for p in profiles]
+
+
+def read_checkpoint(path: str) -> dict:
+    try:
+        with open(path, encoding="utf-8") as fh:
+            return json.load(fh)
+    except (OSError, ValueError):
+        return {"last_profile_id": 0, "processed": 0}
+
+
+def write_checkpoint(path: str, state: dict):
+    tmp = f"{path}.tmp"
+    with open(tmp, "w", encoding="utf-8") as fh:
+        json.dump(state, fh)
+    os.replace(tmp, path)
+
+
+def iter_profile_chunks(after_id: int, chunk_size: int):
+    query = select(*PROFILE_COLUMNS).where(FirmProfile.id > after_id).order_by(FirmProfile.id)
+    if db.engine.dialect.name == "postgresql":
+        # separate connection so chunk commits on the session don't close the cursor
+        with db.engine.connect() as conn:
+            result = conn.execution_options(stream_results=True, yield_per=chunk_size).execute(query)
+            for part in result.partitions():
+                yield [dict(row._mapping) for row in part]
+        return
+    # SQLite cannot commit while another connection holds a read cursor: page by key
+    while True:
+        rows = db.session.execute(query.where(FirmProfile.id > after_id).limit(chunk_size)).all()
+        if not rows:
+            return
+        after_id = rows[-1].id
+        yield [dict(row._mapping) for row in rows]
+
+
+def _split(items: list, parts: int) -> list:
+    size = max(1, -(-len(items) // parts))
+    return [items[i:i + size] for i in range(0, len(items), size)]
+
+
+def regenerate_all(days: int, chunk_size: int, processes: int, source: str, checkpoint: str,
+                   restart: bool = False, echo=print):
+    state = {"last_profile_id": 0, "processed": 0} if restart else read_checkpoint(checkpoint)
+    remaining = db.session.execute(
+        select(func.count()).select_from(FirmProfile).where(FirmProfile.id > state["last_profile_id"])
+    ).scalar()
+    if state["last_profile_id"]:
+        echo(f"Resuming after profile {state['last_profile_id']} ({state['processed']} already done)")
+    echo(f"{remaining} profiles to regenerate ({days} days each, source={source}, {processes} processes)")
+
+    started = time.perf_counter()
+    done = rows_written = 0
+    config = {key: value for key, value in current_app.config.items() if key.isupper()}
+    with ProcessPoolExecutor(max_workers=processes, initializer=_init_worker, initargs=(source, config)) as pool:
+        for chunk in iter_profile_chunks(state["last_profile_id"], chunk_size):
+            batches = _split(chunk, processes)
+            results = pool.map(_generate_batch, batches, [days] * len(batches), [source] * len(batches))
+            calendars = {}
+            for batch, plans in zip(batches, results):
+                for profile, plan in zip(batch, plans):
+                    calendars[profile["user_id"]] = with_source_hash(SimpleNamespace(**profile), plan)
+            try:
+                rows_written += replace_calendars(calendars)
+                db.session.commit()
+            except Exception:
+                db.session.rollback()
+                raise
+
+            done += len(chunk)
+            state = {"last_profile_id": chunk[-1]["id"], "processed": state["processed"] + len(chunk)}
+            write_checkpoint(checkpoint, state)
+            elapsed = time.perf_counter() - started
+            echo(f"  {done}/{remaining} profiles ({done * 100 // max(remaining, 1)}%), "
+                 f"{rows_written} rows, {done / elapsed:.1f} profiles/s")
+
+    if os.path.exists(checkpoint):
+        os.remove(checkpoint)
+    elapsed = time.perf_counter() - started
+    echo(f"Done: {done} profiles, {rows_written} rows in {elapsed:.1f}s")
+    return done
@@ -0,0 +1,78 @@
+"""
+Calendars generated ahead of time, when the profile is saved.
+
+Saving a profile enqueues a "precompute" job (superseding any still-queued
+one for the user) that generates the plan in the background and stores it
+in calendar_drafts with the hash of the profile inputs it came from. POST
+/api/content/generate then takes a draft whose hash still matches the
+profile and writes it as the calendar without waiting on the model; with no
+fresh draft it generates synchronously as before. A draft is used once, and
+a plan in which any day fell back to a template is not stored.
+"""
+
+import hashlib
+import json
+from datetime import datetime, timedelta
+from flask import current_app
+from sqlalchemy import delete, select
+from sqlalchemy.exc import IntegrityError
+from .. import db
+from ..models.calendar_draft import CalendarDraft
+from ..models.firm_profile import FirmProfile
+from .calendar_store import SOURCE_FIELDS
+from .generation_engine import fallback_days, generate_plan
+
+
+def plan_hash(profile, days: int = 5) -> str:
+    raw = json.dumps([days] + [getattr(profile, f, None) for f in SOURCE_FIELDS], ensure_ascii=False)
+    return hashlib.sha256(raw.encode("utf-8")).hexdigest()
+
+
+def _current_hash(user_id: int, days: int):
+    row = db.session.execute(
+        select(*(getattr(FirmProfile, f) for f in SOURCE_FIELDS)).where(FirmProfile.user_id == user_id)
+    ).first()
+    return plan_hash(row, days) if row is not None else None
+
+
+def _fresh(source_hash: str):
+    max_age = timedelta(seconds=current_app.config["CALENDAR_DRAFT_MAX_AGE"])
+    return (CalendarDraft.source_hash == source_hash) & (CalendarDraft.created_at >= datetime.utcnow() - max_age)
+
+
+def precompute_draft(user_id: int, source_hash: str, days: int = 5) -> dict:
+    """Job handler: generate and store the draft unless a newer profile save superseded it."""
+    if _current_hash(user_id, days) != source_hash:
+        return {"superseded": True}
+    if db.session.execute(select(CalendarDraft.id).where(CalendarDraft.user_id == user_id,
+                                                         _fresh(source_hash))).first():
+        return {"draft": "fresh"}
+
+    profile = FirmProfile.query.filter_by(user_id=user_id).first()
+    plan = generate_plan(profile, days=days)
+    fell_back = fallback_days(plan)
+    if fell_back:
+        # without a draft /generate asks the model again rather than serve templates
+        return {"draft": "skipped", "fallback_days": fell_back}
+    # the profile may have changed while the model was answering
+    db.session.expire_all()
+    if _current_hash(user_id, days) != source_hash:
+        return {"superseded": True}
+    try:
+        db.session.execute(delete(CalendarDraft).where(CalendarDraft.user_id == user_id))
+        db.session.add(CalendarDraft(user_id=user_id, source_hash=source_hash, days=json.dumps(plan)))
+        db.session.commit()
+    except IntegrityError:
+        db.session.rollback()  # a concurrent job for the same inputs stored it first
+    return {"draft": "stored", "days": len(plan)}
+
+
+def take_draft(user_id: int, profile, days: int = 5):
+    """The fresh draft's days, deleted in the caller's transaction; None without one."""
+    draft = db.session.execute(
+        select(CalendarDraft).where(CalendarDraft.user_id == user_id, _fresh(plan_hash(profile, days)))
+    ).scalar_one_or_none()
+    if draft is None:
+        return None
+    db.session.delete(draft)
+    return json.loads(draft.days)
@@ -0,0 +1,192 @@
+"""
+Set-based read/write paths for ContentCalendar.
+
+Replacing a calendar used to be a DELETE + commit followed by one ORM add per
+row and a second commit, so a crash in between left the user with nothing.
+Here the delete and a single multi-row INSERT ... RETURNING run in one
+transaction, and the returned rows are serialized directly without building
+ContentCalendar instances. Listing selects only the requested columns and
+pages with a (day, id) keyset cursor. Every generated row records the
+source_hash of the profile inputs it came from, so incremental generation
+can upsert only the days whose inputs changed.
+"""
+
+import base64
+import hashlib
+import json
+from datetime import datetime
+from sqlalchemy import and_, delete, insert, or_, select, update
+from .. import db
+from ..models.content_calendar import ContentCalendar
+
+GENERATED_FIELDS = (
+    "day", "platform", "content_idea", "hook", "caption", "hashtags", "script",
+    "cta", "seo_title", "seo_description", "seo_tags",
+)
+
+# profile fields that prompts and templates read; source_hash covers exactly these
+SOURCE_FIELDS = ("business_name", "industry", "target_audience", "brand_tone", "primary_goal")
+
+_table = ContentCalendar.__table__
+
+# publisher bookkeeping, not part of ContentCalendar.to_dict
+INTERNAL_FIELDS = ("publish_attempts", "publish_not_before", "source_hash")
+LIST_FIELDS = tuple(c.name for c in _table.c if c.name != "user_id" and c.name not in INTERNAL_FIELDS)
+PAGE_MAX = 200
+
+
+def _row_to_dict(row) -> dict:
+    """Same shape as ContentCalendar.to_dict, built from a Core row."""
+    data = {k: v for k, v in row._mapping.items() if k not in INTERNAL_FIELDS}
+    for key in ("created_at", "updated_at", "edited_at", "scheduled_at", "published_at"):
+        data[key] = data[key].isoformat() if data[key] else None
+    return data
+
+
+def source_hash(profile, day: int, platform: str) -> str:
+    """Fingerprint of what a day is generated from; a changed hash marks the day stale."""
+    raw = json.dumps([day, platform] + [getattr(profile, f, None) for f in SOURCE_FIELDS], ensure_ascii=False)
+    return hashlib.sha256(raw.encode("utf-8")).hexdigest()
+
+
+def with_source_hash(profile, days: list) -> list:
+    """Generated days annotated with their source_hash, ready for insert_days/upsert_days.
+
+    Template fallback days get no hash, so the next incremental run retries them.
+    """
+    return [{**d, "source_hash": None if d.get("fallback") else source_hash(profile, d["day"], d["platform"])}
+            for d in days]
+
+
+def _values(d: dict) -> dict:
+    return {**{f: d.get(f) for f in GENERATED_FIELDS}, "source_hash": d.get("source_hash")}
+
+
+def parse_fields(raw: str) -> tuple:
+    """`?fields=` value -> validated column names (all list fields when empty)."""
+    if not raw:
+        return LIST_FIELDS
+    fields = tuple(dict.fromkeys(f.strip() for f in raw.split(",") if f.strip()))
+    unknown = [f for f in fields if f not in LIST_FIELDS]
+    if unknown:
+        raise ValueError(f"Unknown fields: {', '.join(unknown)}")
+    return fields
+
+
+def encode_cursor(day: int, row_id: int) -> str:
+    return base64.urlsafe_b64encode(json.dumps([day, row_id]).encode()).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str) -> tuple:
+    try:
+        day, row_id = json.loads(base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4)))
+        return int(day), int(row_id)
+    except (ValueError, TypeError):
+        raise ValueError("Invalid cursor")
+
+
+def list_statement(user_id: int, fields: tuple = LIST_FIELDS, limit: int = None, cursor: str = None):
+    """The keyset SELECT behind list_calendar; fetches one row past `limit` to detect a next page."""
+    columns = [_table.c[f] for f in dict.fromkeys(fields + ("id", "day"))]
+    stmt = select(*columns).where(_table.c.user_id == user_id).order_by(_table.c.day, _table.c.id)
+    if cursor:
+        day, row_id = decode_cursor(cursor)
+        stmt = stmt.where(or_(_table.c.day > day, and_(_table.c.day == day, _table.c.id > row_id)))
+    if limit is not None:
+        stmt = stmt.limit(limit + 1)
+    return stmt
+
+
+def list_calendar(user_id: int, fields: tuple = LIST_FIELDS, limit: int = None, cursor: str = None):
+    """One page of the user's calendar in (day, id) order -> (items, next_cursor)."""
+    rows = db.session.execute(list_statement(user_id, fields, limit, cursor)).all()
+
+    next_cursor = None
+    if limit is not None and len(rows) > limit:
+        rows = rows[:limit]
+        next_cursor = encode_cursor(rows[-1].day, rows[-1].id)
+    # requested fields lead the select list; datetimes are left to utils.serialize
+    items = [dict(zip(fields, row)) for row in rows]
+    return items, next_cursor
+
+
+def insert_days(user_id: int, days: list) -> list:
+    """Insert generated days in one statement; caller owns the transaction."""
+    if not days:
+        return []
+    rows = [{"user_id": user_id, **_values(d)} for d in days]
+    stmt = insert(_table).returning(*_table.c, sort_by_parameter_order=True)
+    result = db.session.execute(stmt, rows)
+    return [_row_to_dict(r) for r in result]
+
+
+def upsert_days(user_id: int, updates: dict, inserts: list, expected: dict = None) -> int:
+    """Overwrite rows in place ({row id: day}) and insert new days; caller owns the transaction.
+
+    A row is only overwritten while it has no hand edit, schedule or publication
+    and, when `expected` ({row id: source_hash as read}) is given, still has that
+    hash; rows changed or deleted since they were read are skipped. Returns the
+    number of rows written.
+    """
+    now = datetime.utcnow()
+    written = 0
+    for row_id, d in updates.items():
+        stmt = update(_table).where(
+            _table.c.id == row_id, _table.c.user_id == user_id, _table.c.edited_at.is_(None),
+            _table.c.scheduled_at.is_(None), _table.c.is_published.isnot(True),
+        )
+        if expected is not None:
+            stmt = stmt.where(_table.c.source_hash.is_not_distinct_from(expected[row_id]))
+        written += db.session.execute(stmt.values(**_values(d), updated_at=now)).rowcount
+    insert_days(user_id, inserts)
+    return written + len(inserts)
+
+
+def read_calendar(user_id: int) -> list:
+    """The whole calendar, serialized like insert_days' return value."""
+    rows = db.session.execute(
+        select(*_table.c).where(_table.c.user_id == user_id).order_by(_table.c.day, _table.c.id)
+    )
+    return [_row_to_dict(r) for r in rows]
+
+
+def _replaceable():
+    """Rows a regeneration may delete: the publisher has no claim on them and they are not scheduled or published."""
+    return and_(_table.c.is_published.isnot(True), _table.c.scheduled_at.is_(None),
+                _table.c.publish_not_before.is_(None))
+
+
+def clear_calendar(user_id: int):
+    """Delete the user's replaceable rows; caller owns the transaction."""
+    db.session.execute(delete(_table).where(_table.c.user_id == user_id, _replaceable()))
+
+
+def replace_calendar(user_id: int, days: list) -> list:
+    """Atomically swap the user's calendar for `days`; returns the serialized calendar.
+
+    Scheduled and published rows stay, and the new days they cover are dropped.
+    """
+    try:
+        clear_calendar(user_id)
+        kept = set(db.session.execute(select(_table.c.day).where(_table.c.user_id == user_id)).scalars())
+        insert_days(user_id, [d for d in days if d["day"] not in kept])
+        db.session.commit()
+    except Exception:
+        db.session.rollback()
+        raise
+    return read_calendar(user_id)
+
+
+def replace_calendars(calendars: dict):
+    """Swap calendars for many users ({user_id: days}) in one transaction, like replace_calendar; caller commits."""
+    if not calendars:
+        return 0
+    user_ids = list(calendars)
+    db.session.execute(delete(_table).where(_table.c.user_id.in_(user_ids), _replaceable()))
+    kept = {tuple(r) for r in db.session.execute(
+        select(_table.c.user_id, _table.c.day).where(_table.c.user_id.in_(user_ids)))}
+    rows = [{"user_id": user_id, **_values(d)} for user_id, days in calendars.items() for d in days
+            if (user_id, d["day"]) not in kept]
+    if rows:
+        db.session.execute(insert(_table), rows)
+    return len(rows)
@@ -0,0 +1,207 @@
+"""
+Calendar operations shared by the HTTP routes and the background job worker.
+"""
+
+from datetime import datetime
+from sqlalchemy import select, update
+from sqlalchemy.orm import undefer_group
+from .. import db
+from ..models.content_calendar import ContentCalendar
+from ..models.firm_profile import FirmProfile
+from .calendar_drafts import take_draft
+from .calendar_store import read_calendar, replace_calendar, source_hash, upsert_days, with_source_hash
+from .fallback_generator import improve_fallback, engaging_fallback, platform_for_day, regenerate_fallback
+from .generation_engine import generate_plan
+
+
+class ContentError(Exception):
+    """A user-facing failure; `status` is the HTTP code the route should return."""
+
+    def __init__(self, message: str, status: int = 400):
+        super().__init__(message)
+        self.message = message
+        self.status = status
+
+
+def get_profile(user_id: int):
+    profile = FirmProfile.query.filter_by(user_id=user_id).first()
+    if not profile:
+        raise ContentError("Please complete your firm profile first", 400)
+    return profile
+
+
+def get_item(user_id: int, content_id: int):
+    item = (
+        ContentCalendar.query
+        .options(undefer_group("body"))
+        .filter_by(id=content_id, user_id=user_id)
+        .first()
+    )
+    if not item:
+        raise ContentError("Content not found", 404)
+    return item
+
+
+def _changes(item, new_values: dict) -> dict:
+    """The subset of new_values apply_changes would write."""
+    return {k: v for k, v in new_values.items() if hasattr(item, k) and v}
+
+
+def apply_changes(item, changes: dict):
+    for k, v in _changes(item, changes).items():
+        setattr(item, k, v)
+
+
+def commit_item(item) -> dict:
+    """Commit and serialize; one reload that brings the deferred bodies back too."""
+    item_id = item.id
+    db.session.commit()
+    db.session.execute(
+        select(ContentCalendar).options(undefer_group("body")).where(ContentCalendar.id == item_id),
+        execution_options={"populate_existing": True},
+    ).scalar_one()
+    return item.to_dict()
+
+
+def generate_calendar(user_id: int, incremental: bool = False) -> list:
+    profile = get_profile(user_id)
+    if incremental:
+        return refresh_calendar(user_id, profile)
+    # a draft precomputed on profile save skips the model wait
+    plan = take_draft(user_id, profile) or generate_plan(profile, days=5)
+    return replace_calendar(user_id, with_source_hash(profile, plan))
+
+
+def refresh_calendar(user_id: int, profile, days: int = 5) -> list:
+    """Regenerate only stale days, in place.
+
+    A day is kept when its source_hash still matches the profile, when it was
+    edited by hand or when it is published or scheduled to be; the others are
+    generated and written over the same row (ids survive), or inserted if
+    missing. A row that changed while the model was answering is skipped.
+    """
+    rows = db.session.execute(
+        select(ContentCalendar.id, ContentCalendar.day, ContentCalendar.source_hash,
+               ContentCalendar.edited_at, ContentCalendar.is_published, ContentCalendar.scheduled_at)
+        .where(ContentCalendar.user_id == user_id)
+        .order_by(ContentCalendar.day, ContentCalendar.id)
+    ).all()
+    by_day = {}
+    for row in rows:
+        by_day.setdefault(row.day, row)
+
+    stale = []
+    for day in range(1, days + 1):
+        row = by_day.get(day)
+        if row is not None and (row.edited_at or row.is_published or row.scheduled_at
+                                or row.source_hash == source_hash(profile, day, platform_for_day(day))):
+            continue
+        stale.append(day)
+    if not stale:
+        return read_calendar(user_id)
+
+    draft = take_draft(user_id, profile, days)
+    if draft is not None:
+        generated = with_source_hash(profile, [d for d in draft if d["day"] in stale])
+    else:
+        generated = with_source_hash(profile, generate_plan(profile, days=days, only=set(stale)))
+    updates = {by_day[d["day"]].id: d for d in generated if d["day"] in by_day}
+    inserts = [d for d in generated if d["day"] not in by_day]
+    # the model call can take a while: rows edited, scheduled or deleted meanwhile are left alone
+    expected = {by_day[d["day"]].id: by_day[d["day"]].source_hash for d in generated if d["day"] in by_day}
+    try:
+        upsert_days(user_id, updates, inserts, expected)
+        db.session.commit()
+    except Exception:
+        db.session.rollback()
+        raise
+    return read_calendar(user_id)
+
+
+def improve_item(user_id: int, content_id: int) -> dict:
+    item = get_item(user_id, content_id)
+    apply_changes(item, improve_fallback(item))
+    return commit_item(item)
+
+
+def engaging_item(user_id: int, content_id: int) -> dict:
+    item = get_item(user_id, content_id)
+    apply_changes(item, engaging_fallback(item))
+    return commit_item(item)
+
+
+def regenerate_item(user_id: int, content_id: int) -> dict:
+    item = get_item(user_id, content_id)
+    profile = FirmProfile.query.filter_by(user_id=user_id).first()
+    apply_changes(item, regenerate_fallback(item.day, item.platform, profile))
+    return commit_item(item)
+
+
+BATCH_OPERATIONS = ("improve", "engaging", "regenerate")
+BATCH_MAX_ITEMS = 100
+
+
+def _batch_ids(content_ids: list, operation: str) -> list:
+    if operation not in BATCH_OPERATIONS:
+        raise ContentError(f"operation must be one of {BATCH_OPERATIONS}", 400)
+    try:
+        ids = sorted({int(i) for i in content_ids})
+    except (TypeError, ValueError):
+        raise ContentError("ids must be a list of integers", 400)
+    if not ids:
+        raise ContentError("No content ids provided", 400)
+    if len(ids) > BATCH_MAX_ITEMS:
+        raise ContentError(f"At most {BATCH_MAX_ITEMS} items per batch", 400)
+    return ids
+
+
+def _check_owned(ids: list, found: set):
+    missing = set(ids) - found
+    if missing:
+        raise ContentError(f"Content not found: {sorted(missing)}", 404)
+
+
+def validate_batch(user_id: int, content_ids: list, operation: str) -> list:
+    """The checks batch_apply makes, without running it (for the queued variant); returns the ids."""
+    ids = _batch_ids(content_ids, operation)
+    owned = db.session.execute(
+        select(ContentCalendar.id).where(ContentCalendar.user_id == user_id, ContentCalendar.id.in_(ids))
+    ).scalars()
+    _check_owned(ids, set(owned))
+    return ids
+
+
+def batch_apply(user_id: int, content_ids: list, operation: str) -> list:
+    """Run one operation over many items: one SELECT, one bulk UPDATE, one commit."""
+    ids = _batch_ids(content_ids, operation)
+    items = (
+        ContentCalendar.query
+        .options(undefer_group("body"))
+        .filter(ContentCalendar.user_id == user_id, ContentCalendar.id.in_(ids))
+        .order_by(ContentCalendar.day.asc(), ContentCalendar.id.asc())
+        .all()
+    )
+    _check_owned(ids, {i.id for i in items})
+
+    profile = FirmProfile.query.filter_by(user_id=user_id).first() if operation == "regenerate" else None
+    now = datetime.utcnow()
+    params, records = [], []
+    for item in items:
+        if operation == "improve":
+            changes = _changes(item, improve_fallback(item))
+        elif operation == "engaging":
+            changes = _changes(item, engaging_fallback(item))
+        else:
+            changes = _changes(item, regenerate_fallback(item.day, item.platform, profile))
+        changes["updated_at"] = now
+        params.append({"id": item.id, **changes})
+        records.append({**item.to_dict(), **changes, "updated_at": now.isoformat()})
+
+    try:
+        # ORM bulk UPDATE by primary key: executemany, grouped by changed column set
+        db.session.execute(update(ContentCalendar), params)
+        db.session.commit()
+    except Exception:
+        db.session.rollback()
+        raise
+    return records
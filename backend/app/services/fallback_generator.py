@@ -5,6 +5,7 @@ Generates realistic sample content from the firm profile.
 """
 
 import random
+from functools import lru_cache
 
 INSTAGRAM_IDEAS = [
     "Behind-the-scenes look at our process",
@@ -34,51 +35,49 @@ CTAS = [
 ]
 
 
-def _instagram_day(day: int, profile) -> dict:
-    idea = INSTAGRAM_IDEAS[day % len(INSTAGRAM_IDEAS)]
+def _instagram_template(idea: str, ctx) -> dict:
     return {
-        "day": day,
+        "day": None,
         "platform": "instagram",
-        "content_idea": f"{idea} — {profile.business_name}",
-        "hook": f"🚀 Did you know that {profile.industry} businesses are changing fast?",
+        "content_idea": f"{idea} — {ctx.business_name}",
+        "hook": f"🚀 Did you know that {ctx.industry} businesses are changing fast?",
         "caption": (
-            f"At {profile.business_name}, we're passionate about helping {profile.target_audience}.\n\n"
-            f"Our {profile.brand_tone} approach means you always get results focused on {profile.primary_goal}.\n\n"
+            f"At {ctx.business_name}, we're passionate about helping {ctx.target_audience}.\n\n"
+            f"Our {ctx.brand_tone} approach means you always get results focused on {ctx.primary_goal}.\n\n"
             f"Here's what we've been working on: {idea.lower()}. "
             f"We believe in transparency and sharing the journey with you.\n\n"
             f"What's one thing you'd like to see us post about? Drop it in the comments! 👇"
         ),
         "hashtags": (
-            f"#{profile.industry.replace(' ', '')} #{profile.business_name.replace(' ', '')} "
+            f"#{ctx.industry_tag} #{ctx.business_tag} "
             f"#ContentCreator #SmallBusiness #GrowthMindset "
             f"#Marketing #BusinessTips #Entrepreneur #Success #Instagram"
         ),
         "script": "",
-        "cta": random.choice(CTAS),
+        "cta": None,  # drawn per call
         "seo_title": "",
         "seo_description": "",
         "seo_tags": "",
     }
 
 
-def _facebook_day(day: int, profile) -> dict:
-    idea = FACEBOOK_IDEAS[day % len(FACEBOOK_IDEAS)]
+def _facebook_template(idea: str, ctx) -> dict:
     return {
-        "day": day,
+        "day": None,
         "platform": "facebook",
-        "content_idea": f"{idea} — {profile.business_name}",
-        "hook": f"We want to hear from you, {profile.target_audience}!",
+        "content_idea": f"{idea} — {ctx.business_name}",
+        "hook": f"We want to hear from you, {ctx.target_audience}!",
         "caption": (
-            f"Hello from {profile.business_name}! 👋\n\n"
+            f"Hello from {ctx.business_name}! 👋\n\n"
             f"Today we're talking about: {idea}.\n\n"
-            f"In the {profile.industry} space, we know that {profile.target_audience} "
-            f"face real challenges every day. That's why our goal is {profile.primary_goal} "
+            f"In the {ctx.industry} space, we know that {ctx.target_audience} "
+            f"face real challenges every day. That's why our goal is {ctx.primary_goal} "
             f"for every single client we work with.\n\n"
-            f"We take a {profile.brand_tone} approach to everything we do, and it's making a real difference.\n\n"
-            f"👉 What's the biggest challenge you're facing right now in {profile.industry}? "
+            f"We take a {ctx.brand_tone} approach to everything we do, and it's making a real difference.\n\n"
+            f"👉 What's the biggest challenge you're facing right now in {ctx.industry}? "
             f"Let us know in the comments — we read every single one!"
         ),
-        "hashtags": f"#{profile.industry.replace(' ', '')} #{profile.business_name.replace(' ', '')} #Community",
+        "hashtags": f"#{ctx.industry_tag} #{ctx.business_tag} #Community",
         "script": "",
         "cta": "Tell us in the comments!",
         "seo_title": "",
@@ -87,50 +86,131 @@ def _facebook_day(day: int, profile) -> dict:
     }
 
 
-def _youtube_day(day: int, profile) -> dict:
-    idea = YOUTUBE_IDEAS[day % len(YOUTUBE_IDEAS)]
-    title = f"{idea} | {profile.business_name}"
+def _youtube_template(idea: str, ctx) -> dict:
+    title = f"{idea} | {ctx.business_name}"
     return {
-        "day": day,
+        "day": None,
         "platform": "youtube",
-        "content_idea": f"{idea} — {profile.business_name}",
+        "content_idea": f"{idea} — {ctx.business_name}",
         "hook": f"In the next few minutes, you'll learn exactly how to {idea.lower()}.",
         "caption": f"Watch our latest video: {title}",
         "hashtags": "",
         "script": (
-            f"[INTRO]\nHey everyone, welcome back to the {profile.business_name} channel! "
+            f"[INTRO]\nHey everyone, welcome back to the {ctx.business_name} channel! "
             f"I'm so glad you're here today.\n\n"
             f"[HOOK]\nToday's video is all about: {idea}. "
-            f"If you're in {profile.industry} and targeting {profile.target_audience}, "
+            f"If you're in {ctx.industry} and targeting {ctx.target_audience}, "
             f"this is going to be super valuable for you.\n\n"
             f"[MAIN CONTENT]\n"
             f"Point 1: Understanding the basics of {idea.lower()}\n"
-            f"Point 2: How {profile.business_name} approaches this for {profile.primary_goal}\n"
-            f"Point 3: Our {profile.brand_tone} strategy that works\n\n"
+            f"Point 2: How {ctx.business_name} approaches this for {ctx.primary_goal}\n"
+            f"Point 3: Our {ctx.brand_tone} strategy that works\n\n"
             f"[OUTRO]\nIf you found this helpful, please hit LIKE and SUBSCRIBE "
             f"for weekly content like this. See you in the next video!"
         ),
         "cta": "Like, Subscribe, and hit the notification bell! 🔔",
         "seo_title": title[:70],
         "seo_description": (
-            f"{idea} — In this video, {profile.business_name} shares expert insights "
-            f"for {profile.target_audience} in the {profile.industry} industry. "
-            f"Our goal is your {profile.primary_goal}. "
+            f"{idea} — In this video, {ctx.business_name} shares expert insights "
+            f"for {ctx.target_audience} in the {ctx.industry} industry. "
+            f"Our goal is your {ctx.primary_goal}. "
             f"Subscribe for weekly tips and strategies!"
         ),
         "seo_tags": (
-            f"{profile.industry}, {profile.business_name}, {idea.split(':')[0].strip()}, "
-            f"tutorial, tips, {profile.target_audience}, {profile.primary_goal}, "
+            f"{ctx.industry}, {ctx.business_name}, {idea.split(':')[0].strip()}, "
+            f"tutorial, tips, {ctx.target_audience}, {ctx.primary_goal}, "
             f"how to, guide, strategy"
         ),
     }
 
 
+class ProfileContext:
+    """Profile-derived strings, plus every (platform, idea) template rendered once."""
+
+    __slots__ = ("business_name", "industry", "target_audience", "brand_tone", "primary_goal",
+                 "industry_tag", "business_tag", "templates")
+
+    def __init__(self, business_name, industry, target_audience, brand_tone, primary_goal):
+        self.business_name = business_name
+        self.industry = industry
+        self.target_audience = target_audience
+        self.brand_tone = brand_tone
+        self.primary_goal = primary_goal
+        self.industry_tag = industry.replace(' ', '')
+        self.business_tag = business_name.replace(' ', '')
+        self.templates = {
+            "instagram": [_instagram_template(idea, self) for idea in INSTAGRAM_IDEAS],
+            "facebook": [_facebook_template(idea, self) for idea in FACEBOOK_IDEAS],
+            "youtube": [_youtube_template(idea, self) for idea in YOUTUBE_IDEAS],
+        }
+
+
+_PROFILE_FIELDS = ("business_name", "industry", "target_audience", "brand_tone", "primary_goal")
+
+
+@lru_cache(maxsize=4096)
+def _compile(*values) -> ProfileContext:
+    return ProfileContext(*values)
+
+
+def compile_profile(profile) -> ProfileContext:
+    """Memoized per profile version: any edit to a template field yields a new context."""
+    return _compile(*(getattr(profile, f) for f in _PROFILE_FIELDS))
+
+
+def profile_cache_info() -> dict:
+    return _compile.cache_info()._asdict()
+
+
+def _render(ctx: ProfileContext, platform: str, day: int) -> dict:
+    templates = ctx.templates[platform]
+    result = dict(templates[day % len(templates)])
+    result["day"] = day
+    if result["cta"] is None:
+        result["cta"] = random.choice(CTAS)
+    return result
+
+
+def _instagram_day(day: int, profile) -> dict:
+    return _render(compile_profile(profile), "instagram", day)
+
+
+def _facebook_day(day: int, profile) -> dict:
+    return _render(compile_profile(profile), "facebook", day)
+
+
+def _youtube_day(day: int, profile) -> dict:
+    return _render(compile_profile(profile), "youtube", day)
+
+
 PLATFORM_FUNCS = [_instagram_day, _facebook_day, _youtube_day, _instagram_day, _facebook_day]
+PLATFORM_ROTATION = ["instagram", "facebook", "youtube", "instagram", "facebook"]
+PLATFORM_DAY_FUNCS = {"instagram": _instagram_day, "facebook": _facebook_day, "youtube": _youtube_day}
+
+
+def platform_for_day(day: int) -> str:
+    return PLATFORM_ROTATION[(day - 1) % len(PLATFORM_ROTATION)]
+
+
+def fallback_day(day: int, platform: str, profile) -> dict:
+    """Template content for one day, keeping day/platform keys."""
+    return PLATFORM_DAY_FUNCS.get(platform, _instagram_day)(day, profile)
+
+
+def generate_fallback_days(profile, days: int = 5) -> list:
+    """Template plan of any length, cycling the 5-day platform rotation."""
+    return [PLATFORM_FUNCS[i % len(PLATFORM_FUNCS)](i + 1, profile) for i in range(days)]
+
+
+def generate_fallback_calendars(profiles, days: int = 5) -> list:
+    """Template plans for many profiles in one pass; results follow input order."""
+    plan = [(d, platform_for_day(d)) for d in range(1, days + 1)]
+    return [[_render(ctx, platform, day) for day, platform in plan]
+            for ctx in map(compile_profile, profiles)]
 
 
 def generate_fallback_5_days(profile) -> list:
-    return [PLATFORM_FUNCS[i](i + 1, profile) for i in range(5)]
+    return generate_fallback_days(profile, days=5)
 
 
 def improve_fallback(item) -> dict:
@@ -164,9 +244,7 @@ def engaging_fallback(item) -> dict:
 
 def regenerate_fallback(day: int, platform: str, profile) -> dict:
     """Generate fresh template content for a specific day/platform."""
-    funcs = {"instagram": _instagram_day, "facebook": _facebook_day, "youtube": _youtube_day}
-    fn = funcs.get(platform, _instagram_day)
-    result = fn(day, profile)
+    result = fallback_day(day, platform, profile)
     # Remove platform/day keys since route sets them separately
     result.pop("day", None)
     result.pop("platform", None)
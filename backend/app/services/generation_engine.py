@@ -0,0 +1,199 @@
+"""
+Concurrent per-day plan generation.
+
+Instead of one large completion for the whole plan, each day is requested
+separately on a bounded thread pool. A day whose call fails, returns bad
+JSON or runs past GEMINI_CALL_TIMEOUT is replaced by its template from
+fallback_generator, so one bad answer never discards the other days and
+total latency tracks the slowest single day. Template days carry
+`"fallback": True` so callers can tell them from model output.
+
+With GEMINI_PLAN_MODE=stream the whole plan is one streamed completion
+instead; each day is parsed and handed on as soon as its object closes,
+and days the stream never delivered fall back to templates.
+"""
+
+import threading
+import time
+from types import SimpleNamespace
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
+from flask import current_app
+from ..utils.circuit_breaker import gemini_breaker
+from .calendar_store import GENERATED_FIELDS
+from .fallback_generator import fallback_day, platform_for_day
+from .json_stream import iter_json_objects
+from .openai_service import _generate, _generate_stream, _parse_json_response, model_available
+from .prompt_templates import build_day_prompt, build_generation_prompt
+
+DAY_SYSTEM_PROMPT = (
+    "You are a world-class social media content strategist. "
+    "Always respond with valid JSON exactly as instructed. "
+    "Return ONLY a single JSON object, no markdown fences, no extra text."
+)
+
+PLAN_SYSTEM_PROMPT = (
+    "You are a world-class social media content strategist. "
+    "Always respond with valid JSON exactly as instructed."
+)
+
+PROFILE_FIELDS = ("business_name", "industry", "target_audience", "brand_tone", "primary_goal", "posting_frequency")
+
+_stats_lock = threading.Lock()
+_stats = {"model_days": 0, "fallback_days": 0, "timeouts": 0}
+
+
+def _count(key: str):
+    with _stats_lock:
+        _stats[key] += 1
+
+
+def engine_stats() -> dict:
+    with _stats_lock:
+        return dict(_stats)
+
+
+def _snapshot(profile):
+    """Plain copy of the profile so worker threads never touch the ORM session."""
+    return SimpleNamespace(
+        user_id=getattr(profile, "user_id", None),
+        **{field: getattr(profile, field, None) for field in PROFILE_FIELDS},
+    )
+
+
+def _normalize_day(data, day: int, platform: str) -> dict:
+    if isinstance(data, list):
+        data = data[0] if data else None
+    if not isinstance(data, dict):
+        raise ValueError("Expected a JSON object for the day")
+    result = {}
+    for field in GENERATED_FIELDS:
+        value = data.get(field)
+        if isinstance(value, list):
+            value = (", " if field == "seo_tags" else " ").join(str(v) for v in value)
+        result[field] = "" if value is None else str(value)
+    result["day"] = day
+    result["platform"] = platform
+    return result
+
+
+def _model_day(app, profile, day: int, platform: str, started: dict) -> dict:
+    started[day] = time.monotonic()
+    with app.app_context():
+        # parsed inside _generate so an answer that fails here is never cached
+        return _generate(DAY_SYSTEM_PROMPT, build_day_prompt(profile, day, platform),
+                         timeout=app.config["GEMINI_CALL_TIMEOUT"], user_id=profile.user_id,
+                         parse=lambda raw: _normalize_day(_parse_json_response(raw), day, platform))
+
+
+def _fallback(day: int, platform: str, profile, reason) -> dict:
+    _count("fallback_days")
+    if reason is not None:
+        current_app.logger.warning("Day %s fell back to template content: %s", day, reason)
+    return {**fallback_day(day, platform, profile), "fallback": True}
+
+
+def fallback_days(plan: list) -> list:
+    """Days of `plan` that are templates rather than model output."""
+    return sorted(d["day"] for d in plan if d.get("fallback"))
+
+
+def iter_plan(profile, days: int = 5, only=None):
+    """Yield each day's content as soon as it is ready (completion order); `only` limits the days."""
+    slots = [(d, platform_for_day(d)) for d in range(1, days + 1) if only is None or d in only]
+    profile = _snapshot(profile)
+    if not model_available() or gemini_breaker.short_circuits():
+        for day, platform in slots:
+            yield _fallback(day, platform, profile, None)
+        return
+
+    # a streamed plan always covers days 1..n, so partial plans go per day
+    if current_app.config["GEMINI_PLAN_MODE"] == "stream" and only is None:
+        yield from _iter_streamed_plan(profile, slots)
+        return
+
+    app = current_app._get_current_object()
+    timeout = app.config["GEMINI_CALL_TIMEOUT"]
+    workers = max(1, min(app.config["GEMINI_MAX_CONCURRENCY"], len(slots)))
+    started = {}
+    pool = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="gemini-day")
+    futures = {pool.submit(_model_day, app, profile, d, p, started): (d, p) for d, p in slots}
+    pending = set(futures)
+    try:
+        while pending:
+            deadlines = [started[futures[f][0]] + timeout for f in pending if futures[f][0] in started]
+            wait_for = max(0.0, min(deadlines) - time.monotonic()) if deadlines else timeout
+            done, pending = wait(pending, timeout=wait_for, return_when=FIRST_COMPLETED)
+            for fut in done:
+                day, platform = futures[fut]
+                try:
+                    result = fut.result()
+                except Exception as exc:
+                    yield _fallback(day, platform, profile, exc)
+                else:
+                    _count("model_days")
+                    yield result
+
+            now = time.monotonic()
+            for fut in list(pending):
+                day, platform = futures[fut]
+                if day in started and now - started[day] >= timeout:
+                    # the late answer is ignored; the worker thread finishes on its own
+                    pending.discard(fut)
+                    _count("timeouts")
+                    yield _fallback(day, platform, profile, "deadline exceeded")
+    finally:
+        pool.shutdown(wait=False, cancel_futures=True)
+
+
+def _complete_plan(text: str, slots: list) -> bool:
+    """True when `text` holds a valid object for every slot; only such a plan is cached."""
+    missing = dict(slots)
+    for obj in iter_json_objects([text]):
+        try:
+            day = int(obj.get("day"))
+        except (AttributeError, TypeError, ValueError):
+            continue
+        if day in missing:
+            _normalize_day(obj, day, missing.pop(day))
+    return not missing
+
+
+def _iter_streamed_plan(profile, slots: list):
+    pending = dict(slots)
+    deadline = time.monotonic() + current_app.config["GEMINI_CALL_TIMEOUT"]
+    chunks = _generate_stream(PLAN_SYSTEM_PROMPT, build_generation_prompt(profile, days=len(slots)),
+                              timeout=current_app.config["GEMINI_CALL_TIMEOUT"], user_id=profile.user_id,
+                              accept=lambda text: _complete_plan(text, slots))
+    reason = "missing from streamed plan"
+    try:
+        for obj in iter_json_objects(chunks):
+            try:
+                day = int(obj.get("day"))
+            except (AttributeError, TypeError, ValueError):
+                continue
+            if day not in pending:
+                continue
+            platform = pending.pop(day)
+            try:
+                result = _normalize_day(obj, day, platform)
+            except ValueError as exc:
+                yield _fallback(day, platform, profile, exc)
+                continue
+            _count("model_days")
+            yield result
+            if not pending:
+                break
+            if time.monotonic() > deadline:
+                _count("timeouts")
+                reason = "deadline exceeded"
+                break
+    except Exception as exc:
+        reason = exc
+    finally:
+        chunks.close()
+    for day, platform in sorted(pending.items()):
+        yield _fallback(day, platform, profile, reason)
+
+
+def generate_plan(profile, days: int = 5, only=None) -> list:
+    return sorted(iter_plan(profile, days=days, only=only), key=lambda d: d["day"])
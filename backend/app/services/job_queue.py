@@ -0,0 +1,215 @@
+"""
+Database-backed job queue for slow content operations.
+
+Web workers enqueue a row in `jobs` and return its id; `flask jobs work`
+claims queued rows and runs them on a thread pool, so gunicorn workers are
+never held by model latency. Claiming uses SELECT ... FOR UPDATE SKIP LOCKED
+on Postgres and a guarded UPDATE (status still 'queued') elsewhere, so any
+number of worker processes can share one queue.
+
+A failed run is retried after an exponential backoff (run_after), and a run
+only records its outcome while it still holds the lease it was claimed with
+(locked_by, locked_at): once requeue_stale has handed the job to another
+worker, a late finish is dropped. Finished and superseded jobs are deleted
+after JOB_RETENTION_SECONDS.
+"""
+
+import json
+import os
+import socket
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta
+from flask import current_app
+from sqlalchemy import delete, or_, select, update
+from .. import db
+from ..models.job import Job
+from .calendar_drafts import precompute_draft
+from .content_ops import (
+    ContentError,
+    batch_apply,
+    generate_calendar,
+    improve_item,
+    engaging_item,
+    regenerate_item,
+)
+
+HANDLERS = {
+    "generate": lambda user_id, p: {"calendar": generate_calendar(user_id, p.get("incremental", False))},
+    "improve": lambda user_id, p: {"content": improve_item(user_id, p["content_id"])},
+    "engaging": lambda user_id, p: {"content": engaging_item(user_id, p["content_id"])},
+    "regenerate": lambda user_id, p: {"content": regenerate_item(user_id, p["content_id"])},
+    "batch": lambda user_id, p: {"content": batch_apply(user_id, p["ids"], p["operation"])},
+    "precompute": lambda user_id, p: precompute_draft(user_id, p["source_hash"]),
+}
+
+FINISHED = ("succeeded", "failed", "superseded")
+
+
+def enqueue_job(user_id: int, kind: str, payload: dict = None, supersede: bool = False, commit: bool = True) -> Job:
+    """Queue a job; with supersede, the user's still-queued jobs of this kind are dropped.
+
+    With commit=False the job joins the caller's transaction.
+    """
+    if kind not in HANDLERS:
+        raise ValueError(f"Unknown job kind: {kind}")
+    if supersede:
+        db.session.execute(
+            update(Job)
+            .where(Job.user_id == user_id, Job.kind == kind, Job.status == "queued")
+            .values(status="superseded", finished_at=datetime.utcnow()),
+            execution_options={"synchronize_session": False},
+        )
+    job = Job(user_id=user_id, kind=kind, payload=json.dumps(payload or {}), status="queued")
+    db.session.add(job)
+    if commit:
+        db.session.commit()
+    return job
+
+
+def claim_candidates(now: datetime, limit: int):
+    """SELECT of the next `limit` queued job ids that are not backing off, oldest first."""
+    return (
+        select(Job.id)
+        .where(Job.status == "queued", or_(Job.run_after.is_(None), Job.run_after <= now))
+        .order_by(Job.id)
+        .limit(limit)
+    )
+
+
+def claim_jobs(worker_id: str, limit: int) -> list:
+    """Mark up to `limit` queued jobs as running for this worker; returns their ids."""
+    now = datetime.utcnow()
+    claimed = {"status": "running", "locked_by": worker_id, "locked_at": now, "attempts": Job.attempts + 1}
+    candidates = claim_candidates(now, limit)
+
+    if db.engine.dialect.name == "postgresql":
+        ids = db.session.execute(candidates.with_for_update(skip_locked=True)).scalars().all()
+        if ids:
+            db.session.execute(update(Job).where(Job.id.in_(ids)).values(**claimed),
+                               execution_options={"synchronize_session": False})
+        db.session.commit()
+        return list(ids)
+
+    # no row locks (SQLite): a job belongs to whoever flips it out of 'queued' first
+    ids = []
+    for job_id in db.session.execute(candidates).scalars().all():
+        result = db.session.execute(
+            update(Job).where(Job.id == job_id, Job.status == "queued").values(**claimed),
+            execution_options={"synchronize_session": False},
+        )
+        if result.rowcount:
+            ids.append(job_id)
+    db.session.commit()
+    return ids
+
+
+def requeue_stale(lease_seconds: int) -> int:
+    """Return jobs whose worker died mid-run to the queue; fail those out of attempts."""
+    now = datetime.utcnow()
+    stale = (Job.status == "running", Job.locked_at < now - timedelta(seconds=lease_seconds))
+    result = db.session.execute(
+        update(Job)
+        .where(*stale, Job.attempts < current_app.config["JOB_MAX_ATTEMPTS"])
+        .values(status="queued", locked_by=None, locked_at=None),
+        execution_options={"synchronize_session": False},
+    )
+    # a job that keeps killing its worker must not be claimed forever
+    db.session.execute(
+        update(Job)
+        .where(*stale)
+        .values(status="failed", error="Worker lost while running the job", locked_by=None, locked_at=None,
+                finished_at=now),
+        execution_options={"synchronize_session": False},
+    )
+    db.session.commit()
+    return result.rowcount
+
+
+def purge_finished(max_age: int) -> int:
+    """Delete succeeded, failed and superseded jobs that finished more than `max_age` seconds ago."""
+    result = db.session.execute(
+        delete(Job).where(Job.status.in_(FINISHED), Job.finished_at < datetime.utcnow() - timedelta(seconds=max_age)),
+        execution_options={"synchronize_session": False},
+    )
+    db.session.commit()
+    return result.rowcount
+
+
+def retry_delay(attempts: int) -> float:
+    """Seconds before a job that failed on its `attempts`-th run is tried again."""
+    return current_app.config["JOB_RETRY_BACKOFF"] * 2 ** (attempts - 1)
+
+
+def run_job(job_id: int):
+    job = db.session.get(Job, job_id)
+    if job is None or job.status != "running":
+        return
+    user_id, kind, attempts = job.user_id, job.kind, job.attempts
+    lease = (job.locked_by, job.locked_at)
+    payload = json.loads(job.payload or "{}")
+    try:
+        result = HANDLERS[kind](user_id, payload)
+    except ContentError as exc:
+        db.session.rollback()
+        _finish(job_id, lease, "failed", error=exc.message)
+    except Exception as exc:
+        db.session.rollback()
+        current_app.logger.exception("Job %s (%s) failed", job_id, kind)
+        if attempts < current_app.config["JOB_MAX_ATTEMPTS"]:
+            _release(job_id, lease, status="queued", error=str(exc),
+                     run_after=datetime.utcnow() + timedelta(seconds=retry_delay(attempts)))
+        else:
+            _finish(job_id, lease, "failed", error=str(exc))
+    else:
+        _finish(job_id, lease, "succeeded", result=result)
+
+
+def _release(job_id: int, lease: tuple, **values) -> bool:
+    """Write the job's new state if this run still holds its lease; False when it was lost."""
+    locked_by, locked_at = lease
+    result = db.session.execute(
+        update(Job)
+        .where(Job.id == job_id, Job.locked_by == locked_by, Job.locked_at == locked_at)
+        .values(locked_by=None, locked_at=None, **values),
+        execution_options={"synchronize_session": False},
+    )
+    db.session.commit()
+    if not result.rowcount:
+        current_app.logger.warning("Job %s lost its lease while running; its outcome was dropped", job_id)
+    return bool(result.rowcount)
+
+
+def _finish(job_id: int, lease: tuple, status: str, result=None, error: str = None):
+    _release(job_id, lease, status=status, result=json.dumps(result) if result is not None else None, error=error,
+             finished_at=datetime.utcnow())
+
+
+def _run_in_context(app, job_id: int):
+    with app.app_context():
+        run_job(job_id)
+
+
+def run_worker(app, concurrency: int, poll_interval: float = 1.0, burst: bool = False):
+    """Claim and run jobs until interrupted (or, with burst, until the queue is empty)."""
+    worker_id = f"{socket.gethostname()}:{os.getpid()}"
+    lease = app.config["JOB_LEASE_SECONDS"]
+    inflight = set()
+    next_requeue = 0.0
+    with ThreadPoolExecutor(max_workers=concurrency, thread_name_prefix="job") as pool:
+        while True:
+            inflight = {f for f in inflight if not f.done()}
+            claimed = []
+            free = concurrency - len(inflight)
+            if free > 0:
+                with app.app_context():
+                    if time.monotonic() >= next_requeue:
+                        requeue_stale(lease)
+                        purge_finished(app.config["JOB_RETENTION_SECONDS"])
+                        next_requeue = time.monotonic() + lease / 4
+                    claimed = claim_jobs(worker_id, free)
+                inflight.update(pool.submit(_run_in_context, app, job_id) for job_id in claimed)
+            if burst and not claimed and not inflight:
+                return
+            if not claimed:
+                time.sleep(poll_interval)
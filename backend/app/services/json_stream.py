@@ -0,0 +1,155 @@
+"""
+Incremental JSON extraction from model output.
+
+Models wrap JSON in markdown fences or prose, and a streamed completion
+arrives in arbitrary chunks. JSONObjectStream is fed those chunks and hands
+back every complete object as soon as its closing brace arrives: objects at
+the top level or directly inside top-level arrays (so each day of a
+`[{...}, {...}]` plan comes out on its own). Brackets inside strings are
+ignored, text outside any bracket is skipped, and a brace run that doesn't
+parse (prose such as "{name}") is dropped. Each character is scanned once.
+"""
+
+import json
+import re
+
+_SIGNIFICANT = re.compile(r'[{}\[\]"\\]')
+_CLOSERS = {"}": "{", "]": "["}
+
+
+class JSONObjectStream:
+    def __init__(self):
+        self._buf = ""
+        self._pos = 0          # next index of _buf to scan
+        self._stack = []       # open brackets
+        self._start = None     # _buf index of the emittable object being read
+        self._in_string = False
+        self._escaped = False
+
+    def feed(self, chunk: str) -> list:
+        """Scan `chunk`; returns objects completed by it, in order."""
+        if not chunk:
+            return []
+        self._buf += chunk
+        found = []
+        buf = self._buf
+        pos = self._pos
+        if self._escaped:
+            pos += 1
+            self._escaped = False
+        while True:
+            match = _SIGNIFICANT.search(buf, pos)
+            if match is None:
+                break
+            i = match.start()
+            ch = buf[i]
+            pos = i + 1
+            if self._in_string:
+                if ch == "\\":
+                    if pos >= len(buf):
+                        self._escaped = True
+                    pos += 1
+                elif ch == '"':
+                    self._in_string = False
+                continue
+            if ch == '"':
+                if self._stack:
+                    self._in_string = True
+            elif ch in "{[":
+                if ch == "{" and self._start is None and all(b == "[" for b in self._stack):
+                    self._start = i
+                self._stack.append(ch)
+            elif not self._stack:
+                continue  # stray closer in prose
+            elif self._stack[-1] != _CLOSERS[ch]:
+                self._reset()  # unbalanced: give up on what was open
+            else:
+                self._stack.pop()
+                if ch == "}" and self._start is not None and all(b == "[" for b in self._stack):
+                    try:
+                        found.append(json.loads(buf[self._start:i + 1]))
+                    except ValueError:
+                        pass
+                    self._start = None
+        pos = min(pos, len(buf))
+        # keep only what an unfinished object still needs
+        keep = self._start if self._start is not None else pos
+        self._buf = buf[keep:]
+        self._pos = pos - keep
+        if self._start is not None:
+            self._start = 0
+        return found
+
+    def _reset(self):
+        self._stack.clear()
+        self._start = None
+        self._in_string = False
+
+
+def iter_json_objects(chunks):
+    """Yield objects from an iterable of text chunks as they complete."""
+    stream = JSONObjectStream()
+    for chunk in chunks:
+        yield from stream.feed(chunk)
+
+
+_decoder = json.JSONDecoder()
+
+
+def _first_parsed(spans: list, text: str):
+    """(True, value) for the first span in start order that parses, inner spans after their parent."""
+    todo = list(reversed(spans))
+    while todo:
+        start, end, children = todo.pop()
+        try:
+            value, stop = _decoder.raw_decode(text, start)
+        except ValueError:
+            value, stop = None, -1
+        if stop == end:
+            return True, value
+        todo.extend(reversed(children))
+    return False, None
+
+
+def first_json_value(text: str):
+    """The first complete JSON object or array in `text` (fences and prose around it are ignored).
+
+    One scan pairs up the brackets; a balanced run is parsed when its outermost
+    bracket closes, and only if that fails are the runs nested inside it tried.
+    As in JSONObjectStream, brackets inside a string are not candidates.
+    """
+    text = text or ""
+    stack = []  # (start, finished inner spans) per open bracket
+    in_string = False
+    pos = 0
+    while True:
+        match = _SIGNIFICANT.search(text, pos)
+        if match is None:
+            break
+        i = match.start()
+        ch = text[i]
+        pos = i + 1
+        if in_string:
+            if ch == "\\":
+                pos += 1
+            elif ch == '"':
+                in_string = False
+        elif ch == '"':
+            in_string = bool(stack)
+        elif ch in "{[":
+            stack.append((i, []))
+        elif stack:
+            start, children = stack.pop()
+            span = (start, pos, children)
+            if stack:
+                stack[-1][1].append(span)
+                continue
+            found, value = _first_parsed([span], text)
+            if found:
+                return value
+    # brackets left open: what closed inside them, outermost first
+    for _, children in stack:
+        found, value = _first_parsed(children, text)
+        if found:
+            return value
+    raise ValueError("No JSON value found in model response")
@@ -0,0 +1,274 @@
+"""
+Content-addressed cache for model responses.
+
+_generate looks up sha256(model, system, user) before calling Gemini, so a
+byte-identical prompt (re-clicking "improve" on unchanged content, two users
+with the same profile fields) is answered locally. The store is chosen with
+LLM_CACHE_BACKEND:
+
+    memory  per-process LRU bounded by LLM_CACHE_MAX_BYTES (default)
+    sql     llm_response_cache table, shared by every worker
+    disk    one JSON file per entry under LLM_CACHE_DIR, shared on one host
+    none    caching disabled
+"""
+
+import hashlib
+import json
+import os
+import threading
+import time
+from collections import OrderedDict
+from datetime import datetime, timedelta
+from flask import current_app
+from sqlalchemy import delete, func, select, update
+from sqlalchemy.exc import IntegrityError
+from .. import db
+from ..models.llm_cache_entry import LLMCacheEntry
+
+
+class MemoryBackend:
+    def __init__(self, max_bytes: int):
+        self.max_bytes = max_bytes
+        self.bytes = 0
+        self._data = OrderedDict()  # key -> (expires_at, response, latency_ms, size)
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        with self._lock:
+            entry = self._data.get(key)
+            if entry is None:
+                return None
+            if entry[0] <= time.time():
+                self._drop(key)
+                return None
+            self._data.move_to_end(key)
+            return entry[1], entry[2]
+
+    def set(self, key, response: str, latency_ms: float, ttl: float):
+        size = len(response.encode("utf-8"))
+        if size > self.max_bytes:
+            return
+        with self._lock:
+            if key in self._data:
+                self._drop(key)
+            self._data[key] = (time.time() + ttl, response, latency_ms, size)
+            self.bytes += size
+            while self.bytes > self.max_bytes:
+                self._drop(next(iter(self._data)))
+
+    def _drop(self, key):
+        self.bytes -= self._data.pop(key)[3]
+
+    def stats(self) -> dict:
+        return {"entries": len(self._data), "bytes": self.bytes, "max_bytes": self.max_bytes}
+
+
+class SQLBackend:
+    EVICT_EVERY = 32  # writes between size checks
+
+    def __init__(self, max_bytes: int):
+        self.max_bytes = max_bytes
+        self._table = LLMCacheEntry.__table__
+        self._writes = 0
+
+    def get(self, key):
+        t = self._table
+        now = datetime.utcnow()
+        with db.engine.begin() as conn:
+            row = conn.execute(
+                select(t.c.response, t.c.latency_ms, t.c.expires_at).where(t.c.key == key)
+            ).first()
+            if row is None or row.expires_at <= now:
+                return None
+            conn.execute(update(t).where(t.c.key == key).values(last_hit_at=now))
+        return row.response, row.latency_ms or 0.0
+
+    def set(self, key, response: str, latency_ms: float, ttl: float):
+        t = self._table
+        now = datetime.utcnow()
+        try:
+            with db.engine.begin() as conn:
+                conn.execute(delete(t).where(t.c.key == key))
+                conn.execute(t.insert().values(
+                    key=key, model=current_app.config["GEMINI_MODEL"], response=response,
+                    size_bytes=len(response.encode("utf-8")), latency_ms=latency_ms,
+                    created_at=now, expires_at=now + timedelta(seconds=ttl), last_hit_at=now,
+                ))
+                self._writes += 1
+                if self._writes % self.EVICT_EVERY == 0:
+                    self._evict(conn, now)
+        except IntegrityError:
+            pass  # another worker stored the same key first
+
+    def _evict(self, conn, now):
+        t = self._table
+        conn.execute(delete(t).where(t.c.expires_at <= now))
+        total = conn.execute(select(func.coalesce(func.sum(t.c.size_bytes), 0))).scalar()
+        if total <= self.max_bytes:
+            return
+        victims = []
+        for row in conn.execute(select(t.c.key, t.c.size_bytes).order_by(t.c.last_hit_at.asc())):
+            if total <= self.max_bytes:
+                break
+            victims.append(row.key)
+            total -= row.size_bytes
+        conn.execute(delete(t).where(t.c.key.in_(victims)))
+
+    def stats(self) -> dict:
+        t = self._table
+        with db.engine.connect() as conn:
+            entries, size = conn.execute(
+                select(func.count(), func.coalesce(func.sum(t.c.size_bytes), 0)).select_from(t)
+            ).one()
+        return {"entries": entries, "bytes": size, "max_bytes": self.max_bytes}
+
+
+class DiskBackend:
+    def __init__(self, directory: str, max_bytes: int):
+        self.directory = directory
+        self.max_bytes = max_bytes
+        self._lock = threading.Lock()
+        os.makedirs(directory, exist_ok=True)
+        self.bytes = sum(e.stat().st_size for e in os.scandir(directory) if e.name.endswith(".json"))
+
+    def _path(self, key):
+        return os.path.join(self.directory, f"{key}.json")
+
+    def get(self, key):
+        path = self._path(key)
+        try:
+            with open(path, encoding="utf-8") as fh:
+                entry = json.load(fh)
+        except (OSError, ValueError):
+            return None
+        if entry["expires_at"] <= time.time():
+            self._remove(path)
+            return None
+        try:
+            os.utime(path)  # mtime doubles as the LRU clock
+        except OSError:
+            pass
+        return entry["response"], entry["latency_ms"]
+
+    def set(self, key, response: str, latency_ms: float, ttl: float):
+        path = self._path(key)
+        tmp = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+        with open(tmp, "w", encoding="utf-8") as fh:
+            json.dump({"expires_at": time.time() + ttl, "latency_ms": latency_ms, "response": response}, fh)
+        size = os.path.getsize(tmp)
+        with self._lock:
+            # an overwritten entry's bytes are no longer on disk
+            try:
+                size -= os.path.getsize(path)
+            except OSError:
+                pass
+            os.replace(tmp, path)
+            self.bytes += size
+            if self.bytes > self.max_bytes:
+                self._evict()
+
+    def _remove(self, path):
+        try:
+            size = os.path.getsize(path)
+            os.remove(path)
+        except OSError:
+            return
+        with self._lock:
+            self.bytes -= size
+
+    def _evict(self):
+        # rescan so files written by other workers are accounted for
+        entries = []
+        for e in os.scandir(self.directory):
+            if e.name.endswith(".json"):
+                try:
+                    st = e.stat()
+                except OSError:
+                    continue
+                entries.append((st.st_mtime, st.st_size, e.path))
+        entries.sort()
+        self.bytes = sum(size for _, size, _ in entries)
+        for _, size, path in entries:
+            if self.bytes <= self.max_bytes:
+                break
+            try:
+                os.remove(path)
+            except OSError:
+                continue
+            self.bytes -= size
+
+    def stats(self) -> dict:
+        return {"bytes": self.bytes, "max_bytes": self.max_bytes, "directory": self.directory}
+
+
+class LLMCache:
+    def __init__(self):
+        self.backend = None
+        self.ttl = 0
+        self.hits = 0
+        self.misses = 0
+        self.saved_seconds = 0.0
+        self._lock = threading.Lock()
+
+    def init_app(self, app):
+        kind = app.config["LLM_CACHE_BACKEND"]
+        max_bytes = app.config["LLM_CACHE_MAX_BYTES"]
+        if kind == "memory":
+            self.backend = MemoryBackend(max_bytes)
+        elif kind == "sql":
+            self.backend = SQLBackend(max_bytes)
+        elif kind == "disk":
+            directory = app.config["LLM_CACHE_DIR"] or os.path.join(app.instance_path, "llm_cache")
+            self.backend = DiskBackend(directory, max_bytes)
+        elif kind == "none":
+            self.backend = None
+        else:
+            raise ValueError(f"Unknown LLM_CACHE_BACKEND: {kind}")
+        self.ttl = app.config["LLM_CACHE_TTL"]
+        app.extensions["llm_cache"] = self
+
+    @staticmethod
+    def make_key(model: str, system: str, user: str) -> str:
+        digest = hashlib.sha256()
+        for part in (model, system, user):
+            digest.update(part.encode("utf-8"))
+            digest.update(b"\0")
+        return digest.hexdigest()
+
+    @property
+    def enabled(self) -> bool:
+        return self.backend is not None and self.ttl > 0
+
+    @property
+    def shared(self) -> bool:
+        """Whether entries written here are visible to other worker processes."""
+        return isinstance(self.backend, (SQLBackend, DiskBackend))
+
+    def get(self, key: str):
+        hit = self.backend.get(key)
+        with self._lock:
+            if hit is None:
+                self.misses += 1
+                return None
+            self.hits += 1
+            self.saved_seconds += hit[1] / 1000.0
+        return hit[0]
+
+    def set(self, key: str, response: str, latency_seconds: float):
+        self.backend.set(key, response, latency_seconds * 1000.0, self.ttl)
+
+    def stats(self) -> dict:
+        lookups = self.hits + self.misses
+        stats = {
+            "backend": type(self.backend).__name__ if self.backend else None,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_ratio": round(self.hits / lookups, 4) if lookups else 0.0,
+            "saved_seconds": round(self.saved_seconds, 3),
+        }
+        if self.backend is not None:
+            stats.update(self.backend.stats())
+        return stats
+
+
+llm_cache = LLMCache()
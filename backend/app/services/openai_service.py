@@ -1,66 +1,184 @@
-import json
-import re
+import threading
+import time
 import google.generativeai as genai
 from flask import current_app
 from .prompt_templates import (
-    build_generation_prompt,
     build_improve_prompt,
     build_engaging_prompt,
     build_regenerate_prompt,
 )
+from .json_stream import first_json_value
+from .llm_cache import llm_cache
+from .stub_model import StubGenerativeModel
+from ..utils.circuit_breaker import CircuitOpenError, gemini_breaker
+from ..utils.http_client import http_client
+from ..utils.rate_limiter import RateLimitedError, gemini_limiter
+from ..utils.single_flight import model_flight
+
+
+_models = {}
+_configured_key = None
+_model_lock = threading.Lock()
 
 
 def _get_model():
-    genai.configure(api_key=current_app.config["GEMINI_API_KEY"])
-    return genai.GenerativeModel(current_app.config["GEMINI_MODEL"])
+    """Per-process model handle; genai.configure runs only when the key changes."""
+    global _configured_key
+    if current_app.config["GEMINI_MODEL"] == "stub":
+        return StubGenerativeModel(latency=current_app.config["GEMINI_STUB_LATENCY"])
+    api_key = current_app.config["GEMINI_API_KEY"]
+    name = current_app.config["GEMINI_MODEL"]
+    with _model_lock:
+        if _configured_key != api_key:
+            genai.configure(api_key=api_key)
+            _configured_key = api_key
+            _models.clear()
+        model = _models.get(name)
+        if model is None:
+            model = _models[name] = genai.GenerativeModel(name)
+    return model
 
 
 def _parse_json_response(text: str):
-    """Strip markdown fences and parse JSON from Gemini response."""
-    cleaned = re.sub(r"```(?:json)?\s*", "", text).strip().rstrip("`").strip()
-    return json.loads(cleaned)
+    """First JSON object/array in a Gemini response, ignoring fences and prose."""
+    return first_json_value(text)
+
+
+def model_available() -> bool:
+    """True when a real API key is configured or the offline stub is selected."""
+    return current_app.config["GEMINI_MODEL"] == "stub" or bool(current_app.config["GEMINI_API_KEY"])
+
+
+def _generate(system: str, user: str, timeout: float = None, cache: bool = True, user_id: int = None,
+              parse=None):
+    """Unified Gemini content generation call.
+
+    Identical (model, system, user) prompts are served from llm_cache unless
+    the call site passes cache=False, and concurrent identical prompts are
+    coalesced into one upstream call. With `parse`, its result is returned
+    and a response is cached only once parse accepts it, so a refusal or
+    broken JSON is never replayed. Calls past the Gemini quota raise
+    RateLimitedError; `user_id` (default: the request's user) picks the
+    per-user bucket.
+    """
+    parse = parse or (lambda text: text)
+    use_cache = cache and llm_cache.enabled
+    key = llm_cache.make_key(current_app.config["GEMINI_MODEL"], system, user)
+
+    def lookup():
+        cached = llm_cache.get(key)
+        if cached is None:
+            return None
+        try:
+            return parse(cached)
+        except Exception:
+            return None  # stored before it was validated; ask again
 
+    if use_cache:
+        hit = lookup()
+        if hit is not None:
+            return hit
 
-def _generate(system: str, user: str) -> str:
-    """Unified Gemini content generation call."""
+    def call():
+        if not gemini_limiter.acquire(user_id):
+            raise RateLimitedError("gemini quota exhausted")
+        model = _get_model()
+        full_prompt = f"{system}\n\n{user}"
+        options = {"request_options": {"timeout": timeout}} if timeout else {}
+        started = time.perf_counter()
+        try:
+            # raises CircuitOpenError without calling out while Gemini is failing
+            text = gemini_breaker.call(lambda: model.generate_content(full_prompt, **options).text)
+        except CircuitOpenError:
+            raise
+        except Exception:
+            http_client.record("gemini", time.perf_counter() - started, ok=False)
+            raise
+        elapsed = time.perf_counter() - started
+        http_client.record("gemini", elapsed)
+        result = parse(text)
+        if use_cache:
+            llm_cache.set(key, text, elapsed)
+        return result
+
+    # concurrent identical prompts share one call; across workers via the shared cache
+    recheck = lookup if use_cache and llm_cache.shared else None
+    return model_flight.do(key, call, recheck)
+
+
+def _generate_stream(system: str, user: str, timeout: float = None, user_id: int = None, accept=None):
+    """Like _generate, but yields the completion text chunk by chunk as it arrives.
+
+    The text is cached only when `accept(text)` is true once the stream ends
+    (or the consumer stops early); without `accept` nothing is cached.
+    """
+    use_cache = accept is not None and llm_cache.enabled
+    key = llm_cache.make_key(current_app.config["GEMINI_MODEL"], system, user)
+    if use_cache:
+        cached = llm_cache.get(key)
+        if cached is not None and _accepts(accept, cached):
+            yield cached
+            return
+
+    if not gemini_limiter.acquire(user_id):
+        raise RateLimitedError("gemini quota exhausted")
+    ticket = gemini_breaker.allow()
+    if ticket is None:
+        raise CircuitOpenError("gemini circuit is open")
     model = _get_model()
-    full_prompt = f"{system}\n\n{user}"
-    response = model.generate_content(full_prompt)
-    return response.text
+    options = {"request_options": {"timeout": timeout}} if timeout else {}
+    parts = []
+    started = time.perf_counter()
+    try:
+        for chunk in model.generate_content(f"{system}\n\n{user}", stream=True, **options):
+            parts.append(chunk.text)
+            yield chunk.text
+    except GeneratorExit:
+        # consumer stopped early (it had what it needed); the upstream was healthy
+        elapsed = time.perf_counter() - started
+        gemini_breaker.record(True, elapsed, ticket)
+        if use_cache and _accepts(accept, "".join(parts)):
+            llm_cache.set(key, "".join(parts), elapsed)
+        raise
+    except Exception:
+        elapsed = time.perf_counter() - started
+        gemini_breaker.record(False, elapsed, ticket)
+        http_client.record("gemini", elapsed, ok=False)
+        raise
+    elapsed = time.perf_counter() - started
+    gemini_breaker.record(True, elapsed, ticket)
+    http_client.record("gemini", elapsed)
+    if use_cache and _accepts(accept, "".join(parts)):
+        llm_cache.set(key, "".join(parts), elapsed)
+
+
+def _accepts(accept, text: str) -> bool:
+    try:
+        return bool(accept(text))
+    except Exception:
+        return False
 
 
 def generate_5_day_plan(profile) -> list:
-    prompt = build_generation_prompt(profile, days=5)
-    system = (
-        "You are a world-class social media content strategist. "
-        "Always respond with valid JSON exactly as instructed. "
-        "Return ONLY a JSON array of exactly 5 objects, no markdown fences, no extra text."
-    )
-    raw = _generate(system, prompt)
-    days = _parse_json_response(raw)
-    if not isinstance(days, list):
-        raise ValueError("Expected a JSON array from Gemini")
-    if len(days) < 5:
-        raise ValueError(f"Expected 5 days, got {len(days)}")
-    return days
+    """Per-day concurrent generation; failed days fall back to templates."""
+    from .generation_engine import generate_plan
+    return generate_plan(profile, days=5)
 
 
 def improve_content(item, profile) -> dict:
     prompt = build_improve_prompt(item, profile)
     system = "You are an expert social media content strategist. Always respond with valid JSON only."
-    raw = _generate(system, prompt)
-    return _parse_json_response(raw)
+    return _generate(system, prompt, parse=_parse_json_response)
 
 
 def make_more_engaging(item, profile) -> dict:
     prompt = build_engaging_prompt(item, profile)
     system = "You are a viral content expert. Always respond with valid JSON only."
-    raw = _generate(system, prompt)
-    return _parse_json_response(raw)
+    return _generate(system, prompt, parse=_parse_json_response)
 
 
 def regenerate_single_day(day: int, platform: str, profile) -> dict:
     prompt = build_regenerate_prompt(day, platform, profile)
     system = "You are an expert social media content strategist. Always respond with valid JSON only."
-    raw = _generate(system, prompt)
-    return _parse_json_response(raw)
+    # a regenerate request asks for a fresh variant, never a replay
+    return _generate(system, prompt, cache=False, parse=_parse_json_response)
@@ -24,6 +24,31 @@ Rules:
 """
 
 
+PLATFORM_RULES = {
+    "instagram": "short caption, 10 hashtags, empty script/seo fields",
+    "facebook": "story caption, 3 hashtags, end with question, empty script/seo fields",
+    "youtube": "seo_title, seo_tags, write script field, empty hashtags",
+}
+
+
+def build_day_prompt(profile, day: int, platform: str) -> str:
+    return f"""Generate Day {day} of a social media content plan for {platform.capitalize()} as a JSON object.
+
+Business: {profile.business_name}
+Industry: {profile.industry}
+Audience: {profile.target_audience}
+Tone: {profile.brand_tone}
+Goal: {profile.primary_goal}
+
+Return ONLY a JSON object with these exact keys:
+day, platform, content_idea, hook, caption, hashtags, script, cta, seo_title, seo_description, seo_tags
+
+Rules:
+- {PLATFORM_RULES.get(platform, PLATFORM_RULES["instagram"])}
+- No markdown. No explanation. JSON object only.
+"""
+
+
 def build_improve_prompt(item, profile) -> str:
     return f"""Improve this {item.platform} content for a {getattr(profile, 'brand_tone', 'professional')} brand.
 
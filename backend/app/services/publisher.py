@@ -0,0 +1,282 @@
+"""
+Scheduled publishing of calendar items to the connected social accounts.
+
+`flask publish run` claims items whose scheduled_at has passed, groups them
+by SocialAccount and posts each account's items in order on a thread pool,
+with a semaphore per platform capping concurrent calls to Meta. Only
+Facebook feed posts are published: Instagram and YouTube need an image or
+video, which calendar items don't carry, so those items stop at
+publish_error.
+
+Transient failures (connection errors, 429, 5xx) are retried in place with
+jittered exponential backoff; what still fails goes back to the queue with
+a longer backoff through publish_not_before, and a rejected post (other
+4xx) stops at publish_error. A read timeout is never retried: the platform
+may have created the post, and a feed POST is not idempotent.
+is_published and platform_post_id are only set once the platform has
+returned the post id. Outcomes are recorded with one executemany UPDATE by
+id per kind, which skips rows deleted in the meantime.
+
+The claim is a lease on publish_not_before, and the outcomes must land
+before it runs out or another publisher could post the same items again.
+So a batch starts an item only while the rest of the lease still covers
+that item's worst case (every retry timing out); the items it does not get
+to are released unchanged.
+"""
+
+import random
+import threading
+import time
+from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta
+from flask import current_app
+from requests import ReadTimeout, RequestException
+from sqlalchemy import and_, bindparam, or_, select, update
+from .. import db
+from ..models.content_calendar import ContentCalendar
+from ..models.social_account import SocialAccount
+from ..utils.http_client import http_client
+
+GRAPH_URL = "https://graph.facebook.com/v18.0"
+
+# platform -> semaphore group
+PLATFORM_LIMITS = {"facebook": "meta"}
+
+# platforms whose posts need media the calendar does not have
+MEDIA_PLATFORMS = {"instagram": "an image", "youtube": "a video"}
+
+LEASE_SECONDS = 300
+REQUEUE_BACKOFF_BASE = 60
+
+_table = ContentCalendar.__table__
+
+
+class PublishError(Exception):
+    def __init__(self, message: str, retryable: bool = True):
+        super().__init__(message)
+        self.message = message
+        self.retryable = retryable
+
+
+def _item_budget(config) -> float:
+    """Worst-case seconds to publish one item: every try times out, plus the backoff sleeps."""
+    per_request = (http_client.retries + 1) * http_client.connect_timeout + http_client.read_timeout
+    retries, backoff = config["PUBLISH_RETRIES"], config["PUBLISH_RETRY_BACKOFF"]
+    return (retries + 1) * per_request + backoff * 1.5 * (2 ** retries - 1)
+
+
+def _lease_seconds(config) -> float:
+    # long enough for a batch to get through at least a couple of items per account
+    return max(LEASE_SECONDS, 2 * _item_budget(config))
+
+
+def _ready(now: datetime):
+    return or_(ContentCalendar.publish_not_before.is_(None), ContentCalendar.publish_not_before <= now)
+
+
+def due_candidates(now: datetime, limit: int):
+    """SELECT of up to `limit` due, unleased item ids in schedule order."""
+    return (
+        select(ContentCalendar.id)
+        .where(
+            ContentCalendar.is_published.is_(False),
+            ContentCalendar.scheduled_at <= now,
+            ContentCalendar.publish_attempts < current_app.config["PUBLISH_MAX_ATTEMPTS"],
+            _ready(now),
+        )
+        .order_by(ContentCalendar.scheduled_at)
+        .limit(limit)
+    )
+
+
+def claim_due(limit: int) -> list:
+    """Lease up to `limit` scheduled items that are due; returns their ids."""
+    now = datetime.utcnow()
+    leased = {"publish_not_before": now + timedelta(seconds=_lease_seconds(current_app.config))}
+    ready = _ready(now)
+    candidates = due_candidates(now, limit)
+
+    if db.engine.dialect.name == "postgresql":
+        ids = db.session.execute(candidates.with_for_update(skip_locked=True)).scalars().all()
+        if ids:
+            db.session.execute(update(ContentCalendar).where(ContentCalendar.id.in_(ids)).values(**leased),
+                               execution_options={"synchronize_session": False})
+        db.session.commit()
+        return list(ids)
+
+    # no row locks (SQLite): an item belongs to whoever moves its lease first
+    ids = []
+    for content_id in db.session.execute(candidates).scalars().all():
+        result = db.session.execute(
+            update(ContentCalendar).where(ContentCalendar.id == content_id, ready).values(**leased),
+            execution_options={"synchronize_session": False},
+        )
+        if result.rowcount:
+            ids.append(content_id)
+    db.session.commit()
+    return ids
+
+
+def _post_text(item: dict) -> str:
+    parts = [item["caption"] or item["content_idea"], item["cta"], item["hashtags"]]
+    return "\n\n".join(p.strip() for p in parts if p and p.strip())
+
+
+def _call(method: str, url: str, **kwargs) -> dict:
+    try:
+        resp = http_client.request(method, url, **kwargs)
+    except ReadTimeout as exc:
+        # the request went out; retrying could publish the post twice
+        raise PublishError(f"No response in time, the post may have been published: {exc}", retryable=False)
+    except RequestException as exc:
+        raise PublishError(str(exc))
+    if resp.status_code >= 400:
+        # 401: the token refresher will renew the token before the next attempt
+        retryable = resp.status_code in (401, 408, 429) or resp.status_code >= 500
+        raise PublishError(f"{resp.status_code} from {url.split('?')[0]}: {resp.text[:200]}", retryable)
+    return resp.json()
+
+
+def _publish_facebook(item: dict, account: dict) -> str:
+    data = _call("POST", f"{GRAPH_URL}/{account['account_id']}/feed",
+                 data={"message": _post_text(item), "access_token": account["access_token"]})
+    return data["id"]
+
+
+PUBLISHERS = {"facebook": _publish_facebook}
+
+
+def _unsupported(platform: str) -> str:
+    if platform in MEDIA_PLATFORMS:
+        return (f"Publishing to {platform} needs {MEDIA_PLATFORMS[platform]}, which calendar items don't have; "
+                "only Facebook feed posts are published")
+    return f"Publishing to {platform} is not supported"
+
+
+class _Run:
+    """Limits, retry policy and lease budget for one batch; shared by the pool threads."""
+
+    def __init__(self, config, lease_ends: datetime):
+        self.limits = {"meta": threading.BoundedSemaphore(config["PUBLISH_CONCURRENCY_META"])}
+        self.retries = config["PUBLISH_RETRIES"]
+        self.backoff = config["PUBLISH_RETRY_BACKOFF"]
+        # the last moment an item may start and still be recorded inside the lease
+        self.start_by = lease_ends - timedelta(seconds=_item_budget(config))
+
+    def publish(self, item: dict, account: dict) -> str:
+        publish = PUBLISHERS[item["platform"]]
+        for attempt in range(self.retries + 1):
+            try:
+                with self.limits[PLATFORM_LIMITS[item["platform"]]]:
+                    return publish(item, account)
+            except PublishError as exc:
+                if not exc.retryable or attempt == self.retries:
+                    raise
+            time.sleep(self.backoff * 2 ** attempt * random.uniform(0.5, 1.5))
+
+    def publish_group(self, items: list, account: dict) -> list:
+        """One account's items in schedule order -> [(item, post id or None, error or None)].
+
+        Items left when the lease budget runs out come back with neither.
+        """
+        results = []
+        for item in items:
+            if datetime.utcnow() > self.start_by:
+                results.append((item, None, None))
+                continue
+            try:
+                results.append((item, self.publish(item, account), None))
+            except PublishError as exc:
+                results.append((item, None, exc))
+        return results
+
+
+def _record(kind: str, batch: list):
+    """Write one kind of outcome by id; a row deleted mid-batch (replaced calendar) matches nothing."""
+    stmt = update(_table).where(_table.c.id == bindparam("item_id"))
+    try:
+        db.session.execute(stmt, batch)
+        db.session.commit()
+    except Exception:
+        db.session.rollback()
+        current_app.logger.exception("Recording %s publish outcomes for %s failed", kind,
+                                     [values["item_id"] for values in batch])
+
+
+def publish_items(ids: list) -> dict:
+    """Publish the claimed items and record every outcome."""
+    if not ids:
+        return {"published": 0, "failed": 0}
+    config = current_app.config
+    rows = db.session.execute(
+        select(
+            ContentCalendar.id, ContentCalendar.platform, ContentCalendar.content_idea, ContentCalendar.caption,
+            ContentCalendar.hashtags, ContentCalendar.cta, ContentCalendar.publish_attempts,
+            ContentCalendar.publish_not_before,
+            SocialAccount.id.label("account_pk"), SocialAccount.account_id, SocialAccount.access_token,
+        )
+        .outerjoin(SocialAccount, and_(SocialAccount.user_id == ContentCalendar.user_id,
+                                       SocialAccount.platform == ContentCalendar.platform,
+                                       SocialAccount.is_active.is_(True)))
+        .where(ContentCalendar.id.in_(ids))
+        .order_by(ContentCalendar.scheduled_at, ContentCalendar.id)
+    ).all()
+    # release the connection while the pool waits on the platforms
+    db.session.commit()
+
+    groups, accounts, outcomes = defaultdict(list), {}, []
+    for row in rows:
+        item = row._asdict()
+        if item["platform"] not in PUBLISHERS:
+            outcomes.append((item, None, PublishError(_unsupported(item["platform"]), False)))
+        elif item["account_pk"] is None:
+            outcomes.append((item, None, PublishError(f"No connected {item['platform']} account")))
+        else:
+            groups[item["account_pk"]].append(item)
+            accounts[item["account_pk"]] = {"account_id": item["account_id"], "access_token": item["access_token"]}
+
+    lease_ends = min((row.publish_not_before for row in rows if row.publish_not_before is not None),
+                     default=datetime.utcnow() + timedelta(seconds=_lease_seconds(config)))
+    run = _Run(config, lease_ends)
+    workers = config["PUBLISH_CONCURRENCY_META"]
+    if groups:
+        with ThreadPoolExecutor(max_workers=max(1, min(workers, len(groups))), thread_name_prefix="publish") as pool:
+            for results in pool.map(lambda pk: run.publish_group(groups[pk], accounts[pk]), list(groups)):
+                outcomes.extend(results)
+
+    now = datetime.utcnow()
+    max_attempts, max_backoff = config["PUBLISH_MAX_ATTEMPTS"], config["PUBLISH_MAX_BACKOFF"]
+    published, failed, released = [], [], []
+    for item, post_id, error in outcomes:
+        if post_id is not None:
+            published.append({"item_id": item["id"], "is_published": True, "platform_post_id": str(post_id),
+                              "published_at": now, "publish_error": None, "publish_not_before": None})
+            continue
+        if error is None:
+            released.append({"item_id": item["id"], "publish_not_before": None})
+            continue
+        attempts = item["publish_attempts"] + 1 if error.retryable else max_attempts
+        delay = min(max_backoff, REQUEUE_BACKOFF_BASE * 2 ** (attempts - 1))
+        failed.append({"item_id": item["id"], "publish_attempts": attempts, "publish_error": error.message,
+                       "publish_not_before": now + timedelta(seconds=delay)})
+        current_app.logger.warning("Publishing content %s failed (attempt %s of %s): %s",
+                                   item["id"], attempts, max_attempts, error.message)
+    for kind, batch in (("published", published), ("failed", failed), ("released", released)):
+        if batch:
+            _record(kind, batch)
+    return {"published": len(published), "failed": len(failed)}
+
+
+def run_publisher(app, batch_size: int, interval: float = 30.0, once: bool = False, echo=None):
+    """Publish due items batch by batch; sleeps `interval` once nothing is due."""
+    while True:
+        with app.app_context():
+            counts = publish_items(claim_due(batch_size))
+        if echo and (counts["published"] or counts["failed"]):
+            echo(f"Published {counts['published']} items, {counts['failed']} failed")
+        if counts["published"] + counts["failed"] >= batch_size:
+            continue
+        if once:
+            return
+        time.sleep(interval)
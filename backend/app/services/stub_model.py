@@ -0,0 +1,70 @@
+"""
+Offline stand-in for genai.GenerativeModel.
+Selected with GEMINI_MODEL=stub; answers our own prompt formats with
+template content so generation paths can be exercised without network access.
+"""
+
+import json
+import re
+import time
+from types import SimpleNamespace
+from .fallback_generator import fallback_day, generate_fallback_days, platform_for_day
+
+_PROFILE_FIELDS = {
+    "Business": "business_name",
+    "Industry": "industry",
+    "Audience": "target_audience",
+    "Tone": "brand_tone",
+    "Goal": "primary_goal",
+}
+
+
+def _field(prompt: str, label: str, default: str = "") -> str:
+    match = re.search(rf"^{label}: (.*)$", prompt, re.MULTILINE)
+    return match.group(1).strip() if match else default
+
+
+def _profile_from_prompt(prompt: str):
+    values = {attr: _field(prompt, label, "Business") for label, attr in _PROFILE_FIELDS.items()}
+    return SimpleNamespace(**values)
+
+
+class StubGenerativeModel:
+    def __init__(self, model_name: str = "stub", latency: float = 0.0):
+        self.model_name = model_name
+        self.latency = latency
+
+    def _answer(self, prompt: str):
+        array = re.search(r"Generate a (\d+)-day social media content plan", prompt)
+        if array:
+            return generate_fallback_days(_profile_from_prompt(prompt), days=int(array.group(1)))
+        day = re.search(r"Day (\d+)", prompt)
+        if day and "content_idea" in prompt:
+            n = int(day.group(1))
+            platform = re.search(r"for (Instagram|Facebook|YouTube)", prompt, re.IGNORECASE)
+            platform = platform.group(1).lower() if platform else platform_for_day(n)
+            return fallback_day(n, platform, _profile_from_prompt(prompt))
+        hook = _field(prompt, "Hook")
+        return {
+            "hook": f"✨ {hook}",
+            "caption": _field(prompt, "Caption"),
+            "hashtags": "#Growth #ContentStrategy",
+            "cta": _field(prompt, "CTA", "Follow us for more!"),
+            "script": "",
+        }
+
+    def generate_content(self, prompt, stream: bool = False, **kwargs):
+        text = json.dumps(self._answer(prompt), ensure_ascii=False)
+        if stream:
+            return self._stream(f"```json\n{text}\n```")
+        if self.latency:
+            time.sleep(self.latency)
+        return SimpleNamespace(text=text)
+
+    def _stream(self, text: str, chunk_size: int = 64):
+        """Chunks shaped like a streamed response; latency is spread across them."""
+        chunks = [text[i:i + chunk_size] for i in range(0, len(text), chunk_size)]
+        for chunk in chunks:
+            if self.latency:
+                time.sleep(self.latency / len(chunks))
+            yield SimpleNamespace(text=chunk)
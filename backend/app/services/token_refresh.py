@@ -0,0 +1,240 @@
+"""
+Proactive OAuth token refresh for connected social accounts.
+
+The callbacks record token_expires_at; `flask tokens refresh` periodically
+claims accounts whose token expires within a per-platform margin (Google
+access tokens last an hour, Meta long-lived tokens sixty days) through the
+(is_active, token_expires_at) index, refreshes a batch concurrently and
+writes the results back by id, only while the row still holds the tokens
+that were refreshed (a reconnect in the meantime wins). Publishing and
+other request paths therefore always find a live token and never refresh
+inline.
+
+Claiming pushes refresh_not_before out by a lease, with SELECT ... FOR UPDATE
+SKIP LOCKED on Postgres and a guarded per-row UPDATE elsewhere (as in
+job_queue), so several refreshers can run side by side. A failed refresh
+backs off exponentially through the same column; a grant the provider
+reports as revoked or expired sets needs_reconnect, which keeps the account
+out of later sweeps until the user connects it again.
+"""
+
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta
+from flask import current_app
+from sqlalchemy import and_, bindparam, or_, select, update
+from .. import db
+from ..models.social_account import SocialAccount
+from ..utils.http_client import http_client
+
+META_TOKEN_URL = "https://graph.facebook.com/v18.0/oauth/access_token"
+GOOGLE_TOKEN_URL = "https://oauth2.googleapis.com/token"
+
+# platform -> token issuer
+PROVIDERS = {"youtube": "google", "instagram": "meta", "facebook": "meta"}
+
+LEASE_SECONDS = 300
+BACKOFF_BASE = 60
+META_DEFAULT_EXPIRES_IN = 60 * 86400
+# Graph API error code for an expired or revoked access token
+META_INVALID_TOKEN = 190
+
+_table = SocialAccount.__table__
+
+
+class TokenRevoked(Exception):
+    """The provider no longer accepts the grant; only the user reconnecting can fix it."""
+
+
+def expires_at(expires_in, default: int = None):
+    """token_expires_at for a token response's `expires_in` (seconds)."""
+    seconds = expires_in if expires_in is not None else default
+    if seconds is None:
+        return None
+    return datetime.utcnow() + timedelta(seconds=int(seconds))
+
+
+def _due_condition(now: datetime, config):
+    margins = {
+        "google": timedelta(seconds=config["TOKEN_REFRESH_MARGIN_GOOGLE"]),
+        "meta": timedelta(seconds=config["TOKEN_REFRESH_MARGIN_META"]),
+    }
+    per_platform = [
+        and_(SocialAccount.platform == platform, SocialAccount.token_expires_at <= now + margins[provider])
+        for platform, provider in PROVIDERS.items()
+    ]
+    return and_(
+        SocialAccount.is_active.is_(True),
+        SocialAccount.needs_reconnect.is_(False),
+        # the widest margin bounds the index range scan; the OR below narrows it per platform
+        SocialAccount.token_expires_at <= now + max(margins.values()),
+        or_(*per_platform),
+        or_(SocialAccount.refresh_not_before.is_(None), SocialAccount.refresh_not_before <= now),
+        or_(SocialAccount.platform != "youtube", SocialAccount.refresh_token.isnot(None)),
+    )
+
+
+def due_candidates(now: datetime, limit: int):
+    """SELECT of up to `limit` account ids due for a refresh, soonest expiry first."""
+    return (
+        select(SocialAccount.id)
+        .where(_due_condition(now, current_app.config))
+        .order_by(SocialAccount.token_expires_at)
+        .limit(limit)
+    )
+
+
+def claim_due(limit: int) -> list:
+    """Lease up to `limit` accounts due for a refresh; returns their ids."""
+    now = datetime.utcnow()
+    leased = {"refresh_not_before": now + timedelta(seconds=LEASE_SECONDS)}
+    candidates = due_candidates(now, limit)
+
+    if db.engine.dialect.name == "postgresql":
+        ids = db.session.execute(candidates.with_for_update(skip_locked=True)).scalars().all()
+        if ids:
+            db.session.execute(update(SocialAccount).where(SocialAccount.id.in_(ids)).values(**leased),
+                               execution_options={"synchronize_session": False})
+        db.session.commit()
+        return list(ids)
+
+    # no row locks (SQLite): an account belongs to whoever moves its lease first
+    ids = []
+    for account_id in db.session.execute(candidates).scalars().all():
+        result = db.session.execute(
+            update(SocialAccount)
+            .where(SocialAccount.id == account_id,
+                   or_(SocialAccount.refresh_not_before.is_(None), SocialAccount.refresh_not_before <= now))
+            .values(**leased),
+            execution_options={"synchronize_session": False},
+        )
+        if result.rowcount:
+            ids.append(account_id)
+    db.session.commit()
+    return ids
+
+
+def _raise_for_status(resp):
+    if resp.status_code in (400, 401):
+        try:
+            error = resp.json().get("error")
+        except ValueError:
+            error = None
+        # Google: invalid_grant; Meta: an OAuthException with code 190
+        if error == "invalid_grant" or (isinstance(error, dict) and error.get("code") == META_INVALID_TOKEN):
+            raise TokenRevoked(f"{resp.status_code}: {resp.text[:200]}")
+    resp.raise_for_status()
+
+
+def _refresh_google(account: dict, credentials: dict) -> dict:
+    resp = http_client.post(GOOGLE_TOKEN_URL, data={
+        "client_id": credentials["YOUTUBE_CLIENT_ID"],
+        "client_secret": credentials["YOUTUBE_CLIENT_SECRET"],
+        "refresh_token": account["refresh_token"],
+        "grant_type": "refresh_token",
+    }, retries=0)
+    _raise_for_status(resp)
+    tokens = resp.json()
+    return {
+        "access_token": tokens["access_token"],
+        # Google only returns a refresh token when it rotates it
+        "refresh_token": tokens.get("refresh_token") or account["refresh_token"],
+        "token_expires_at": expires_at(tokens.get("expires_in"), default=3600),
+    }
+
+
+def _refresh_meta(account: dict, credentials: dict) -> dict:
+    resp = http_client.get(META_TOKEN_URL, params={
+        "grant_type": "fb_exchange_token",
+        "client_id": credentials["META_APP_ID"],
+        "client_secret": credentials["META_APP_SECRET"],
+        "fb_exchange_token": account["access_token"],
+    }, retries=0)
+    _raise_for_status(resp)
+    tokens = resp.json()
+    return {
+        "access_token": tokens["access_token"],
+        "refresh_token": account["refresh_token"],
+        "token_expires_at": expires_at(tokens.get("expires_in"), default=META_DEFAULT_EXPIRES_IN),
+    }
+
+
+REFRESHERS = {"google": _refresh_google, "meta": _refresh_meta}
+
+
+def _refresh_one(account: dict, credentials: dict):
+    """(account, new token values or None, exception or None); runs on a pool thread."""
+    try:
+        return account, REFRESHERS[PROVIDERS[account["platform"]]](account, credentials), None
+    except Exception as exc:
+        return account, None, exc
+
+
+def _store(rows: list):
+    """UPDATE by account id, skipping accounts whose tokens changed since they were read (a reconnect)."""
+    stmt = update(_table).where(
+        _table.c.id == bindparam("row_id"),
+        _table.c.access_token.is_not_distinct_from(bindparam("old_access_token")),
+        _table.c.refresh_token.is_not_distinct_from(bindparam("old_refresh_token")),
+    )
+    db.session.execute(stmt, rows)
+
+
+def refresh_accounts(ids: list, concurrency: int) -> dict:
+    """Refresh the claimed accounts concurrently and store every result."""
+    if not ids:
+        return {"refreshed": 0, "failed": 0}
+    config = current_app.config
+    credentials = {key: config[key] for key in
+                   ("YOUTUBE_CLIENT_ID", "YOUTUBE_CLIENT_SECRET", "META_APP_ID", "META_APP_SECRET")}
+    columns = (SocialAccount.id, SocialAccount.platform, SocialAccount.access_token,
+               SocialAccount.refresh_token, SocialAccount.refresh_failures)
+    accounts = [row._asdict() for row in db.session.execute(select(*columns).where(SocialAccount.id.in_(ids)))]
+    # release the connection while the pool waits on the token endpoints
+    db.session.commit()
+
+    with ThreadPoolExecutor(max_workers=max(1, min(concurrency, len(accounts))),
+                            thread_name_prefix="token-refresh") as pool:
+        results = list(pool.map(lambda account: _refresh_one(account, credentials), accounts))
+
+    now = datetime.utcnow()
+    max_backoff = config["TOKEN_REFRESH_MAX_BACKOFF"]
+    succeeded, failed = [], []
+    for account, tokens, error in results:
+        read = {"row_id": account["id"], "old_access_token": account["access_token"],
+                "old_refresh_token": account["refresh_token"]}
+        if tokens is not None:
+            succeeded.append({**read, **tokens, "refresh_failures": 0, "refresh_not_before": None})
+            continue
+        failures = account["refresh_failures"] + 1
+        if isinstance(error, TokenRevoked):
+            failed.append({**read, "refresh_failures": failures, "refresh_not_before": None,
+                           "needs_reconnect": True})
+            current_app.logger.warning("Token for social account %s was revoked; the user has to reconnect: %s",
+                                       account["id"], error)
+            continue
+        delay = min(max_backoff, BACKOFF_BASE * 2 ** (failures - 1))
+        failed.append({**read, "refresh_failures": failures, "refresh_not_before": now + timedelta(seconds=delay),
+                       "needs_reconnect": False})
+        current_app.logger.warning("Token refresh failed for social account %s (attempt %s, retry in %ss): %s",
+                                   account["id"], failures, delay, error)
+    for rows in (succeeded, failed):
+        if rows:
+            _store(rows)
+    db.session.commit()
+    return {"refreshed": len(succeeded), "failed": len(failed)}
+
+
+def run_refresher(app, batch_size: int, concurrency: int, interval: float = 60.0, once: bool = False, echo=None):
+    """Refresh due tokens batch by batch; sleeps `interval` once nothing is due."""
+    while True:
+        with app.app_context():
+            counts = refresh_accounts(claim_due(batch_size), concurrency)
+        if echo and (counts["refreshed"] or counts["failed"]):
+            echo(f"Refreshed {counts['refreshed']} tokens, {counts['failed']} failed")
+        full_batch = counts["refreshed"] + counts["failed"] >= batch_size
+        if full_batch:
+            continue
+        if once:
+            return
+        time.sleep(interval)
@@ -1,3 +1,11 @@
 from .jwt_utils import generate_token, decode_token, jwt_required
+from .principal_cache import principal_cache
+from .http_client import http_client
+from .circuit_breaker import CircuitOpenError, gemini_breaker
+from .rate_limiter import RateLimitedError, gemini_limiter
+from .serialize import json_response, select_dicts
 
-__all__ = ["generate_token", "decode_token", "jwt_required"]
+__all__ = [
+    "generate_token", "decode_token", "jwt_required", "principal_cache", "http_client",
+    "CircuitOpenError", "gemini_breaker", "RateLimitedError", "gemini_limiter", "json_response", "select_dicts",
+]
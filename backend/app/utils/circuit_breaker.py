@@ -0,0 +1,208 @@
+"""
+Circuit breaker and hedged calls for flaky upstreams (Gemini).
+
+The breaker keeps the outcome and latency of the last `window` calls. Once
+at least `min_calls` are recorded and the share of failures (slow calls
+count as failures) reaches `failure_rate`, it opens and callers fail fast
+with CircuitOpenError instead of waiting on the upstream. After
+`reset_timeout` seconds one probe call is let through (half-open); its
+outcome closes or re-opens the circuit. Every state change starts a new
+generation, and a call's outcome only counts in the generation it started
+in: a slow call from before a trip cannot land as the half-open probe.
+
+hedged() runs a call on a shared pool and gives up waiting after a
+deadline, returning the caller's local fallback; the late answer is ignored
+(it is still recorded by the breaker when it lands). Abandoned calls keep
+their pool thread, so a call made while every hedge thread is busy skips
+the upstream and falls back at once instead of queueing behind them.
+"""
+
+import threading
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor, TimeoutError as FutureTimeout
+
+CLOSED, OPEN, HALF_OPEN = "closed", "open", "half_open"
+
+
+class CircuitOpenError(Exception):
+    """Raised instead of calling an upstream whose circuit is open."""
+
+
+class CircuitBreaker:
+    def __init__(self, name: str, window: int = 20, min_calls: int = 5, failure_rate: float = 0.5,
+                 slow_call_seconds: float = 8.0, reset_timeout: float = 30.0):
+        self.name = name
+        self.window = window
+        self.min_calls = min_calls
+        self.failure_rate = failure_rate
+        self.slow_call_seconds = slow_call_seconds
+        self.reset_timeout = reset_timeout
+        self._calls = deque(maxlen=window)  # (ok, seconds)
+        self._state = CLOSED
+        self._opened_at = 0.0
+        self._probing = False
+        self._generation = 1
+        self._rejected = 0
+        self._lock = threading.Lock()
+
+    def init_app(self, app):
+        """Read <NAME>_BREAKER_* settings, e.g. GEMINI_BREAKER_WINDOW."""
+        prefix = f"{self.name.upper()}_BREAKER_"
+        with self._lock:
+            self.window = app.config[prefix + "WINDOW"]
+            self.min_calls = app.config[prefix + "MIN_CALLS"]
+            self.failure_rate = app.config[prefix + "FAILURE_RATE"]
+            self.slow_call_seconds = app.config[prefix + "SLOW_CALL"]
+            self.reset_timeout = app.config[prefix + "RESET"]
+            self._calls = deque(self._calls, maxlen=self.window)
+        app.extensions[f"{self.name}_breaker"] = self
+
+    @property
+    def state(self) -> str:
+        with self._lock:
+            return self._current_state()
+
+    def _current_state(self) -> str:
+        if self._state == OPEN and time.monotonic() - self._opened_at >= self.reset_timeout:
+            self._state = HALF_OPEN
+            self._probing = False
+            self._generation += 1
+        return self._state
+
+    def short_circuits(self) -> bool:
+        """True (counted as a rejection) while open; callers then skip the upstream."""
+        with self._lock:
+            if self._current_state() == OPEN:
+                self._rejected += 1
+                return True
+            return False
+
+    def allow(self):
+        """A ticket for record() if a call may go out now, else None; in half-open only one probe at a time."""
+        with self._lock:
+            state = self._current_state()
+            if state == CLOSED:
+                return self._generation
+            if state == HALF_OPEN and not self._probing:
+                self._probing = True
+                return self._generation
+            self._rejected += 1
+            return None
+
+    def record(self, ok: bool, seconds: float, ticket: int):
+        """Count a call's outcome; dropped if the state changed since allow() issued `ticket`."""
+        ok = ok and seconds < self.slow_call_seconds
+        with self._lock:
+            if ticket != self._generation:
+                return
+            if self._state == HALF_OPEN:
+                self._probing = False
+                if ok:
+                    self._state = CLOSED
+                    self._generation += 1
+                    self._calls.clear()
+                else:
+                    self._trip()
+                return
+            self._calls.append((ok, seconds))
+            if self._state == CLOSED and len(self._calls) >= self.min_calls:
+                failures = sum(1 for good, _ in self._calls if not good)
+                if failures / len(self._calls) >= self.failure_rate:
+                    self._trip()
+
+    def _trip(self):
+        self._state = OPEN
+        self._opened_at = time.monotonic()
+        self._generation += 1
+        self._calls.clear()
+
+    def call(self, fn, *args, **kwargs):
+        ticket = self.allow()
+        if ticket is None:
+            raise CircuitOpenError(f"{self.name} circuit is open")
+        started = time.perf_counter()
+        try:
+            result = fn(*args, **kwargs)
+        except Exception:
+            self.record(False, time.perf_counter() - started, ticket)
+            raise
+        self.record(True, time.perf_counter() - started, ticket)
+        return result
+
+    def reset(self):
+        with self._lock:
+            self._state = CLOSED
+            self._probing = False
+            self._generation += 1
+            self._calls.clear()
+
+    def stats(self) -> dict:
+        with self._lock:
+            state = self._current_state()
+            calls = list(self._calls)
+            latencies = sorted(s for _, s in calls)
+            retry_in = self.reset_timeout - (time.monotonic() - self._opened_at) if state == OPEN else 0.0
+            return {
+                "state": state,
+                "recent_calls": len(calls),
+                "recent_failures": sum(1 for ok, _ in calls if not ok),
+                "p50_ms": round(latencies[len(latencies) // 2] * 1000, 1) if latencies else None,
+                "max_ms": round(latencies[-1] * 1000, 1) if latencies else None,
+                "rejected": self._rejected,
+                "retry_in_s": round(max(0.0, retry_in), 1),
+            }
+
+
+HEDGE_WORKERS = 8
+
+_hedge_pool = None
+_hedge_lock = threading.Lock()
+# one slot per pool thread: a hedge never waits in the pool's queue
+_hedge_slots = threading.BoundedSemaphore(HEDGE_WORKERS)
+_hedge_stats = {"calls": 0, "late": 0, "skipped": 0}
+
+
+def _pool() -> ThreadPoolExecutor:
+    global _hedge_pool
+    with _hedge_lock:
+        if _hedge_pool is None:
+            _hedge_pool = ThreadPoolExecutor(max_workers=HEDGE_WORKERS, thread_name_prefix="hedge")
+        return _hedge_pool
+
+
+def hedged(fn, deadline: float, fallback):
+    """fn() if it finishes within `deadline` seconds, else fallback(); deadline <= 0 waits."""
+    if deadline <= 0:
+        return fn()
+    if not _hedge_slots.acquire(blocking=False):
+        # every hedge thread is still busy with abandoned calls
+        with _hedge_lock:
+            _hedge_stats["skipped"] += 1
+        return fallback()
+
+    def run():
+        try:
+            return fn()
+        finally:
+            _hedge_slots.release()
+
+    future = _pool().submit(run)
+    with _hedge_lock:
+        _hedge_stats["calls"] += 1
+    try:
+        return future.result(timeout=deadline)
+    except FutureTimeout:
+        if future.cancel():  # never started, so run() will not release its slot
+            _hedge_slots.release()
+        with _hedge_lock:
+            _hedge_stats["late"] += 1
+        return fallback()
+
+
+def hedge_stats() -> dict:
+    with _hedge_lock:
+        return dict(_hedge_stats)
+
+
+gemini_breaker = CircuitBreaker("gemini")
@@ -0,0 +1,41 @@
+"""
+Conditional GET helpers (ETag / Last-Modified).
+
+Routes derive validators from a cheap aggregate query and only build the
+full body when the client's cached copy is stale.
+"""
+
+import hashlib
+from datetime import timezone
+from flask import request, make_response
+
+
+def make_etag(*parts) -> str:
+    return hashlib.sha1(repr(parts).encode("utf-8")).hexdigest()
+
+
+def _to_http_date(value):
+    """Naive UTC column value -> aware, second-resolution datetime."""
+    return value.replace(tzinfo=timezone.utc, microsecond=0) if value else None
+
+
+def _is_fresh(etag: str, last_modified) -> bool:
+    # If-None-Match wins over If-Modified-Since when both are sent (RFC 9110 13.2.2)
+    if request.if_none_match:
+        return request.if_none_match.contains(etag)
+    if request.if_modified_since and last_modified:
+        return _to_http_date(last_modified) <= request.if_modified_since
+    return False
+
+
+def conditional_response(etag: str, last_modified, build):
+    """Return 304 when the validators match, otherwise the response from build()."""
+    if _is_fresh(etag, last_modified):
+        response = make_response("", 304)
+    else:
+        response = make_response(build())
+    response.set_etag(etag)
+    if last_modified:
+        response.last_modified = _to_http_date(last_modified)
+    response.headers["Cache-Control"] = "private, no-cache"
+    return response
@@ -0,0 +1,169 @@
+"""
+Shared outbound HTTP client.
+
+One requests.Session per worker process, so calls to Google, Meta, YouTube
+and the Gemini REST API reuse keep-alive connections from per-host pools
+instead of opening a new TCP+TLS connection each time. Every call gets
+default connect/read timeouts; idempotent methods (and connect failures on
+any method) are retried with jittered exponential backoff; calls that must
+not be repeated, such as OAuth code exchanges, pass retries=0. Latency is
+recorded per upstream.
+
+HTTP_UPSTREAM_OVERRIDES ("host=http://127.0.0.1:9100,...") sends calls for
+a host to another base URL, e.g. the local stub servers used by the
+benchmarks; stats still use the original upstream name.
+"""
+
+import os
+import threading
+import time
+from urllib.parse import urlsplit
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+from .metrics import metrics
+
+# (upstream, host, path prefix); first match wins
+UPSTREAMS = [
+    ("gemini", "generativelanguage.googleapis.com", ""),
+    ("youtube", "www.googleapis.com", "/youtube"),
+    ("google", "oauth2.googleapis.com", ""),
+    ("google", "accounts.google.com", ""),
+    ("google", "www.googleapis.com", ""),
+    ("meta", "graph.facebook.com", ""),
+    ("meta", "www.facebook.com", ""),
+]
+
+
+def parse_overrides(raw: str) -> dict:
+    """'host=base,host2=base2' -> {host: base}."""
+    overrides = {}
+    for item in (raw or "").split(","):
+        host, _, base = item.strip().partition("=")
+        if host and base:
+            overrides[host.strip()] = base.strip().rstrip("/")
+    return overrides
+
+
+def upstream_for(url: str) -> str:
+    parts = urlsplit(url)
+    for name, host, prefix in UPSTREAMS:
+        if parts.hostname == host and parts.path.startswith(prefix):
+            return name
+    return parts.hostname or "other"
+
+
+class HttpClient:
+    def __init__(self):
+        self.connect_timeout = 3.05
+        self.read_timeout = 15.0
+        self.pool_maxsize = 10
+        self.retries = 2
+        self.backoff_factor = 0.3
+        self.overrides = {}
+        self._sessions = {}  # retries -> session
+        self._pid = None
+        self._lock = threading.Lock()
+        self._stats = {}
+
+    def init_app(self, app):
+        self.connect_timeout = app.config["HTTP_CONNECT_TIMEOUT"]
+        self.read_timeout = app.config["HTTP_READ_TIMEOUT"]
+        self.pool_maxsize = app.config["HTTP_POOL_MAXSIZE"]
+        self.retries = app.config["HTTP_RETRIES"]
+        self.backoff_factor = app.config["HTTP_BACKOFF_FACTOR"]
+        self.overrides = parse_overrides(app.config["HTTP_UPSTREAM_OVERRIDES"])
+        self._sessions = {}
+        app.extensions["http_client"] = self
+
+    @property
+    def session(self) -> requests.Session:
+        return self._session_for(self.retries)
+
+    def _session_for(self, retries: int) -> requests.Session:
+        # sessions must not be shared across a fork, so rebuild per process
+        session = self._sessions.get(retries)
+        if session is None or self._pid != os.getpid():
+            with self._lock:
+                if self._pid != os.getpid():
+                    self._sessions = {}
+                    self._pid = os.getpid()
+                session = self._sessions.get(retries)
+                if session is None:
+                    session = self._sessions[retries] = self._build_session(retries)
+        return session
+
+    def _build_session(self, retries: int) -> requests.Session:
+        retry = Retry(
+            total=retries,
+            connect=retries,
+            read=retries,
+            status=retries,
+            backoff_factor=self.backoff_factor,
+            backoff_jitter=self.backoff_factor,
+            status_forcelist=(429, 500, 502, 503, 504),
+            allowed_methods=Retry.DEFAULT_ALLOWED_METHODS,
+            respect_retry_after_header=True,
+            raise_on_status=False,
+        )
+        adapter = HTTPAdapter(pool_connections=16, pool_maxsize=self.pool_maxsize, max_retries=retry)
+        session = requests.Session()
+        session.mount("https://", adapter)
+        session.mount("http://", adapter)
+        return session
+
+    def request(self, method: str, url: str, upstream: str = None, retries: int = None,
+                **kwargs) -> requests.Response:
+        """`retries` overrides HTTP_RETRIES for this call; 0 sends it exactly once."""
+        session = self._session_for(self.retries if retries is None else retries)
+        kwargs.setdefault("timeout", (self.connect_timeout, self.read_timeout))
+        upstream = upstream or upstream_for(url)
+        if self.overrides:
+            url = self._rewrite(url)
+        started = time.perf_counter()
+        ok = False
+        try:
+            response = session.request(method, url, **kwargs)
+            ok = response.status_code < 500
+            return response
+        finally:
+            self.record(upstream, time.perf_counter() - started, ok)
+
+    def _rewrite(self, url: str) -> str:
+        parts = urlsplit(url)
+        base = self.overrides.get(parts.hostname)
+        if base is None:
+            return url
+        query = f"?{parts.query}" if parts.query else ""
+        return f"{base}{parts.path}{query}"
+
+    def get(self, url: str, **kwargs) -> requests.Response:
+        return self.request("GET", url, **kwargs)
+
+    def post(self, url: str, **kwargs) -> requests.Response:
+        return self.request("POST", url, **kwargs)
+
+    def record(self, upstream: str, seconds: float, ok: bool = True):
+        """Account one call; also used for SDK calls that bypass this session."""
+        with self._lock:
+            s = self._stats.setdefault(upstream, {"calls": 0, "errors": 0, "total_seconds": 0.0, "max_seconds": 0.0})
+            s["calls"] += 1
+            s["errors"] += 0 if ok else 1
+            s["total_seconds"] += seconds
+            s["max_seconds"] = max(s["max_seconds"], seconds)
+        metrics.observe_outbound(upstream, seconds, ok)
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                name: {
+                    **s,
+                    "total_seconds": round(s["total_seconds"], 4),
+                    "max_seconds": round(s["max_seconds"], 4),
+                    "avg_seconds": round(s["total_seconds"] / s["calls"], 4) if s["calls"] else 0.0,
+                }
+                for name, s in self._stats.items()
+            }
+
+
+http_client = HttpClient()
@@ -2,7 +2,7 @@ import jwt
 import datetime
 from functools import wraps
 from flask import request, jsonify, current_app
-from ..models.user import User
+from .principal_cache import principal_cache
 
 
 def generate_token(user_id: int) -> str:
@@ -27,7 +27,7 @@ def jwt_required(f):
         token = auth_header.split(" ", 1)[1]
         try:
             payload = decode_token(token)
-            user = User.query.get(payload["sub"])
+            user = principal_cache.load(token, payload)
             if not user:
                 return jsonify({"error": "User not found"}), 401
             request.current_user = user
@@ -0,0 +1,200 @@
+"""
+In-process request metrics, exposed in Prometheus text format at /api/metrics.
+
+Three families of histograms:
+- request latency per endpoint (Flask endpoint name, method, status class)
+- SQL statements and SQL time per request, from SQLAlchemy engine events
+- outbound HTTP time per upstream, fed by http_client.record
+
+Recording is a dict lookup and a short bucket scan under one lock. Under
+gunicorn each worker has its own registry; with METRICS_DIR set every worker
+periodically writes a snapshot to <dir>/metrics-<pid>.json and a scrape of
+any worker merges all snapshots. Clear METRICS_DIR when the service starts.
+"""
+
+import glob
+import json
+import os
+import threading
+import time
+from flask import g, has_request_context, request
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+COUNT_BUCKETS = (0, 1, 2, 3, 5, 10, 20, 50, 100, 250)
+
+FAMILIES = {
+    "creatorflow_http_request_duration_seconds": (
+        "Request latency by endpoint", ("endpoint", "method", "status"), LATENCY_BUCKETS),
+    "creatorflow_request_sql_statements": (
+        "SQL statements executed per request", ("endpoint",), COUNT_BUCKETS),
+    "creatorflow_request_sql_duration_seconds": (
+        "Time spent in SQL per request", ("endpoint",), LATENCY_BUCKETS),
+    "creatorflow_outbound_request_duration_seconds": (
+        "Outbound HTTP/model call latency by upstream", ("upstream", "outcome"), LATENCY_BUCKETS),
+}
+
+
+def _bucket_index(buckets: tuple, value: float) -> int:
+    for i, bound in enumerate(buckets):
+        if value <= bound:
+            return i
+    return len(buckets)  # +Inf
+
+
+def _format_value(value: float) -> str:
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+def _escape(value: str) -> str:
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+class Metrics:
+    def __init__(self):
+        self.metrics_dir = ""
+        self.flush_interval = 5.0
+        self._series = {name: {} for name in FAMILIES}  # name -> {labels: [bucket counts..., sum, count]}
+        self._lock = threading.Lock()
+        self._last_flush = 0.0
+
+    def init_app(self, app):
+        self.metrics_dir = app.config["METRICS_DIR"]
+        self.flush_interval = app.config["METRICS_FLUSH_INTERVAL"]
+        if self.metrics_dir:
+            os.makedirs(self.metrics_dir, exist_ok=True)
+        if not event.contains(Engine, "before_cursor_execute", _before_cursor_execute):
+            event.listen(Engine, "before_cursor_execute", _before_cursor_execute)
+            event.listen(Engine, "after_cursor_execute", _after_cursor_execute)
+            event.listen(Engine, "handle_error", _handle_error)
+        app.before_request(_start_request)
+        app.after_request(self._finish_request)
+        app.extensions["metrics"] = self
+
+    def observe(self, name: str, labels: tuple, value: float):
+        buckets = FAMILIES[name][2]
+        index = _bucket_index(buckets, value)
+        with self._lock:
+            series = self._series[name].get(labels)
+            if series is None:
+                series = self._series[name][labels] = [0] * (len(buckets) + 1) + [0.0, 0]
+            series[index] += 1
+            series[-2] += value
+            series[-1] += 1
+
+    def observe_outbound(self, upstream: str, seconds: float, ok: bool):
+        self.observe("creatorflow_outbound_request_duration_seconds", (upstream, "ok" if ok else "error"), seconds)
+
+    def _finish_request(self, response):
+        started = g.get("metrics_started")
+        if started is None:
+            return response
+        labels = (request.endpoint or "unmatched", request.method, f"{response.status_code // 100}xx")
+        if response.is_streamed:
+            # SSE: the request lasts until the body is done, and its SQL runs while it streams
+            ctx = g._get_current_object()
+            response.call_on_close(lambda: self._record_request(labels, ctx))
+        else:
+            self._record_request(labels, g)
+        return response
+
+    def _record_request(self, labels: tuple, ctx):
+        started = ctx.pop("metrics_started", None)
+        if started is None:
+            return
+        self.observe("creatorflow_http_request_duration_seconds", labels, time.perf_counter() - started)
+        self.observe("creatorflow_request_sql_statements", labels[:1], ctx.pop("metrics_sql_count", 0))
+        self.observe("creatorflow_request_sql_duration_seconds", labels[:1], ctx.pop("metrics_sql_seconds", 0.0))
+        if self.metrics_dir and time.monotonic() - self._last_flush >= self.flush_interval:
+            self.flush()
+
+    def snapshot(self) -> dict:
+        with self._lock:
+            return {name: {labels: list(values) for labels, values in series.items()}
+                    for name, series in self._series.items()}
+
+    def flush(self):
+        """Write this worker's snapshot for other workers' scrapes to merge."""
+        self._last_flush = time.monotonic()
+        data = {name: [[list(labels), values] for labels, values in series.items()]
+                for name, series in self.snapshot().items()}
+        path = os.path.join(self.metrics_dir, f"metrics-{os.getpid()}.json")
+        tmp = f"{path}.tmp"
+        with open(tmp, "w", encoding="utf-8") as fh:
+            json.dump(data, fh)
+        os.replace(tmp, path)
+
+    def collect(self) -> dict:
+        """Series across all workers (just this one without METRICS_DIR)."""
+        if not self.metrics_dir:
+            return self.snapshot()
+        self.flush()
+        merged = {name: {} for name in FAMILIES}
+        for path in glob.glob(os.path.join(self.metrics_dir, "metrics-*.json")):
+            try:
+                with open(path, encoding="utf-8") as fh:
+                    data = json.load(fh)
+            except (OSError, ValueError):
+                continue
+            for name, series in data.items():
+                if name not in merged:
+                    continue
+                for labels, values in series:
+                    current = merged[name].setdefault(tuple(labels), [0] * len(values))
+                    merged[name][tuple(labels)] = [a + b for a, b in zip(current, values)]
+        return merged
+
+    def render(self) -> str:
+        lines = []
+        for name, series in self.collect().items():
+            help_text, label_names, buckets = FAMILIES[name]
+            lines.append(f"# HELP {name} {help_text}")
+            lines.append(f"# TYPE {name} histogram")
+            for labels, values in sorted(series.items()):
+                base = ",".join(f'{k}="{_escape(v)}"' for k, v in zip(label_names, labels))
+                sep = "," if base else ""
+                cumulative = 0
+                for bound, count in zip(buckets + ("+Inf",), values[:-2]):
+                    cumulative += count
+                    le = bound if bound == "+Inf" else _format_value(bound)
+                    lines.append(f'{name}_bucket{{{base}{sep}le="{le}"}} {cumulative}')
+                lines.append(f"{name}_sum{{{base}}} {_format_value(values[-2])}")
+                lines.append(f"{name}_count{{{base}}} {values[-1]}")
+        return "\n".join(lines) + "\n"
+
+    def reset(self):
+        with self._lock:
+            self._series = {name: {} for name in FAMILIES}
+
+
+def _start_request():
+    g.metrics_started = time.perf_counter()
+    g.metrics_sql_count = 0
+    g.metrics_sql_seconds = 0.0
+
+
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    conn.info.setdefault("metrics_query_start", []).append(time.perf_counter())
+
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    starts = conn.info.get("metrics_query_start")
+    if not starts:
+        return
+    elapsed = time.perf_counter() - starts.pop()
+    if has_request_context() and "metrics_started" in g:
+        g.metrics_sql_count += 1
+        g.metrics_sql_seconds += elapsed
+
+
+
+def _handle_error(context):
+    # a failed statement never reaches after_cursor_execute: drop its start time
+    conn = context.connection
+    starts = conn.info.get("metrics_query_start") if conn is not None else None
+    if starts:
+        starts.pop()
+
+
+metrics = Metrics()
@@ -0,0 +1,78 @@
+"""
+Per-process cache of verified JWT principals.
+
+jwt_required used to load the User row on every authenticated request. The
+cache keeps a column snapshot of the user keyed by the raw token, so repeat
+requests with the same token skip the SELECT. Entries never outlive the
+token's own `exp` and are dropped when the user row (or whether the user
+has a firm profile) changes. Each invalidation bumps the user's version, and
+a load only stores its snapshot if the version did not move while it read
+the row, so a read from before an invalidation is never cached.
+"""
+
+import threading
+import time
+from sqlalchemy.orm import make_transient_to_detached
+from .ttl_cache import TTLCache
+from .. import db
+from ..models.user import User
+
+
+class PrincipalCache:
+    def __init__(self, maxsize: int = 1024, ttl: float = 300.0):
+        self._cache = TTLCache(maxsize=maxsize, ttl=ttl)
+        self._tokens_by_user = {}  # user_id -> set of cached tokens
+        self._versions = {}  # user_id -> invalidation count
+        self._lock = threading.Lock()
+
+    def init_app(self, app):
+        self._cache.maxsize = app.config["JWT_PRINCIPAL_CACHE_SIZE"]
+        self._cache.ttl = app.config["JWT_PRINCIPAL_CACHE_TTL"]
+        app.extensions["principal_cache"] = self
+
+    def load(self, token: str, payload: dict):
+        """Return the User for a verified payload, hitting the DB only on a miss."""
+        snapshot = self._cache.get(token)
+        if snapshot is not None:
+            user = User(**snapshot)
+            make_transient_to_detached(user)
+            return db.session.merge(user, load=False)
+
+        with self._lock:
+            version = self._versions.get(payload["sub"], 0)
+        user = db.session.get(User, payload["sub"])
+        if user is None:
+            return None
+        remaining = payload.get("exp", 0) - time.time()
+        snapshot = {attr.key: getattr(user, attr.key) for attr in User.__mapper__.column_attrs}
+        with self._lock:
+            if self._versions.get(user.id, 0) != version:
+                return user  # invalidated while we read: the snapshot may be stale
+            self._cache.set(token, snapshot, ttl=remaining)
+            # drop tokens that already expired or were evicted
+            tokens = {t for t in self._tokens_by_user.get(user.id, ()) if t in self._cache}
+            tokens.add(token)
+            self._tokens_by_user[user.id] = tokens
+        return user
+
+    def invalidate_user(self, user_id: int):
+        with self._lock:
+            self._versions[user_id] = self._versions.get(user_id, 0) + 1
+            tokens = self._tokens_by_user.pop(user_id, set())
+        for token in tokens:
+            self._cache.pop(token)
+
+    def clear(self):
+        with self._lock:
+            self._tokens_by_user.clear()
+            self._versions.clear()
+        self._cache.clear()
+
+    def stats(self) -> dict:
+        stats = self._cache.stats()
+        # every hit is a User SELECT that jwt_required did not have to run
+        stats["db_reads_saved"] = stats["hits"]
+        return stats
+
+
+principal_cache = PrincipalCache()
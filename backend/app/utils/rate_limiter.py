@@ -0,0 +1,171 @@
+"""
+Token-bucket rate limiting for model calls (Gemini quota).
+
+Every call takes one token from a global bucket sized to the quota and, when
+the caller is known, one from that user's bucket, so a single user cannot
+drain the quota for everyone. A caller that finds a bucket empty may wait
+up to a short budget for the refill, or give up at once and serve its
+fallback. The buckets live in a store chosen with <NAME>_RATE_STORE:
+
+    memory  per-process buckets (default; single worker or development)
+    sql     rate_limit_buckets table, shared by every gunicorn worker
+
+A rate of 0 per minute disables that bucket.
+"""
+
+import threading
+import time
+from flask import has_request_context, request
+from sqlalchemy import insert, select, update
+from sqlalchemy.exc import IntegrityError
+from .. import db
+from ..models.rate_limit_bucket import RateLimitBucket
+
+
+class RateLimitedError(Exception):
+    """Raised instead of calling an upstream whose quota is used up."""
+
+
+def _refill(tokens: float, refilled_at: float, now: float, rate: float, burst: float) -> float:
+    return min(burst, tokens + max(0.0, now - refilled_at) * rate)
+
+
+class MemoryStore:
+    def __init__(self):
+        self._buckets = {}  # key -> [tokens, refilled_at]
+        self._lock = threading.Lock()
+
+    def take(self, key: str, rate: float, burst: float, cost: float = 1.0) -> float:
+        """Take `cost` tokens; returns 0.0 when granted, else the seconds until they would be."""
+        now = time.time()
+        with self._lock:
+            bucket = self._buckets.get(key)
+            tokens = burst if bucket is None else _refill(bucket[0], bucket[1], now, rate, burst)
+            if tokens < cost:
+                return (cost - tokens) / rate
+            self._buckets[key] = [min(burst, tokens - cost), now]
+        return 0.0
+
+
+class _Conflict(Exception):
+    pass
+
+
+class SQLStore:
+    ATTEMPTS = 5
+
+    def __init__(self):
+        self._table = RateLimitBucket.__table__
+
+    def take(self, key: str, rate: float, burst: float, cost: float = 1.0) -> float:
+        # compare-and-set on refilled_at: a concurrent taker makes us re-read, never double-spend
+        t = self._table
+        for _ in range(self.ATTEMPTS):
+            try:
+                with db.engine.begin() as conn:
+                    now = time.time()
+                    row = conn.execute(select(t.c.tokens, t.c.refilled_at).where(t.c.key == key)).first()
+                    tokens = burst if row is None else _refill(row.tokens, row.refilled_at, now, rate, burst)
+                    if tokens < cost:
+                        return (cost - tokens) / rate
+                    values = {"tokens": min(burst, tokens - cost), "refilled_at": now}
+                    if row is None:
+                        conn.execute(insert(t).values(key=key, **values))
+                    elif not conn.execute(
+                        update(t).where(t.c.key == key, t.c.refilled_at == row.refilled_at).values(**values)
+                    ).rowcount:
+                        raise _Conflict()
+                return 0.0
+            except (_Conflict, IntegrityError):
+                continue
+        # heavy contention on this bucket: treat it as momentarily empty
+        return 1.0 / rate
+
+
+class RateLimiter:
+    def __init__(self, name: str):
+        self.name = name
+        self.store = None
+        self.rate = 0.0  # tokens per second, global
+        self.burst = 0.0
+        self.user_rate = 0.0
+        self.user_burst = 0.0
+        self.max_wait = 0.0
+        self._stats = {"granted": 0, "waited": 0, "rejected": 0, "wait_seconds": 0.0}
+        self._lock = threading.Lock()
+
+    def init_app(self, app):
+        """Read <NAME>_RATE_* settings, e.g. GEMINI_RATE_PER_MINUTE."""
+        prefix = f"{self.name.upper()}_RATE_"
+        kind = app.config[prefix + "STORE"]
+        if kind == "memory":
+            self.store = MemoryStore()
+        elif kind == "sql":
+            self.store = SQLStore()
+        else:
+            raise ValueError(f"Unknown {prefix}STORE: {kind}")
+        per_minute, user_per_minute = app.config[prefix + "PER_MINUTE"], app.config[prefix + "USER_PER_MINUTE"]
+        # an unset burst allows a tenth of a minute's quota at once
+        self.rate = per_minute / 60.0
+        self.burst = float(app.config[prefix + "BURST"] or max(1, per_minute // 10))
+        self.user_rate = user_per_minute / 60.0
+        self.user_burst = float(app.config[prefix + "USER_BURST"] or max(1, user_per_minute // 10))
+        self.max_wait = app.config[prefix + "MAX_WAIT"]
+        app.extensions[f"{self.name}_limiter"] = self
+
+    @property
+    def enabled(self) -> bool:
+        return self.store is not None and (self.rate > 0 or self.user_rate > 0)
+
+    def _take(self, user_id) -> float:
+        user_key = f"{self.name}:user:{user_id}" if user_id is not None and self.user_rate > 0 else None
+        if user_key:
+            delay = self.store.take(user_key, self.user_rate, self.user_burst)
+            if delay:
+                return delay
+        if self.rate > 0:
+            delay = self.store.take(f"{self.name}:global", self.rate, self.burst)
+            if delay:
+                if user_key:
+                    self.store.take(user_key, self.user_rate, self.user_burst, cost=-1.0)  # give it back
+                return delay
+        return 0.0
+
+    def acquire(self, user_id=None, wait: float = None) -> bool:
+        """Take a token for one call, waiting up to `wait` seconds (default <NAME>_RATE_MAX_WAIT)."""
+        if not self.enabled:
+            return True
+        if user_id is None and has_request_context():
+            user = getattr(request, "current_user", None)
+            user_id = user.id if user is not None else None
+        deadline = time.monotonic() + (self.max_wait if wait is None else wait)
+        waited = 0.0
+        while True:
+            delay = self._take(user_id)
+            if not delay:
+                self._count(granted=1, waited=1 if waited else 0, wait_seconds=waited)
+                return True
+            if time.monotonic() + delay > deadline:
+                self._count(rejected=1, wait_seconds=waited)
+                return False
+            time.sleep(delay)
+            waited += delay
+
+    def _count(self, **increments):
+        with self._lock:
+            for key, value in increments.items():
+                self._stats[key] += value
+
+    def stats(self) -> dict:
+        with self._lock:
+            stats = dict(self._stats)
+        stats["wait_seconds"] = round(stats["wait_seconds"], 3)
+        stats.update({
+            "store": type(self.store).__name__ if self.store else None,
+            "per_minute": round(self.rate * 60, 3),
+            "user_per_minute": round(self.user_rate * 60, 3),
+        })
+        return stats
+
+
+gemini_limiter = RateLimiter("gemini")
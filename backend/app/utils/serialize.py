@@ -0,0 +1,43 @@
+"""
+ORM-free serialization for list endpoints.
+
+Routes select exactly the columns they return with a Core select, turn the
+rows into plain dicts (no ORM identity map, no per-row to_dict) and encode
+the payload with orjson when it is installed. Datetimes are emitted in the
+same isoformat the models' to_dict uses; orjson does that natively, the
+stdlib fallback converts them in its `default` hook.
+"""
+
+import json
+from datetime import date, datetime
+from flask import current_app
+from .. import db
+
+try:
+    import orjson
+except ImportError:  # optional speedup
+    orjson = None
+
+
+def select_dicts(stmt) -> list:
+    """Run a Core select; one dict per row keyed by the selected column names."""
+    result = db.session.execute(stmt)
+    keys = list(result.keys())
+    return [dict(zip(keys, row)) for row in result]
+
+
+def _default(value):
+    if isinstance(value, (datetime, date)):
+        return value.isoformat()
+    raise TypeError(f"Object of type {type(value).__name__} is not JSON serializable")
+
+
+def dumps(payload) -> bytes:
+    if orjson is not None:
+        return orjson.dumps(payload)
+    return json.dumps(payload, default=_default, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+
+
+def json_response(payload, status: int = 200):
+    """Like jsonify(payload), status but through the fast encoder."""
+    return current_app.response_class(dumps(payload), status=status, mimetype="application/json")
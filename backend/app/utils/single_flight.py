@@ -0,0 +1,87 @@
+"""
+Single-flight coalescing of identical in-flight calls.
+
+do(key, fn) runs fn once for every caller that arrives with the same key
+while a call is in flight: the first caller (the leader) makes the upstream
+call and the others wait on its future and get the same result or
+exception. Double-clicks on "Improve" and several tabs rating one caption
+therefore cost one model call.
+
+With SINGLE_FLIGHT_LOCK_DIR set, leaders in different worker processes on
+the same host also serialize on a per-key file lock and call `recheck`
+(e.g. a shared llm_cache lookup) once they hold it, so the second worker
+picks up what the first one stored instead of calling again. Lock files are
+empty and may be cleared while the service is stopped.
+"""
+
+import os
+import threading
+from concurrent.futures import Future
+
+try:
+    import fcntl
+except ImportError:  # not on Windows: coalescing stays in-process
+    fcntl = None
+
+
+class SingleFlight:
+    def __init__(self, name: str):
+        self.name = name
+        self.lock_dir = ""
+        self._inflight = {}  # key -> Future
+        self._lock = threading.Lock()
+        self._stats = {"calls": 0, "coalesced": 0, "coalesced_across_workers": 0}
+
+    def init_app(self, app):
+        self.lock_dir = app.config["SINGLE_FLIGHT_LOCK_DIR"] if fcntl is not None else ""
+        if self.lock_dir:
+            os.makedirs(self.lock_dir, exist_ok=True)
+        app.extensions[f"{self.name}_single_flight"] = self
+
+    def do(self, key: str, fn, recheck=None):
+        """fn() once per key at a time; concurrent callers share the result."""
+        with self._lock:
+            future = self._inflight.get(key)
+            leader = future is None
+            if leader:
+                future = self._inflight[key] = Future()
+                self._stats["calls"] += 1
+            else:
+                self._stats["coalesced"] += 1
+        if not leader:
+            return future.result()
+
+        try:
+            result = self._lead(key, fn, recheck)
+        except BaseException as exc:
+            future.set_exception(exc)
+            raise
+        else:
+            future.set_result(result)
+            return result
+        finally:
+            with self._lock:
+                self._inflight.pop(key, None)
+
+    def _lead(self, key: str, fn, recheck):
+        if not (self.lock_dir and recheck):
+            return fn()
+        with open(os.path.join(self.lock_dir, f"{self.name}-{key}.lock"), "a") as fh:
+            fcntl.flock(fh, fcntl.LOCK_EX)
+            try:
+                hit = recheck()
+                if hit is not None:
+                    with self._lock:
+                        self._stats["coalesced_across_workers"] += 1
+                    return hit
+                return fn()
+            finally:
+                fcntl.flock(fh, fcntl.LOCK_UN)
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {**self._stats, "inflight": len(self._inflight),
+                    "cross_worker": bool(self.lock_dir)}
+
+
+model_flight = SingleFlight("model")
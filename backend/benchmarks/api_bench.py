@@ -0,0 +1,279 @@
+"""
+Drive every API endpoint with concurrent clients against local upstream stubs.
+
+    python benchmarks/api_bench.py [--database-url sqlite:///...] [--concurrency 8] [--requests 200]
+                                   [--latency gemini=0.2,google=0.03,meta=0.05,youtube=0.04]
+                                   [--only content] [--output results.json] [--compare previous.json]
+
+The app is served by a threaded werkzeug server; Gemini SDK calls use the
+offline stub model and every outbound HTTP call (Google OAuth, YouTube, Meta
+Graph, Gemini REST) is routed to benchmarks/stubs.py. Each scenario reports
+throughput and p50/p95/p99 latency; results are written as JSON (with the
+git commit) so runs on different commits can be diffed with --compare.
+"""
+
+import argparse
+import json
+import logging
+import os
+import platform
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timezone
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import requests  # noqa: E402
+from werkzeug.serving import make_server  # noqa: E402
+from app import create_app, db  # noqa: E402
+from app.config import Config  # noqa: E402
+from app.models import ContentCalendar, FirmProfile, SocialAccount, User  # noqa: E402
+from app.services.content_ops import generate_calendar  # noqa: E402
+from app.utils.jwt_utils import generate_token  # noqa: E402
+from stubs import StubServer  # noqa: E402
+
+PROFILE = {
+    "business_name": "Bench Bakery", "industry": "food and drink", "target_audience": "local families",
+    "brand_tone": "fun", "primary_goal": "growth", "posting_frequency": "daily",
+}
+
+
+def _caption(i: int) -> str:
+    return f"Why our sourdough takes 48 hours? #{i}\n\nFresh every morning.\nComment below! #bakery #bread #local"
+
+
+# (name, blueprint, build(user, i) -> (method, path, request kwargs))
+SCENARIOS = [
+    ("auth.me", "auth", lambda u, i: ("GET", "/api/auth/me", {})),
+    ("auth.google_callback", "auth", lambda u, i: ("GET", f"/api/auth/google/callback?code=c{i % 50}", {})),
+    ("profile.get", "profile", lambda u, i: ("GET", "/api/profile", {})),
+    ("profile.upsert", "profile", lambda u, i: ("POST", "/api/profile", {"json": PROFILE})),
+    ("content.calendar", "content", lambda u, i: ("GET", "/api/content/calendar", {})),
+    ("content.calendar_list_view", "content",
+     lambda u, i: ("GET", "/api/content/calendar?fields=id,day,platform,content_idea&limit=20", {})),
+    ("content.get_item", "content", lambda u, i: ("GET", f"/api/content/{u['items'][i % len(u['items'])]}", {})),
+    ("content.update_item", "content",
+     lambda u, i: ("PUT", f"/api/content/{u['items'][i % len(u['items'])]}", {"json": {"cta": f"Visit us #{i}"}})),
+    ("content.improve", "content",
+     lambda u, i: ("POST", f"/api/content/{u['items'][i % len(u['items'])]}/improve", {})),
+    ("content.batch_engaging", "content",
+     lambda u, i: ("POST", "/api/content/batch", {"json": {"ids": u["items"][:3], "operation": "engaging"}})),
+    ("content.generate", "content", lambda u, i: ("POST", "/api/content/generate", {})),
+    ("content.confirm_plan", "content", lambda u, i: ("POST", "/api/content/confirm-plan", {})),
+    ("content.rate_post", "content",
+     lambda u, i: ("POST", "/api/content/rate-post", {"json": {"caption": _caption(i), "has_image": True}})),
+    ("content.rate_posts_x50", "content",
+     lambda u, i: ("POST", "/api/content/rate-posts",
+                   {"json": {"posts": [{"caption": _caption(i * 50 + k)} for k in range(50)]}})),
+    ("social.accounts", "social", lambda u, i: ("GET", "/api/social/accounts", {})),
+    ("social.connect_instagram", "social", lambda u, i: ("GET", "/api/social/connect/instagram", {})),
+    ("social.meta_callback", "social",
+     lambda u, i: ("GET", f"/api/social/callback/meta?code=m{i}&state=facebook:{u['id']}", {})),
+    ("social.youtube_callback", "social",
+     lambda u, i: ("GET", f"/api/social/callback/youtube?code=y{i}&state=youtube:{u['id']}", {})),
+]
+
+
+def parse_latency(raw: str) -> dict:
+    latency = {}
+    for item in raw.split(","):
+        name, _, value = item.partition("=")
+        if name.strip() and value:
+            latency[name.strip()] = float(value)
+    return latency
+
+
+def percentile(sorted_values: list, pct: float) -> float:
+    if not sorted_values:
+        return 0.0
+    k = (len(sorted_values) - 1) * pct / 100
+    lo, hi = int(k), min(int(k) + 1, len(sorted_values) - 1)
+    return sorted_values[lo] + (sorted_values[hi] - sorted_values[lo]) * (k - lo)
+
+
+def seed(app, n_users: int) -> list:
+    with app.app_context():
+        db.create_all()
+        users = []
+        for i in range(n_users):
+            user = User(google_id=f"bench-{i}", name=f"Bench {i}", email=f"bench-{i}@example.com")
+            db.session.add(user)
+            db.session.flush()
+            db.session.add(FirmProfile(user_id=user.id, **PROFILE))
+            db.session.add(SocialAccount(user_id=user.id, platform="instagram", account_id=f"ig-{i}",
+                                         account_name=f"Bench {i}", access_token=f"tok-{i}"))
+            users.append(user)
+        db.session.commit()
+        seeded = []
+        for user in users:
+            generate_calendar(user.id)
+            items = [row.id for row in db.session.query(ContentCalendar.id)
+                     .filter_by(user_id=user.id).order_by(ContentCalendar.day)]
+            seeded.append({"id": user.id, "token": generate_token(user.id), "items": items})
+        return seeded
+
+
+def refresh_items(app, users: list):
+    """content.generate replaces calendars; later scenarios need the new ids."""
+    with app.app_context():
+        for user in users:
+            user["items"] = [row.id for row in db.session.query(ContentCalendar.id)
+                             .filter_by(user_id=user["id"]).order_by(ContentCalendar.day)]
+
+
+def run_scenario(base_url: str, build, users: list, total: int, concurrency: int) -> dict:
+    local = threading.local()
+    latencies, errors = [], []
+    lock = threading.Lock()
+
+    def one(i):
+        session = getattr(local, "session", None)
+        if session is None:
+            session = local.session = requests.Session()
+        user = users[i % len(users)]
+        method, path, kwargs = build(user, i)
+        headers = {"Authorization": f"Bearer {user['token']}"}
+        started = time.perf_counter()
+        try:
+            resp = session.request(method, base_url + path, headers=headers, allow_redirects=False,
+                                   timeout=60, **kwargs)
+            ok = resp.status_code < 400 and "error=" not in resp.headers.get("Location", "")
+            detail = f"{resp.status_code} {resp.headers.get('Location', '')}".strip()
+        except requests.RequestException as exc:
+            ok, detail = False, str(exc)
+        elapsed = time.perf_counter() - started
+        with lock:
+            latencies.append(elapsed)
+            if not ok:
+                errors.append(detail)
+
+    wall = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        list(pool.map(one, range(total)))
+    wall = time.perf_counter() - wall
+
+    ordered = sorted(latencies)
+    return {
+        "requests": total,
+        "errors": len(errors),
+        "first_error": errors[0] if errors else None,
+        "throughput_rps": round(total / wall, 1),
+        "mean_ms": round(sum(ordered) / len(ordered) * 1000, 2),
+        "p50_ms": round(percentile(ordered, 50) * 1000, 2),
+        "p95_ms": round(percentile(ordered, 95) * 1000, 2),
+        "p99_ms": round(percentile(ordered, 99) * 1000, 2),
+        "max_ms": round(ordered[-1] * 1000, 2),
+    }
+
+
+def git_commit() -> str:
+    try:
+        return subprocess.check_output(["git", "rev-parse", "--short", "HEAD"], text=True,
+                                       stderr=subprocess.DEVNULL).strip()
+    except (OSError, subprocess.CalledProcessError):
+        return "unknown"
+
+
+def print_comparison(results: dict, previous: dict):
+    print(f"\nvs {previous['meta'].get('commit')}:")
+    print(f"{'scenario':<30} {'p50':>14} {'p95':>14} {'rps':>14}")
+    for name, now in results["scenarios"].items():
+        before = previous.get("scenarios", {}).get(name)
+        if not before:
+            continue
+
+        def delta(key, lower_is_better=True):
+            if not before[key]:
+                return "n/a"
+            change = (now[key] - before[key]) / before[key] * 100
+            flag = "!" if (change > 10 if lower_is_better else change < -10) else " "
+            return f"{change:+7.1f}%{flag}"
+
+        print(f"{name:<30} {delta('p50_ms'):>14} {delta('p95_ms'):>14} {delta('throughput_rps', False):>14}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--database-url", default=None, help="default: a fresh SQLite file in a temp dir")
+    parser.add_argument("--users", type=int, default=20)
+    parser.add_argument("--concurrency", type=int, default=8)
+    parser.add_argument("--requests", type=int, default=200, help="requests per scenario")
+    parser.add_argument("--latency", default="gemini=0.2,google=0.03,meta=0.05,youtube=0.04",
+                        help="stub upstream latency in seconds")
+    parser.add_argument("--only", default="", help="comma-separated scenario or blueprint names")
+    parser.add_argument("--output", default=None, help="results JSON (default: benchmarks/results/<commit>.json)")
+    parser.add_argument("--compare", default=None, help="previous results JSON to diff against")
+    args = parser.parse_args()
+
+    latency = parse_latency(args.latency)
+    stubs = StubServer(latency=latency).start()
+    tmpdir = tempfile.mkdtemp(prefix="cf-bench-")
+    database_url = args.database_url or f"sqlite:///{os.path.join(tmpdir, 'bench.db')}"
+
+    class BenchConfig(Config):
+        SQLALCHEMY_DATABASE_URI = database_url
+        HTTP_UPSTREAM_OVERRIDES = stubs.overrides()
+        HTTP_RETRIES = 0
+        GEMINI_API_KEY = "bench"
+        GEMINI_MODEL = "stub"
+        GEMINI_STUB_LATENCY = latency.get("gemini", 0.0)
+        LLM_CACHE_BACKEND = "none"
+        FRONTEND_URL = "http://frontend.invalid"
+
+    app = create_app(BenchConfig)
+    logging.getLogger("werkzeug").setLevel(logging.ERROR)
+    users = seed(app, args.users)
+    server = make_server("127.0.0.1", 0, app, threaded=True)
+    threading.Thread(target=server.serve_forever, name="bench-app", daemon=True).start()
+    base_url = f"http://127.0.0.1:{server.server_port}"
+
+    only = {name.strip() for name in args.only.split(",") if name.strip()}
+    results = {
+        "meta": {
+            "commit": git_commit(),
+            "timestamp": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+            "database": database_url.split(":", 1)[0],
+            "python": platform.python_version(),
+            "users": args.users,
+            "concurrency": args.concurrency,
+            "requests_per_scenario": args.requests,
+            "upstream_latency": latency,
+        },
+        "scenarios": {},
+    }
+    print(f"{'scenario':<30} {'rps':>8} {'p50 ms':>9} {'p95 ms':>9} {'p99 ms':>9} {'errors':>7}")
+    try:
+        for name, blueprint, build in SCENARIOS:
+            if only and name not in only and blueprint not in only:
+                continue
+            stats = run_scenario(base_url, build, users, args.requests, args.concurrency)
+            if name == "content.generate":
+                refresh_items(app, users)
+            results["scenarios"][name] = stats
+            print(f"{name:<30} {stats['throughput_rps']:>8} {stats['p50_ms']:>9} {stats['p95_ms']:>9} "
+                  f"{stats['p99_ms']:>9} {stats['errors']:>7}")
+            if stats["errors"]:
+                print(f"    first error: {stats['first_error']}")
+    finally:
+        server.shutdown()
+        stubs.stop()
+    results["meta"]["upstream_calls"] = stubs.calls
+
+    output = args.output or os.path.join(os.path.dirname(os.path.abspath(__file__)), "results",
+                                         f"{results['meta']['commit']}.json")
+    os.makedirs(os.path.dirname(output) or ".", exist_ok=True)
+    with open(output, "w", encoding="utf-8") as fh:
+        json.dump(results, fh, indent=2)
+    print(f"\nwrote {output}")
+
+    if args.compare:
+        with open(args.compare, encoding="utf-8") as fh:
+            print_comparison(results, json.load(fh))
+
+
+if __name__ == "__main__":
+    main()
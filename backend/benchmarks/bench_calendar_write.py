@@ -0,0 +1,97 @@
+"""
+Compare the legacy per-row ORM calendar write against calendar_store.replace_calendar.
+
+    python benchmarks/bench_calendar_write.py [--users 50] [--database-url sqlite://]
+
+Each round replaces the calendar of every user once; both paths see the same
+pre-existing rows so the DELETE cost is included.
+"""
+
+import argparse
+import os
+import sys
+import time
+from types import SimpleNamespace
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app import create_app, db  # noqa: E402
+from app.config import Config  # noqa: E402
+from app.models import User, ContentCalendar  # noqa: E402
+from app.services.calendar_store import replace_calendar  # noqa: E402
+from app.services.fallback_generator import generate_fallback_days  # noqa: E402
+
+PROFILE = SimpleNamespace(
+    business_name="Bench Bakery", industry="food and drink", target_audience="local families",
+    brand_tone="fun", primary_goal="growth", posting_frequency="daily",
+)
+
+
+def legacy_replace(user_id, days):
+    """The write path /api/content/generate used before the bulk store."""
+    ContentCalendar.query.filter_by(user_id=user_id).delete()
+    db.session.commit()
+    records = []
+    for day_data in days:
+        record = ContentCalendar(
+            user_id=user_id,
+            day=day_data.get("day"),
+            platform=day_data.get("platform"),
+            content_idea=day_data.get("content_idea"),
+            hook=day_data.get("hook"),
+            caption=day_data.get("caption"),
+            hashtags=day_data.get("hashtags"),
+            script=day_data.get("script"),
+            cta=day_data.get("cta"),
+            seo_title=day_data.get("seo_title"),
+            seo_description=day_data.get("seo_description"),
+            seo_tags=day_data.get("seo_tags"),
+        )
+        db.session.add(record)
+        records.append(record)
+    db.session.commit()
+    return [r.to_dict() for r in records]
+
+
+def run(fn, user_ids, days, rounds):
+    best = float("inf")
+    for _ in range(rounds):
+        start = time.perf_counter()
+        for uid in user_ids:
+            fn(uid, days)
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--users", type=int, default=50)
+    parser.add_argument("--rounds", type=int, default=3)
+    parser.add_argument("--database-url", default="sqlite://")
+    args = parser.parse_args()
+
+    class BenchConfig(Config):
+        SQLALCHEMY_DATABASE_URI = args.database_url
+
+    app = create_app(BenchConfig)
+    with app.app_context():
+        db.create_all()
+        users = [User(google_id=f"bench-{i}", name=f"Bench {i}", email=f"bench-{i}@example.com")
+                 for i in range(args.users)]
+        db.session.add_all(users)
+        db.session.commit()
+        user_ids = [u.id for u in users]
+
+        print(f"{'days':>5} {'legacy ms':>10} {'bulk ms':>10} {'speedup':>8}   ({args.users} users, best of {args.rounds})")
+        for n in (5, 30, 90):
+            days = generate_fallback_days(PROFILE, days=n)
+            legacy = run(legacy_replace, user_ids, days, args.rounds)
+            bulk = run(replace_calendar, user_ids, days, args.rounds)
+            print(f"{n:>5} {legacy * 1000:>10.1f} {bulk * 1000:>10.1f} {legacy / bulk:>7.1f}x")
+
+        db.session.remove()
+        db.drop_all()
+
+
+if __name__ == "__main__":
+    main()
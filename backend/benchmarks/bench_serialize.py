@@ -0,0 +1,101 @@
+"""
+Compare ORM + to_dict + jsonify against the Core select + utils.serialize path for the calendar list.
+
+    python benchmarks/bench_serialize.py [--rows 1000 10000] [--database-url sqlite://]
+
+Both paths return every column of every row; the fast path is also timed
+with a list-view projection (day, platform, content_idea).
+"""
+
+import argparse
+import os
+import sys
+import time
+from types import SimpleNamespace
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from flask import jsonify  # noqa: E402
+from sqlalchemy import insert  # noqa: E402
+from sqlalchemy.orm import undefer_group  # noqa: E402
+from app import create_app, db  # noqa: E402
+from app.config import Config  # noqa: E402
+from app.models import User, ContentCalendar  # noqa: E402
+from app.services.calendar_store import GENERATED_FIELDS, list_calendar  # noqa: E402
+from app.services.fallback_generator import generate_fallback_days  # noqa: E402
+from app.utils import serialize  # noqa: E402
+from app.utils.serialize import json_response  # noqa: E402
+
+PROFILE = SimpleNamespace(
+    business_name="Bench Bakery", industry="food and drink", target_audience="local families",
+    brand_tone="fun", primary_goal="growth", posting_frequency="daily",
+)
+
+
+def orm_path(user_id):
+    """What get_calendar did before: hydrate every row, to_dict each, jsonify."""
+    items = (
+        ContentCalendar.query
+        .options(undefer_group("body"))
+        .filter_by(user_id=user_id)
+        .order_by(ContentCalendar.day.asc())
+        .all()
+    )
+    return jsonify({"calendar": [i.to_dict() for i in items]}).get_data()
+
+
+def core_path(user_id, fields=None):
+    items, _ = list_calendar(user_id, **({"fields": fields} if fields else {}))
+    return json_response({"calendar": items}).get_data()
+
+
+def best_of(fn, rounds):
+    best, size = float("inf"), 0
+    for _ in range(rounds):
+        db.session.expunge_all()
+        start = time.perf_counter()
+        size = len(fn())
+        best = min(best, time.perf_counter() - start)
+    return best, size
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--rows", type=int, nargs="+", default=[1000, 10000])
+    parser.add_argument("--rounds", type=int, default=5)
+    parser.add_argument("--database-url", default="sqlite://")
+    args = parser.parse_args()
+
+    class BenchConfig(Config):
+        SQLALCHEMY_DATABASE_URI = args.database_url
+
+    app = create_app(BenchConfig)
+    encoder = "orjson" if serialize.orjson is not None else "json"
+    with app.test_request_context(), app.app_context():
+        db.create_all()
+        template = generate_fallback_days(PROFILE, days=30)
+        print(f"{'rows':>6} {'orm ms':>8} {'core ms':>8} {'speedup':>8} {'list ms':>8} {'list KB':>8} {'full KB':>8}"
+              f"   (best of {args.rounds}, encoder={encoder})")
+        for n in args.rows:
+            user = User(google_id=f"bench-{n}", name="Bench", email=f"bench-{n}@example.com")
+            db.session.add(user)
+            db.session.commit()
+            user_id = user.id
+            rows = [{"user_id": user_id, **{f: template[i % 30].get(f) for f in GENERATED_FIELDS}, "day": i + 1}
+                    for i in range(n)]
+            db.session.execute(insert(ContentCalendar.__table__), rows)
+            db.session.commit()
+
+            orm, full_size = best_of(lambda: orm_path(user_id), args.rounds)
+            core, _ = best_of(lambda: core_path(user_id), args.rounds)
+            listed, list_size = best_of(lambda: core_path(user_id, ("id", "day", "platform", "content_idea")),
+                                        args.rounds)
+            print(f"{n:>6} {orm * 1000:>8.1f} {core * 1000:>8.1f} {orm / core:>7.1f}x {listed * 1000:>8.1f} "
+                  f"{list_size / 1024:>8.0f} {full_size / 1024:>8.0f}")
+
+        db.session.remove()
+        db.drop_all()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,118 @@
+"""
+Seed a large dataset and assert the hot lookup paths are planned as index searches.
+
+    python benchmarks/check_query_plans.py [--users 2000] [--database-url sqlite://]
+
+Exits non-zero when any query falls back to a table scan, so it can run in CI
+against SQLite or a local Postgres.
+"""
+
+import argparse
+import json
+import os
+import sys
+from datetime import datetime, timedelta
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from sqlalchemy import insert, text  # noqa: E402
+from app import create_app, db  # noqa: E402
+from app.config import Config  # noqa: E402
+from app.models import User, ContentCalendar, SocialAccount, Job  # noqa: E402
+from app.services import calendar_store, job_queue, publisher, token_refresh  # noqa: E402
+
+PLATFORMS = ("instagram", "facebook", "youtube")
+
+
+def seed(users: int, days: int):
+    now = datetime.utcnow()
+    db.session.execute(insert(User), [
+        {"id": i, "google_id": f"g-{i}", "name": f"User {i}", "email": f"u{i}@example.com", "created_at": now}
+        for i in range(1, users + 1)
+    ])
+    db.session.execute(insert(ContentCalendar), [
+        {"user_id": u, "day": d, "platform": PLATFORMS[d % 3], "content_idea": "idea", "caption": "caption",
+         "scheduled_at": now if d == 1 else None, "created_at": now, "updated_at": now}
+        for u in range(1, users + 1) for d in range(1, days + 1)
+    ])
+    db.session.execute(insert(SocialAccount), [
+        {"user_id": u, "platform": p, "account_name": p, "is_active": True, "connected_at": now,
+         "token_expires_at": now + timedelta(days=u % 60)}
+        for u in range(1, users + 1) for p in PLATFORMS
+    ])
+    db.session.execute(insert(Job), [
+        {"user_id": u, "kind": "generate", "status": "queued" if u % 50 == 0 else "succeeded", "created_at": now}
+        for u in range(1, users + 1)
+    ])
+    db.session.commit()
+
+
+def hot_queries(user_id: int):
+    """The statements the routes and workers issue, keyed by a label."""
+    now = datetime.utcnow()
+    cursor = calendar_store.encode_cursor(3, user_id * 10)
+    return {
+        "calendar page by user in (day, id) order": calendar_store.list_statement(user_id, limit=50),
+        "calendar page after a keyset cursor": calendar_store.list_statement(user_id, limit=50, cursor=cursor),
+        "job claim": job_queue.claim_candidates(now, 10),
+        "publisher claim": publisher.due_candidates(now, 50),
+        "token refresher claim": token_refresh.due_candidates(now, 50),
+        "calendar item by (id, user_id)": ContentCalendar.query
+            .filter_by(id=user_id * 10, user_id=user_id).statement,
+        "active accounts by user": SocialAccount.query
+            .filter_by(user_id=user_id, is_active=True).statement,
+    }
+
+
+def explain(stmt) -> str:
+    dialect = db.engine.dialect
+    sql = str(stmt.compile(dialect=dialect, compile_kwargs={"literal_binds": True}))
+    if dialect.name == "sqlite":
+        rows = db.session.execute(text(f"EXPLAIN QUERY PLAN {sql}")).all()
+        return "\n".join(row[-1] for row in rows)
+    if dialect.name == "postgresql":
+        plan = db.session.execute(text(f"EXPLAIN (FORMAT JSON) {sql}")).scalar()
+        return json.dumps(plan)
+    raise SystemExit(f"Unsupported dialect: {dialect.name}")
+
+
+def uses_index(plan: str, dialect: str) -> bool:
+    if dialect == "sqlite":
+        # a SCAN is a full table walk, a TEMP B-TREE an unindexed sort
+        return not any(line.startswith("SCAN") or "USE TEMP B-TREE" in line for line in plan.splitlines())
+    return '"Seq Scan"' not in plan and "Index" in plan
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--users", type=int, default=2000)
+    parser.add_argument("--days", type=int, default=30)
+    parser.add_argument("--database-url", default="sqlite://")
+    args = parser.parse_args()
+
+    class PlanConfig(Config):
+        SQLALCHEMY_DATABASE_URI = args.database_url
+
+    app = create_app(PlanConfig)
+    failures = 0
+    with app.app_context():
+        db.create_all()
+        try:
+            seed(args.users, args.days)
+            db.session.execute(text("ANALYZE"))
+            dialect = db.engine.dialect.name
+            for label, stmt in hot_queries(args.users // 2).items():
+                plan = explain(stmt)
+                ok = uses_index(plan, dialect)
+                failures += 0 if ok else 1
+                print(f"[{'ok' if ok else 'SCAN'}] {label}")
+                if not ok:
+                    print("    " + plan.replace("\n", "\n    "))
+        finally:
+            db.session.rollback()
+            db.drop_all()
+    sys.exit(1 if failures else 0)
+
+
+if __name__ == "__main__":
+    main()
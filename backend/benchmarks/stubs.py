@@ -0,0 +1,155 @@
+"""
+Local stand-ins for the upstream APIs (Google OAuth/userinfo, YouTube Data,
+Meta Graph, Gemini REST) with configurable per-upstream latency.
+
+    server = StubServer(latency={"gemini": 0.3, "google": 0.05})
+    server.start()
+    app_config["HTTP_UPSTREAM_OVERRIDES"] = server.overrides()
+
+Responses are derived from the request (the OAuth code becomes the token and
+the user id), so many concurrent clients get distinct, stable identities.
+Publishing endpoints accept posts and return an id, so end-to-end runs of
+the publisher work too.
+"""
+
+import json
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlsplit
+
+HOSTS = (
+    "oauth2.googleapis.com",
+    "www.googleapis.com",
+    "graph.facebook.com",
+    "generativelanguage.googleapis.com",
+)
+
+RATING = {
+    "score": 7,
+    "reason": "Clear message and a good hook; the CTA could be stronger.",
+    "suggestions": ["Add a question at the end.", "Use 8-12 hashtags.", "Post at peak hours."],
+}
+
+
+def _upstream(path: str) -> str:
+    if path.startswith("/v1beta/"):
+        return "gemini"
+    if path.startswith("/youtube/"):
+        return "youtube"
+    if path.startswith("/v18.0/") or path.startswith("/v19.0/"):
+        return "meta"
+    return "google"
+
+
+class _Handler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+
+    def log_message(self, fmt, *args):
+        pass
+
+    def _body(self) -> dict:
+        length = int(self.headers.get("Content-Length") or 0)
+        raw = self.rfile.read(length).decode("utf-8") if length else ""
+        if "json" in (self.headers.get("Content-Type") or ""):
+            return json.loads(raw or "{}")
+        return {k: v[0] for k, v in parse_qs(raw).items()}
+
+    def _send(self, status: int, payload: dict):
+        data = json.dumps(payload).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def _token(self) -> str:
+        return (self.headers.get("Authorization") or "").removeprefix("Bearer ").strip()
+
+    def _handle(self, method: str):
+        parts = urlsplit(self.path)
+        query = {k: v[0] for k, v in parse_qs(parts.query).items()}
+        body = self._body() if method == "POST" else {}
+        server = self.server
+        upstream = _upstream(parts.path)
+        delay = server.latency.get(upstream, 0.0)
+        if delay:
+            time.sleep(delay)
+        rate = server.fail_rate.get(upstream, 0.0)
+        with server.lock:
+            count = server.calls[upstream] = server.calls.get(upstream, 0) + 1
+        # deterministic failures: every (1 / rate)-th call to the upstream
+        if rate > 0 and count % max(1, round(1 / rate)) == 0:
+            return self._send(503, {"error": "stub failure"})
+
+        path = parts.path
+        if path == "/token":
+            code = body.get("code") or body.get("refresh_token", "refresh")
+            return self._send(200, {"access_token": f"at-{code}", "refresh_token": f"rt-{code}",
+                                    "expires_in": 3600, "token_type": "Bearer"})
+        if path == "/oauth2/v3/userinfo":
+            who = self._token().removeprefix("at-")
+            return self._send(200, {"sub": f"g-{who}", "email": f"{who}@bench.example",
+                                    "name": f"Bench {who}", "picture": ""})
+        if path == "/youtube/v3/channels":
+            who = self._token().removeprefix("at-")
+            return self._send(200, {"items": [{"id": f"UC{who}", "snippet": {"title": f"Channel {who}"}}]})
+        if path.endswith("/oauth/access_token"):
+            code = query.get("code") or query.get("fb_exchange_token", "x")
+            return self._send(200, {"access_token": f"meta-{code}", "token_type": "bearer", "expires_in": 5183944})
+        if path.endswith("/me"):
+            who = query.get("access_token", "").removeprefix("meta-")
+            return self._send(200, {"id": f"fb-{who}", "name": f"Page {who}"})
+        if path.startswith("/v1beta/models/"):
+            text = "```json\n" + json.dumps(RATING) + "\n```"
+            return self._send(200, {"candidates": [{"content": {"parts": [{"text": text}]}}]})
+        if upstream == "meta" and method == "POST":
+            return self._send(200, {"id": self._publish("post")})
+        return self._send(404, {"error": f"no stub for {method} {path}"})
+
+    def _publish(self, prefix: str) -> str:
+        server = self.server
+        with server.lock:
+            server.published += 1
+            return f"{prefix}-{server.published}"
+
+    def do_GET(self):
+        self._handle("GET")
+
+    def do_POST(self):
+        self._handle("POST")
+
+
+class StubServer:
+    def __init__(self, latency: dict = None, fail_rate: dict = None, host: str = "127.0.0.1", port: int = 0):
+        self._httpd = ThreadingHTTPServer((host, port), _Handler)
+        self._httpd.daemon_threads = True
+        self._httpd.latency = dict(latency or {})
+        self._httpd.fail_rate = dict(fail_rate or {})
+        self._httpd.calls = {}
+        self._httpd.published = 0
+        self._httpd.lock = threading.Lock()
+        self._thread = None
+
+    @property
+    def base_url(self) -> str:
+        host, port = self._httpd.server_address[:2]
+        return f"http://{host}:{port}"
+
+    @property
+    def calls(self) -> dict:
+        with self._httpd.lock:
+            return dict(self._httpd.calls)
+
+    def overrides(self) -> str:
+        """Value for HTTP_UPSTREAM_OVERRIDES routing every upstream host here."""
+        return ",".join(f"{host}={self.base_url}" for host in HOSTS)
+
+    def start(self):
+        self._thread = threading.Thread(target=self._httpd.serve_forever, name="stub-upstreams", daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._httpd.shutdown()
+        self._httpd.server_close()
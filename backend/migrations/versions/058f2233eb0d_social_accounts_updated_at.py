@@ -0,0 +1,26 @@
+"""social accounts updated_at
+
+Revision ID: 058f2233eb0d
+Revises: efc1a4398021
+Create Date: 2026-10-18 15:40:18.203377
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '058f2233eb0d'
+down_revision = 'efc1a4398021'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    with op.batch_alter_table('social_accounts', schema=None) as batch_op:
+        batch_op.add_column(sa.Column('updated_at', sa.DateTime(), nullable=True))
+
+
+def downgrade():
+    with op.batch_alter_table('social_accounts', schema=None) as batch_op:
+        batch_op.drop_column('updated_at')
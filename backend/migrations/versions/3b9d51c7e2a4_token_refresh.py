@@ -0,0 +1,30 @@
+"""token refresh bookkeeping
+
+Revision ID: 3b9d51c7e2a4
+Revises: 058f2233eb0d
+Create Date: 2026-10-18 20:10:42.518203
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '3b9d51c7e2a4'
+down_revision = '058f2233eb0d'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    with op.batch_alter_table('social_accounts', schema=None) as batch_op:
+        batch_op.add_column(sa.Column('refresh_failures', sa.Integer(), nullable=False, server_default='0'))
+        batch_op.add_column(sa.Column('refresh_not_before', sa.DateTime(), nullable=True))
+        batch_op.create_index('ix_social_accounts_active_expires', ['is_active', 'token_expires_at'], unique=False)
+
+
+def downgrade():
+    with op.batch_alter_table('social_accounts', schema=None) as batch_op:
+        batch_op.drop_index('ix_social_accounts_active_expires')
+        batch_op.drop_column('refresh_not_before')
+        batch_op.drop_column('refresh_failures')
@@ -0,0 +1,28 @@
+"""calendar source hash and edits
+
+Revision ID: 5f0c2d8e6b17
+Revises: c71e04b9a5d2
+Create Date: 2026-10-18 22:31:48.093527
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '5f0c2d8e6b17'
+down_revision = 'c71e04b9a5d2'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    with op.batch_alter_table('content_calendar', schema=None) as batch_op:
+        batch_op.add_column(sa.Column('source_hash', sa.String(length=64), nullable=True))
+        batch_op.add_column(sa.Column('edited_at', sa.DateTime(), nullable=True))
+
+
+def downgrade():
+    with op.batch_alter_table('content_calendar', schema=None) as batch_op:
+        batch_op.drop_column('edited_at')
+        batch_op.drop_column('source_hash')
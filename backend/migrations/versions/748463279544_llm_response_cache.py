@@ -0,0 +1,36 @@
+"""llm response cache
+
+Revision ID: 748463279544
+Revises: 73a9a98efd87
+Create Date: 2026-10-18 10:12:31.402117
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '748463279544'
+down_revision = '73a9a98efd87'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table('llm_response_cache',
+    sa.Column('key', sa.String(length=64), nullable=False),
+    sa.Column('model', sa.String(length=128), nullable=True),
+    sa.Column('response', sa.Text(), nullable=False),
+    sa.Column('size_bytes', sa.Integer(), nullable=False),
+    sa.Column('latency_ms', sa.Float(), nullable=True),
+    sa.Column('created_at', sa.DateTime(), nullable=True),
+    sa.Column('expires_at', sa.DateTime(), nullable=False),
+    sa.Column('last_hit_at', sa.DateTime(), nullable=True),
+    sa.PrimaryKeyConstraint('key')
+    )
+    op.create_index(op.f('ix_llm_response_cache_last_hit_at'), 'llm_response_cache', ['last_hit_at'], unique=False)
+
+
+def downgrade():
+    op.drop_index(op.f('ix_llm_response_cache_last_hit_at'), table_name='llm_response_cache')
+    op.drop_table('llm_response_cache')
@@ -0,0 +1,38 @@
+"""content publishing
+
+Revision ID: 8e2f6a1d4c93
+Revises: 3b9d51c7e2a4
+Create Date: 2026-10-18 21:02:17.164380
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '8e2f6a1d4c93'
+down_revision = '3b9d51c7e2a4'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    with op.batch_alter_table('content_calendar', schema=None) as batch_op:
+        batch_op.add_column(sa.Column('scheduled_at', sa.DateTime(), nullable=True))
+        batch_op.add_column(sa.Column('published_at', sa.DateTime(), nullable=True))
+        batch_op.add_column(sa.Column('platform_post_id', sa.String(length=256), nullable=True))
+        batch_op.add_column(sa.Column('publish_error', sa.Text(), nullable=True))
+        batch_op.add_column(sa.Column('publish_attempts', sa.Integer(), nullable=False, server_default='0'))
+        batch_op.add_column(sa.Column('publish_not_before', sa.DateTime(), nullable=True))
+        batch_op.create_index('ix_content_calendar_published_scheduled', ['is_published', 'scheduled_at'], unique=False)
+
+
+def downgrade():
+    with op.batch_alter_table('content_calendar', schema=None) as batch_op:
+        batch_op.drop_index('ix_content_calendar_published_scheduled')
+        batch_op.drop_column('publish_not_before')
+        batch_op.drop_column('publish_attempts')
+        batch_op.drop_column('publish_error')
+        batch_op.drop_column('platform_post_id')
+        batch_op.drop_column('published_at')
+        batch_op.drop_column('scheduled_at')
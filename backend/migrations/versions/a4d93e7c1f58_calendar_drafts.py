@@ -0,0 +1,33 @@
+"""calendar drafts
+
+Revision ID: a4d93e7c1f58
+Revises: 5f0c2d8e6b17
+Create Date: 2026-10-18 23:05:12.640288
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'a4d93e7c1f58'
+down_revision = '5f0c2d8e6b17'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table('calendar_drafts',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('user_id', sa.Integer(), nullable=False),
+    sa.Column('source_hash', sa.String(length=64), nullable=False),
+    sa.Column('days', sa.Text(), nullable=False),
+    sa.Column('created_at', sa.DateTime(), nullable=True),
+    sa.ForeignKeyConstraint(['user_id'], ['users.id'], ),
+    sa.PrimaryKeyConstraint('id'),
+    sa.UniqueConstraint('user_id')
+    )
+
+
+def downgrade():
+    op.drop_table('calendar_drafts')
@@ -0,0 +1,28 @@
+"""job retry backoff and retention
+
+Revision ID: b83e5f1a2c46
+Revises: a4d93e7c1f58
+Create Date: 2026-10-19 10:14:37.520913
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'b83e5f1a2c46'
+down_revision = 'a4d93e7c1f58'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    with op.batch_alter_table('jobs', schema=None) as batch_op:
+        batch_op.add_column(sa.Column('run_after', sa.DateTime(), nullable=True))
+        batch_op.create_index('ix_jobs_finished_at', ['finished_at'], unique=False)
+
+
+def downgrade():
+    with op.batch_alter_table('jobs', schema=None) as batch_op:
+        batch_op.drop_index('ix_jobs_finished_at')
+        batch_op.drop_column('run_after')
@@ -0,0 +1,29 @@
+"""rate limit buckets
+
+Revision ID: c71e04b9a5d2
+Revises: 8e2f6a1d4c93
+Create Date: 2026-10-18 21:48:05.730914
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'c71e04b9a5d2'
+down_revision = '8e2f6a1d4c93'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table('rate_limit_buckets',
+    sa.Column('key', sa.String(length=128), nullable=False),
+    sa.Column('tokens', sa.Float(), nullable=False),
+    sa.Column('refilled_at', sa.Float(), nullable=False),
+    sa.PrimaryKeyConstraint('key')
+    )
+
+
+def downgrade():
+    op.drop_table('rate_limit_buckets')
@@ -0,0 +1,26 @@
+"""social accounts needs_reconnect
+
+Revision ID: d52a7c9e3f18
+Revises: b83e5f1a2c46
+Create Date: 2026-10-19 11:02:51.384170
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'd52a7c9e3f18'
+down_revision = 'b83e5f1a2c46'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    with op.batch_alter_table('social_accounts', schema=None) as batch_op:
+        batch_op.add_column(sa.Column('needs_reconnect', sa.Boolean(), server_default=sa.false(), nullable=False))
+
+
+def downgrade():
+    with op.batch_alter_table('social_accounts', schema=None) as batch_op:
+        batch_op.drop_column('needs_reconnect')
@@ -0,0 +1,27 @@
+"""hot path indexes
+
+Revision ID: f4a8931673c2
+Revises: 748463279544
+Create Date: 2026-10-18 11:03:52.118406
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'f4a8931673c2'
+down_revision = '748463279544'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # ContentCalendar by user ordered by day (calendar listing, bulk replace).
+    # (id, user_id) lookups are served by the primary key and
+    # SocialAccount (user_id, is_active) by uq_user_platform's user_id prefix.
+    op.create_index('ix_content_calendar_user_id_day', 'content_calendar', ['user_id', 'day'], unique=False)
+
+
+def downgrade():
+    op.drop_index('ix_content_calendar_user_id_day', table_name='content_calendar')
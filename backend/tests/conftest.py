@@ -0,0 +1,74 @@
+"""
+Shared fixtures: an app on in-memory SQLite with the offline model stub
+(GEMINI_MODEL=stub), so the suite runs without network access.
+
+    cd backend && python -m pytest -q
+"""
+
+import os
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app import create_app, db  # noqa: E402
+from app.config import Config  # noqa: E402
+from app.models import FirmProfile, User  # noqa: E402
+
+
+class TestConfig(Config):
+    TESTING = True
+    SQLALCHEMY_DATABASE_URI = "sqlite://"
+    GEMINI_MODEL = "stub"
+    GEMINI_API_KEY = ""
+    GEMINI_STUB_LATENCY = 0.0
+    GEMINI_PLAN_MODE = "per_day"
+    GEMINI_CALL_TIMEOUT = 5.0
+    # failures provoked by one test must not open the breaker for the next
+    GEMINI_BREAKER_MIN_CALLS = 10 ** 6
+    GEMINI_RATE_STORE = "memory"
+    GEMINI_RATE_PER_MINUTE = 0
+    GEMINI_RATE_USER_PER_MINUTE = 0
+    LLM_CACHE_BACKEND = "memory"
+    SINGLE_FLIGHT_LOCK_DIR = ""
+    CALENDAR_PRECOMPUTE = False
+    CALENDAR_GENERATE_MODE = "full"
+    HTTP_UPSTREAM_OVERRIDES = ""
+
+
+@pytest.fixture
+def app():
+    app = create_app(TestConfig)
+    with app.app_context():
+        db.create_all()
+        yield app
+        db.session.remove()
+        db.drop_all()
+
+
+def _make_user(google_id: str, **profile) -> User:
+    user = User(google_id=google_id, name="Test User", email=f"{google_id}@example.com")
+    db.session.add(user)
+    db.session.flush()
+    values = {"business_name": "Acme Co", "industry": "real estate", "target_audience": "first-time buyers",
+              "brand_tone": "friendly", "primary_goal": "growth", "posting_frequency": "daily", **profile}
+    db.session.add(FirmProfile(user_id=user.id, **values))
+    db.session.commit()
+    return user
+
+
+@pytest.fixture
+def make_user(app):
+    """Factory for more users with profiles: make_user("g-2", industry=...)."""
+    return _make_user
+
+
+@pytest.fixture
+def user(make_user):
+    return make_user("g-1")
+
+
+@pytest.fixture
+def profile(user):
+    return FirmProfile.query.filter_by(user_id=user.id).one()
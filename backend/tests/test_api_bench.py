@@ -0,0 +1,46 @@
+import os
+import sys
+
+import pytest
+
+from app.models import SocialAccount
+from app.utils.http_client import http_client, parse_overrides
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "benchmarks"))
+
+from api_bench import parse_latency, percentile  # noqa: E402
+from stubs import StubServer  # noqa: E402
+
+
+@pytest.fixture
+def stubs(monkeypatch):
+    server = StubServer(fail_rate={"gemini": 0.5}).start()
+    monkeypatch.setattr(http_client, "overrides", parse_overrides(server.overrides()))
+    yield server
+    server.stop()
+
+
+def test_percentiles_interpolate():
+    values = [10.0, 20.0, 30.0, 40.0]
+    assert percentile(values, 50) == 25.0
+    assert percentile(values, 100) == 40.0
+    assert percentile([], 99) == 0.0
+    assert parse_latency("gemini=0.2, meta=0.05,bad") == {"gemini": 0.2, "meta": 0.05}
+
+
+def test_oauth_callback_runs_against_the_stubs(app, user, stubs):
+    before = http_client.stats().get("meta", {}).get("calls", 0)
+    resp = app.test_client().get(f"/api/social/callback/meta?code=m1&state=facebook:{user.id}")
+
+    assert resp.status_code == 302 and "success=facebook" in resp.headers["Location"]
+    account = SocialAccount.query.filter_by(user_id=user.id).one()
+    assert (account.access_token, account.account_id) == ("meta-m1", "fb-m1")
+    # calls are attributed to the real upstream, not the stub's address
+    assert stubs.calls == {"meta": 2}
+    assert http_client.stats()["meta"]["calls"] == before + 2
+
+
+def test_stub_failures_are_deterministic(stubs):
+    url = "https://generativelanguage.googleapis.com/v1beta/models/x:generateContent"
+    statuses = [http_client.post(url, json={}, retries=0).status_code for _ in range(4)]
+    assert statuses == [200, 503, 200, 503]
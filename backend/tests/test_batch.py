@@ -0,0 +1,68 @@
+import pytest
+
+from app.models import ContentCalendar, Job
+from app.services.content_ops import BATCH_MAX_ITEMS, ContentError, batch_apply, generate_calendar, validate_batch
+from app.utils.jwt_utils import generate_token
+
+
+@pytest.fixture
+def calendar(user):
+    return generate_calendar(user.id)
+
+
+@pytest.fixture
+def other_calendar(make_user):
+    return generate_calendar(make_user("g-2").id)
+
+
+def test_batch_applies_to_every_item(user, calendar):
+    ids = [d["id"] for d in calendar[:3]]
+    before = {i.id: i.updated_at for i in ContentCalendar.query}
+
+    records = batch_apply(user.id, [str(i) for i in reversed(ids)] + [ids[0]], "engaging")
+
+    assert [r["id"] for r in records] == ids
+    for item in ContentCalendar.query:
+        assert (item.updated_at > before[item.id]) == (item.id in ids)
+
+
+@pytest.mark.parametrize("ids, operation, status", [
+    ([1], "delete", 400),
+    (["x"], "improve", 400),
+    ([], "improve", 400),
+    (list(range(1, BATCH_MAX_ITEMS + 2)), "improve", 400),
+])
+def test_bad_requests(user, calendar, ids, operation, status):
+    for check in (batch_apply, validate_batch):
+        with pytest.raises(ContentError) as exc:
+            check(user.id, ids, operation)
+        assert exc.value.status == status
+
+
+def test_foreign_and_missing_ids_are_not_found(user, calendar, other_calendar):
+    ids = [calendar[0]["id"], other_calendar[0]["id"], 99999]
+    for check in (batch_apply, validate_batch):
+        with pytest.raises(ContentError) as exc:
+            check(user.id, ids, "improve")
+        assert exc.value.status == 404
+        assert str(sorted(ids[1:])) in exc.value.message
+
+
+def test_validate_batch_returns_the_normalized_ids(user, calendar):
+    ids = [calendar[2]["id"], str(calendar[0]["id"]), calendar[2]["id"]]
+    assert validate_batch(user.id, ids, "regenerate") == sorted({calendar[0]["id"], calendar[2]["id"]})
+
+
+def test_async_batch_is_validated_before_queueing(app, user, calendar, other_calendar):
+    client = app.test_client()
+    headers = {"Authorization": f"Bearer {generate_token(user.id)}"}
+
+    resp = client.post("/api/content/batch?async=1", headers=headers,
+                       json={"ids": [other_calendar[0]["id"]], "operation": "improve"})
+    assert resp.status_code == 404
+    assert Job.query.count() == 0
+
+    resp = client.post("/api/content/batch?async=1", headers=headers,
+                       json={"ids": [calendar[1]["id"], calendar[0]["id"]], "operation": "improve"})
+    assert resp.status_code == 202
+    assert Job.query.one().kind == "batch"
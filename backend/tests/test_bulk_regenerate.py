@@ -0,0 +1,26 @@
+from app.models import ContentCalendar
+from app.services import bulk_regenerate
+from app.services.bulk_regenerate import regenerate_all
+
+
+def test_workers_use_the_callers_config(app, monkeypatch):
+    monkeypatch.setattr(bulk_regenerate, "_worker_app", None)
+    config = {key: value for key, value in app.config.items() if key.isupper()}
+    bulk_regenerate._init_worker("model", {**config, "LLM_CACHE_TTL": 123})
+    worker = bulk_regenerate._worker_app
+    assert worker is not app
+    assert worker.config["SQLALCHEMY_DATABASE_URI"] == "sqlite://"
+    assert worker.config["GEMINI_MODEL"] == "stub" and worker.config["LLM_CACHE_TTL"] == 123
+
+
+def test_regenerate_all_from_templates(user, make_user, tmp_path):
+    other = make_user("g-2")
+    checkpoint = tmp_path / "checkpoint"
+
+    assert regenerate_all(days=5, chunk_size=1, processes=1, source="template", checkpoint=str(checkpoint),
+                          echo=lambda *args: None) == 2
+
+    for user_id in (user.id, other.id):
+        rows = ContentCalendar.query.filter_by(user_id=user_id).all()
+        assert sorted(r.day for r in rows) == [1, 2, 3, 4, 5]
+    assert not checkpoint.exists()
@@ -0,0 +1,89 @@
+import pytest
+
+from app import db
+from app.models import CalendarDraft, Job
+from app.services import openai_service
+from app.services.calendar_drafts import plan_hash, precompute_draft, take_draft
+from app.services.content_ops import generate_calendar
+from app.utils.jwt_utils import generate_token
+
+PROFILE = {"business_name": "Acme Co", "industry": "real estate", "target_audience": "first-time buyers",
+           "brand_tone": "fun", "primary_goal": "growth", "posting_frequency": "daily"}
+
+
+def test_a_draft_is_stored_and_taken_once(user, profile):
+    assert precompute_draft(user.id, plan_hash(profile)) == {"draft": "stored", "days": 5}
+    assert precompute_draft(user.id, plan_hash(profile)) == {"draft": "fresh"}
+
+    days = take_draft(user.id, profile)
+    db.session.commit()
+    assert [d["day"] for d in days] == [1, 2, 3, 4, 5]
+    assert take_draft(user.id, profile) is None
+
+
+def test_a_draft_for_old_inputs_is_not_taken(user, profile):
+    precompute_draft(user.id, plan_hash(profile))
+    profile.business_name = "Other Co"
+    db.session.commit()
+    assert take_draft(user.id, profile) is None
+
+
+def test_a_superseded_job_stores_nothing(user, profile):
+    old_hash = plan_hash(profile)
+    profile.industry = "dentistry"
+    db.session.commit()
+    assert precompute_draft(user.id, old_hash) == {"superseded": True}
+    assert CalendarDraft.query.count() == 0
+
+
+def test_a_plan_with_template_days_is_skipped(user, profile, monkeypatch):
+    real = openai_service._get_model
+
+    class Model:
+        def generate_content(self, prompt, **kwargs):
+            if "Generate Day 4 " in prompt:
+                raise RuntimeError("upstream error")
+            return real().generate_content(prompt, **kwargs)
+
+    monkeypatch.setattr(openai_service, "_get_model", lambda: Model())
+    assert precompute_draft(user.id, plan_hash(profile)) == {"draft": "skipped", "fallback_days": [4]}
+    assert CalendarDraft.query.count() == 0
+
+
+def test_generate_uses_the_draft(user, profile, monkeypatch):
+    precompute_draft(user.id, plan_hash(profile))
+    drafted = [d["caption"] for d in take_draft(user.id, profile)]
+    db.session.rollback()
+    monkeypatch.setattr(openai_service, "_get_model", lambda: pytest.fail("the model was asked"))
+
+    calendar = generate_calendar(user.id)
+
+    assert [d["caption"] for d in calendar] == drafted
+    assert CalendarDraft.query.count() == 0
+
+
+@pytest.fixture
+def save_profile(app, user):
+    app.config["CALENDAR_PRECOMPUTE"] = True
+    client = app.test_client()
+    headers = {"Authorization": f"Bearer {generate_token(user.id)}"}
+    return lambda: client.post("/api/profile", headers=headers, json=PROFILE)
+
+
+def test_saving_the_profile_queues_one_precompute(save_profile):
+    assert save_profile().status_code == 200
+    assert save_profile().status_code == 200
+    assert [(j.kind, j.status) for j in Job.query.order_by(Job.id)] == [
+        ("precompute", "superseded"), ("precompute", "queued")]
+
+
+def test_the_profile_and_its_job_are_saved_together(user, profile, save_profile, monkeypatch):
+    def broken(*args, **kwargs):
+        raise RuntimeError("queue unavailable")
+
+    monkeypatch.setattr("app.routes.profile.enqueue_job", broken)
+    with pytest.raises(RuntimeError):
+        save_profile()
+    db.session.rollback()
+    db.session.expire_all()
+    assert profile.brand_tone == "friendly"
@@ -0,0 +1,51 @@
+import pytest
+
+from app import db
+from app.models import ContentCalendar
+from app.services.calendar_store import replace_calendar
+from app.services.fallback_generator import fallback_day, platform_for_day
+from app.utils.jwt_utils import generate_token
+
+
+@pytest.fixture
+def calendar(user, profile):
+    return replace_calendar(user.id, [fallback_day(d, platform_for_day(d), profile) for d in range(1, 13)])
+
+
+@pytest.fixture
+def get(app, user):
+    client = app.test_client()
+    headers = {"Authorization": f"Bearer {generate_token(user.id)}"}
+    return lambda path: client.get(path, headers=headers)
+
+
+def test_pages_follow_the_cursor(calendar, get):
+    seen, cursor = [], ""
+    while True:
+        body = get(f"/api/content/calendar?limit=5&cursor={cursor}").get_json()
+        seen += [d["id"] for d in body["calendar"]]
+        cursor = body["next_cursor"]
+        if cursor is None:
+            break
+    assert seen == [d["id"] for d in calendar]
+
+
+def test_fields_project_the_listing(calendar, get):
+    items = get("/api/content/calendar?fields=day,platform,content_idea").get_json()["calendar"]
+    assert items[0] == {k: calendar[0][k] for k in ("day", "platform", "content_idea")}
+    assert "next_cursor" not in get("/api/content/calendar?fields=day").get_json()
+
+
+@pytest.mark.parametrize("query", ["fields=day,user_id", "fields=source_hash", "limit=0", "limit=1000",
+                                   "cursor=garbage"])
+def test_bad_listing_parameters(calendar, get, query):
+    assert get(f"/api/content/calendar?{query}").status_code == 400
+
+
+def test_large_bodies_are_deferred(calendar, get):
+    db.session.expire_all()
+    item = db.session.get(ContentCalendar, calendar[0]["id"])
+    assert not {"caption", "script", "seo_description"} & set(item.__dict__)
+
+    full = get(f"/api/content/{calendar[0]['id']}").get_json()["content"]
+    assert full["caption"] == calendar[0]["caption"] and full["script"] == calendar[0]["script"]
@@ -0,0 +1,65 @@
+import pytest
+
+from app import db
+from app.models import ContentCalendar
+from app.services import calendar_store
+from app.services.calendar_store import replace_calendar, replace_calendars
+from app.services.content_ops import generate_calendar
+from app.services.fallback_generator import fallback_day, platform_for_day
+from app.utils.jwt_utils import generate_token
+
+
+def _days(profile, count: int) -> list:
+    return [fallback_day(day, platform_for_day(day), profile) for day in range(1, count + 1)]
+
+
+def test_replace_returns_what_to_dict_would(user, profile):
+    records = replace_calendar(user.id, _days(profile, 30))
+
+    assert [r["day"] for r in records] == list(range(1, 31))
+    db.session.expire_all()
+    rows = ContentCalendar.query.filter_by(user_id=user.id).order_by(ContentCalendar.day).all()
+    assert records == [row.to_dict() for row in rows]
+
+
+def test_a_failed_insert_keeps_the_old_calendar(user, profile, monkeypatch):
+    old_ids = {d["id"] for d in generate_calendar(user.id)}
+
+    def fail(user_id, days):
+        raise RuntimeError("insert failed")
+
+    monkeypatch.setattr(calendar_store, "insert_days", fail)
+    with pytest.raises(RuntimeError):
+        replace_calendar(user.id, _days(profile, 5))
+
+    assert {r.id for r in ContentCalendar.query.filter_by(user_id=user.id)} == old_ids
+
+
+def test_replace_leaves_other_users_alone(user, profile, make_user):
+    other = make_user("g-2")
+    other_ids = {d["id"] for d in generate_calendar(other.id)}
+
+    replace_calendar(user.id, _days(profile, 3))
+
+    assert {r.id for r in ContentCalendar.query.filter_by(user_id=other.id)} == other_ids
+    assert ContentCalendar.query.filter_by(user_id=user.id).count() == 3
+
+
+def test_replace_calendars_swaps_many_users_at_once(user, profile, make_user):
+    other = make_user("g-2")
+    generate_calendar(user.id)
+
+    assert replace_calendars({user.id: _days(profile, 2), other.id: _days(profile, 4)}) == 6
+    db.session.commit()
+
+    assert ContentCalendar.query.filter_by(user_id=user.id).count() == 2
+    assert ContentCalendar.query.filter_by(user_id=other.id).count() == 4
+
+
+def test_generate_endpoint_stores_the_returned_calendar(app, user):
+    client = app.test_client()
+    resp = client.post("/api/content/generate", headers={"Authorization": f"Bearer {generate_token(user.id)}"})
+
+    assert resp.status_code == 201
+    calendar = resp.get_json()["calendar"]
+    assert sorted(d["id"] for d in calendar) == sorted(r.id for r in ContentCalendar.query.filter_by(user_id=user.id))
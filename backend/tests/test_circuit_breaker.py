@@ -0,0 +1,83 @@
+import threading
+import time
+
+import pytest
+
+from app.utils import circuit_breaker
+from app.utils.circuit_breaker import CLOSED, HALF_OPEN, OPEN, CircuitBreaker, CircuitOpenError, hedged
+
+
+@pytest.fixture
+def breaker():
+    return CircuitBreaker("test", window=4, min_calls=4, failure_rate=0.5, slow_call_seconds=1.0, reset_timeout=0.05)
+
+
+def _fail(breaker, times=1):
+    for _ in range(times):
+        breaker.record(False, 0.01, breaker.allow())
+
+
+def test_opens_once_enough_calls_fail(breaker):
+    breaker.record(True, 0.01, breaker.allow())
+    _fail(breaker, 2)
+    assert breaker.state == CLOSED  # 3 calls are fewer than min_calls
+    _fail(breaker)
+    assert breaker.state == OPEN
+    assert breaker.allow() is None and breaker.short_circuits()
+    with pytest.raises(CircuitOpenError):
+        breaker.call(lambda: "never called")
+
+
+def test_slow_calls_count_as_failures(breaker):
+    for _ in range(4):
+        breaker.record(True, 2.0, breaker.allow())
+    assert breaker.state == OPEN
+
+
+def test_half_open_lets_one_probe_through(breaker):
+    _fail(breaker, 4)
+    time.sleep(0.06)
+    assert breaker.state == HALF_OPEN
+    probe = breaker.allow()
+    assert probe is not None and breaker.allow() is None
+    breaker.record(True, 0.01, probe)
+    assert breaker.state == CLOSED
+
+
+def test_a_failed_probe_opens_again(breaker):
+    _fail(breaker, 4)
+    time.sleep(0.06)
+    _fail(breaker)
+    assert breaker.state == OPEN
+
+
+def test_a_late_call_from_before_the_trip_is_not_the_probe(breaker):
+    slow = breaker.allow()
+    _fail(breaker, 4)
+    time.sleep(0.06)
+    probe = breaker.allow()
+    assert breaker.state == HALF_OPEN
+
+    breaker.record(True, 0.01, slow)  # lands while the probe is out
+    assert breaker.state == HALF_OPEN
+    breaker.record(False, 0.01, probe)
+    assert breaker.state == OPEN
+
+
+@pytest.fixture
+def hedge_slots(monkeypatch):
+    monkeypatch.setattr(circuit_breaker, "_hedge_slots", threading.BoundedSemaphore(2))
+
+
+def test_hedges_are_capped_while_abandoned_calls_run(hedge_slots):
+    release = threading.Event()
+    assert hedged(lambda: release.wait(5) and "late", 0.01, lambda: "fallback") == "fallback"
+    assert hedged(lambda: release.wait(5) and "late", 0.01, lambda: "fallback") == "fallback"
+
+    calls = []
+    assert hedged(lambda: calls.append(1), 1.0, lambda: "skipped") == "skipped"
+    assert calls == []
+
+    release.set()
+    time.sleep(0.05)
+    assert hedged(lambda: "answer", 1.0, lambda: "fallback") == "answer"
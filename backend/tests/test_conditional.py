@@ -0,0 +1,75 @@
+import pytest
+
+from app import db
+from app.models import ContentCalendar, SocialAccount
+from app.services.content_ops import generate_calendar
+from app.utils.jwt_utils import generate_token
+
+PROFILE = {"business_name": "Acme Co", "industry": "real estate", "target_audience": "first-time buyers",
+           "brand_tone": "fun", "primary_goal": "growth", "posting_frequency": "daily"}
+
+
+@pytest.fixture
+def get(app, user):
+    client = app.test_client()
+    auth = {"Authorization": f"Bearer {generate_token(user.id)}"}
+
+    def get(path, **headers):
+        return client.get(path, headers={**auth, **headers})
+
+    get.client, get.auth = client, auth
+    return get
+
+
+def test_unchanged_calendar_is_not_modified(user, get):
+    generate_calendar(user.id)
+    first = get("/api/content/calendar")
+    assert first.status_code == 200 and first.headers["ETag"] and first.headers["Last-Modified"]
+
+    again = get("/api/content/calendar", **{"If-None-Match": first.headers["ETag"]})
+    assert again.status_code == 304 and again.data == b""
+    assert again.headers["ETag"] == first.headers["ETag"]
+
+    since = get("/api/content/calendar", **{"If-Modified-Since": first.headers["Last-Modified"]})
+    assert since.status_code == 304
+
+
+def test_an_edit_or_delete_changes_the_calendar_etag(user, get):
+    calendar = generate_calendar(user.id)
+    etag = get("/api/content/calendar").headers["ETag"]
+
+    get.client.put(f"/api/content/{calendar[0]['id']}", headers=get.auth, json={"caption": "Edited"})
+    edited = get("/api/content/calendar", **{"If-None-Match": etag})
+    assert edited.status_code == 200
+    assert edited.get_json()["calendar"][0]["caption"] == "Edited"
+
+    db.session.delete(db.session.get(ContentCalendar, calendar[-1]["id"]))
+    db.session.commit()
+    deleted = get("/api/content/calendar", **{"If-None-Match": edited.headers["ETag"]})
+    assert deleted.status_code == 200 and len(deleted.get_json()["calendar"]) == len(calendar) - 1
+
+
+def test_projection_has_its_own_etag(user, get):
+    generate_calendar(user.id)
+    full = get("/api/content/calendar").headers["ETag"]
+    assert get("/api/content/calendar?fields=day", **{"If-None-Match": full}).status_code == 200
+
+
+def test_profile_etag_follows_saves(user, get):
+    etag = get("/api/profile").headers["ETag"]
+    assert get("/api/profile", **{"If-None-Match": etag}).status_code == 304
+
+    get.client.post("/api/profile", headers=get.auth, json=PROFILE)
+    changed = get("/api/profile", **{"If-None-Match": etag})
+    assert changed.status_code == 200 and changed.get_json()["profile"]["brand_tone"] == "fun"
+
+
+def test_accounts_etag_follows_connections(user, get):
+    etag = get("/api/social/accounts").headers["ETag"]
+    assert get("/api/social/accounts", **{"If-None-Match": etag}).status_code == 304
+
+    db.session.add(SocialAccount(user_id=user.id, platform="facebook", account_id="page-1",
+                                 access_token="token", is_active=True))
+    db.session.commit()
+    changed = get("/api/social/accounts", **{"If-None-Match": etag})
+    assert changed.status_code == 200 and len(changed.get_json()["accounts"]) == 1
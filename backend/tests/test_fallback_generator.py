@@ -0,0 +1,45 @@
+from types import SimpleNamespace
+
+from app.services.fallback_generator import (
+    compile_profile,
+    fallback_day,
+    generate_fallback_calendars,
+    generate_fallback_days,
+)
+
+
+def _profile(**values) -> SimpleNamespace:
+    return SimpleNamespace(**{"business_name": "Acme Co", "industry": "real estate",
+                              "target_audience": "first-time buyers", "brand_tone": "friendly",
+                              "primary_goal": "growth", **values})
+
+
+def _without_cta(days: list) -> list:
+    # instagram draws its CTA at random per call
+    return [{k: v for k, v in d.items() if k != "cta"} for d in days]
+
+
+def test_context_is_shared_per_profile_version():
+    ctx = compile_profile(_profile())
+    assert compile_profile(_profile()) is ctx
+    assert ctx.industry_tag == "realestate" and ctx.business_tag == "AcmeCo"
+    assert compile_profile(_profile(industry="law")) is not ctx
+
+
+def test_days_are_copies_of_the_cached_templates():
+    profile = _profile()
+    day = fallback_day(2, "facebook", profile)
+    day["caption"] = "changed"
+    assert fallback_day(2, "facebook", profile)["caption"] != "changed"
+    assert "#realestate" in fallback_day(1, "instagram", profile)["hashtags"]
+
+
+def test_batch_matches_per_profile_generation():
+    profiles = [_profile(), _profile(business_name="Other Co", industry="law"), _profile()]
+    batch = generate_fallback_calendars(profiles, days=12)
+
+    assert len(batch) == 3
+    for profile, plan in zip(profiles, batch):
+        assert [d["day"] for d in plan] == list(range(1, 13))
+        assert _without_cta(plan) == _without_cta(generate_fallback_days(profile, days=12))
+    assert "Other Co" in batch[1][1]["caption"] and "Other Co" not in batch[0][1]["caption"]
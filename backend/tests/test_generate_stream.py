@@ -0,0 +1,59 @@
+import json
+
+import pytest
+
+from app.models import ContentCalendar
+from app.services.content_ops import generate_calendar
+from app.utils.jwt_utils import generate_token
+
+
+def _events(resp) -> list:
+    events = []
+    for block in resp.get_data(as_text=True).strip().split("\n\n"):
+        event, data = block.split("\n")
+        events.append((event.removeprefix("event: "), json.loads(data.removeprefix("data: "))))
+    return events
+
+
+@pytest.fixture
+def stream(app, user):
+    client = app.test_client()
+    headers = {"Authorization": f"Bearer {generate_token(user.id)}"}
+    return lambda: _events(client.post("/api/content/generate/stream", headers=headers))
+
+
+def test_days_stream_then_the_calendar_is_stored(user, stream):
+    generate_calendar(user.id)
+
+    events = stream()
+
+    assert [e for e, _ in events] == ["day"] * 5 + ["done"]
+    stored = events[-1][1]["calendar"]
+    assert sorted(d["day"] for d in stored) == [1, 2, 3, 4, 5]
+    rows = ContentCalendar.query.filter_by(user_id=user.id).all()
+    assert sorted(r.id for r in rows) == sorted(d["id"] for d in stored)
+
+
+def test_a_failed_run_keeps_the_old_calendar(user, stream, monkeypatch):
+    old_ids = {d["id"] for d in generate_calendar(user.id)}
+
+    def fail(*args, **kwargs):
+        yield from ()
+        raise RuntimeError("boom")
+
+    monkeypatch.setattr("app.routes.content.iter_plan", fail)
+    events = stream()
+
+    assert [e for e, _ in events] == ["error"]
+    assert {r.id for r in ContentCalendar.query.filter_by(user_id=user.id)} == old_ids
+
+
+def test_nothing_is_written_before_done(app, user):
+    old_ids = {d["id"] for d in generate_calendar(user.id)}
+    client = app.test_client()
+    resp = client.post("/api/content/generate/stream", buffered=False,
+                       headers={"Authorization": f"Bearer {generate_token(user.id)}"})
+    chunks = iter(resp.response)
+    assert next(chunks).startswith(b"event: day")
+    assert {r.id for r in ContentCalendar.query.filter_by(user_id=user.id)} == old_ids
+    resp.close()
@@ -0,0 +1,108 @@
+import json
+import re
+import time
+from types import SimpleNamespace
+
+import pytest
+
+from app.services import openai_service
+from app.services.fallback_generator import platform_for_day
+from app.services.generation_engine import fallback_days, generate_plan
+from app.services.stub_model import StubGenerativeModel
+
+
+class FakeModel(StubGenerativeModel):
+    """The stub, except that chosen days answer badly or slowly."""
+
+    def __init__(self, bad_days=(), slow_days=(), delay=0.0, stream_objects=None):
+        super().__init__()
+        self.bad_days, self.slow_days, self.delay = set(bad_days), set(slow_days), delay
+        self.stream_objects = stream_objects
+        self.calls = 0
+
+    def generate_content(self, prompt, stream: bool = False, **kwargs):
+        self.calls += 1
+        if stream and self.stream_objects is not None:
+            # a plan cut off after `stream_objects` days
+            text = json.dumps(self._answer(prompt)[:self.stream_objects])[:-1]
+            return iter([SimpleNamespace(text=text[i:i + 40]) for i in range(0, len(text), 40)])
+        day = int(re.search(r"Day (\d+)", prompt).group(1)) if not stream else None
+        if day in self.slow_days:
+            time.sleep(self.delay)
+        if day in self.bad_days:
+            return SimpleNamespace(text="Sorry, I can't help with that.")
+        return super().generate_content(prompt, stream=stream, **kwargs)
+
+
+@pytest.fixture
+def use_model(monkeypatch):
+    def install(model):
+        monkeypatch.setattr(openai_service, "_get_model", lambda: model)
+        return model
+    return install
+
+
+def test_every_day_comes_from_the_model(profile):
+    plan = generate_plan(profile, days=5)
+    assert [d["day"] for d in plan] == [1, 2, 3, 4, 5]
+    assert [d["platform"] for d in plan] == [platform_for_day(d) for d in range(1, 6)]
+    assert fallback_days(plan) == []
+    assert all(d["content_idea"] for d in plan)
+
+
+def test_a_bad_day_falls_back_alone(profile, use_model):
+    use_model(FakeModel(bad_days={3}))
+    plan = generate_plan(profile, days=5)
+    assert [d["day"] for d in plan] == [1, 2, 3, 4, 5]
+    assert fallback_days(plan) == [3]
+    assert plan[2]["platform"] == platform_for_day(3)
+    assert plan[2]["content_idea"]
+
+
+def test_a_slow_day_falls_back_at_the_deadline(app, profile, use_model):
+    app.config["GEMINI_CALL_TIMEOUT"] = 0.3
+    use_model(FakeModel(slow_days={2}, delay=2.0))
+    started = time.monotonic()
+    plan = generate_plan(profile, days=5)
+    assert time.monotonic() - started < 1.5
+    assert fallback_days(plan) == [2]
+
+
+def test_no_model_means_templates(app, profile):
+    app.config["GEMINI_MODEL"] = "gemini-2.0-flash"
+    app.config["GEMINI_API_KEY"] = ""
+    plan = generate_plan(profile, days=5)
+    assert fallback_days(plan) == [1, 2, 3, 4, 5]
+
+
+def test_only_generates_the_requested_days(profile):
+    plan = generate_plan(profile, days=5, only={2, 4})
+    assert [d["day"] for d in plan] == [2, 4]
+
+
+def test_a_bad_answer_is_not_cached(profile, use_model):
+    use_model(FakeModel(bad_days={3}))
+    assert fallback_days(generate_plan(profile, days=5)) == [3]
+    model = use_model(FakeModel())
+    assert fallback_days(generate_plan(profile, days=5)) == []
+    # the four good days were served from the cache; day 3 was asked again
+    assert model.calls == 1
+
+
+def test_streamed_plan(app, profile):
+    app.config["GEMINI_PLAN_MODE"] = "stream"
+    plan = generate_plan(profile, days=5)
+    assert [d["day"] for d in plan] == [1, 2, 3, 4, 5]
+    assert fallback_days(plan) == []
+
+
+def test_a_cut_off_stream_falls_back_for_the_missing_days(app, profile, use_model):
+    app.config["GEMINI_PLAN_MODE"] = "stream"
+    use_model(FakeModel(stream_objects=2))
+    plan = generate_plan(profile, days=5)
+    assert [d["day"] for d in plan] == [1, 2, 3, 4, 5]
+    assert fallback_days(plan) == [3, 4, 5]
+    # an incomplete plan is not cached either
+    model = use_model(FakeModel())
+    assert fallback_days(generate_plan(profile, days=5)) == []
+    assert model.calls == 1
@@ -0,0 +1,139 @@
+from datetime import datetime
+
+import pytest
+from sqlalchemy import delete, update
+
+from app import db
+from app.models import ContentCalendar
+from app.services import openai_service
+from app.services.bulk_regenerate import _generate_batch
+from app.services.calendar_store import read_calendar, source_hash, upsert_days, with_source_hash
+from app.services.content_ops import generate_calendar, refresh_calendar
+from app.services.fallback_generator import fallback_day, platform_for_day
+from app.services.generation_engine import fallback_days
+
+
+def _rows(user_id: int) -> dict:
+    return {r.day: r for r in ContentCalendar.query.filter_by(user_id=user_id)}
+
+
+def test_upsert_keeps_ids_and_inserts_new_days(user, profile):
+    calendar = generate_calendar(user.id)
+    first = calendar[0]
+    new_day = fallback_day(6, platform_for_day(6), profile)
+    changed = {**fallback_day(1, first["platform"], profile), "caption": "Rewritten"}
+
+    assert upsert_days(user.id, {first["id"]: changed}, with_source_hash(profile, [new_day])) == 2
+    db.session.commit()
+
+    after = {d["day"]: d for d in read_calendar(user.id)}
+    assert after[1]["id"] == first["id"] and after[1]["caption"] == "Rewritten"
+    assert after[1]["updated_at"] > first["updated_at"]
+    assert after[6]["id"] not in {d["id"] for d in calendar}
+    assert [after[d]["id"] for d in range(2, 6)] == [d["id"] for d in calendar[1:]]
+
+
+def test_unchanged_profile_regenerates_nothing(user, profile):
+    generate_calendar(user.id)
+    before = {day: row.updated_at for day, row in _rows(user.id).items()}
+    refresh_calendar(user.id, profile)
+    assert {day: row.updated_at for day, row in _rows(user.id).items()} == before
+
+
+def test_changed_profile_regenerates_stale_days_in_place(user, profile):
+    generate_calendar(user.id)
+    rows = _rows(user.id)
+    ids = {day: row.id for day, row in rows.items()}
+    rows[1].edited_at = datetime.utcnow()
+    rows[2].scheduled_at = datetime(2030, 1, 1)
+    rows[3].is_published = True
+    db.session.delete(rows[5])
+    profile.business_name = "Other Co"
+    db.session.commit()
+
+    calendar = refresh_calendar(user.id, profile)
+
+    assert [d["day"] for d in calendar] == [1, 2, 3, 4, 5]
+    rows = _rows(user.id)
+    assert rows[4].id == ids[4] and "Other Co" in (rows[4].caption + rows[4].content_idea)
+    assert rows[4].source_hash == source_hash(profile, 4, platform_for_day(4))
+    # the deleted day is inserted again
+    assert rows[5].source_hash == source_hash(profile, 5, platform_for_day(5))
+    for day in (1, 2, 3):
+        assert rows[day].id == ids[day]
+        assert "Other Co" not in rows[day].caption + rows[day].content_idea
+    assert rows[2].scheduled_at == datetime(2030, 1, 1)
+
+
+@pytest.fixture
+def broken_day_2(monkeypatch):
+    real = openai_service._get_model
+
+    class Model:
+        def generate_content(self, prompt, **kwargs):
+            if "Generate Day 2 " in prompt:
+                raise RuntimeError("upstream error")
+            return real().generate_content(prompt, **kwargs)
+
+    monkeypatch.setattr(openai_service, "_get_model", lambda: Model())
+    return monkeypatch
+
+
+def test_fallback_days_are_retried_next_time(user, profile, broken_day_2):
+    generate_calendar(user.id)
+    rows = _rows(user.id)
+    assert rows[2].source_hash is None
+    assert all(rows[d].source_hash for d in (1, 3, 4, 5))
+
+    broken_day_2.undo()
+    before = {day: row.updated_at for day, row in rows.items()}
+    refresh_calendar(user.id, profile)
+    rows = _rows(user.id)
+    assert rows[2].source_hash == source_hash(profile, 2, platform_for_day(2))
+    assert [d for d in range(1, 6) if rows[d].updated_at != before[d]] == [2]
+
+
+@pytest.fixture
+def during_model_call(monkeypatch):
+    """Run `action` in the middle of the next model call, like a request racing the refresh."""
+    real = openai_service._get_model
+    actions = []
+
+    class Model:
+        def generate_content(self, prompt, **kwargs):
+            while actions:
+                actions.pop(0)()
+            return real().generate_content(prompt, **kwargs)
+
+    monkeypatch.setattr(openai_service, "_get_model", lambda: Model())
+    return actions.append
+
+
+def test_rows_changed_during_the_refresh_are_left_alone(app, user, profile, during_model_call):
+    generate_calendar(user.id)
+    ids = {day: row.id for day, row in _rows(user.id).items()}
+    profile.business_name = "Other Co"
+    db.session.commit()
+    engine = db.engine
+
+    def edit_and_delete():
+        with engine.begin() as conn:
+            conn.execute(update(ContentCalendar.__table__).where(ContentCalendar.id == ids[1])
+                         .values(caption="Edited by hand", edited_at=datetime.utcnow()))
+            conn.execute(delete(ContentCalendar.__table__).where(ContentCalendar.id == ids[2]))
+
+    during_model_call(edit_and_delete)
+    refresh_calendar(user.id, profile)
+
+    rows = _rows(user.id)
+    assert rows[1].caption == "Edited by hand"
+    assert 2 not in rows
+    assert all("Other Co" in rows[d].caption + rows[d].content_idea for d in (3, 4, 5))
+
+
+def test_bulk_template_days_are_left_unhashed(profile):
+    columns = ("id", "user_id", "business_name", "industry", "target_audience", "brand_tone", "primary_goal",
+               "posting_frequency")
+    [plan] = _generate_batch([{c: getattr(profile, c) for c in columns}], 5, "template")
+    assert fallback_days(plan) == [1, 2, 3, 4, 5]
+    assert all(d["source_hash"] is None for d in with_source_hash(profile, plan))
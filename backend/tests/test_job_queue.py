@@ -0,0 +1,86 @@
+from datetime import datetime, timedelta
+
+import pytest
+from sqlalchemy import update
+
+from app import db
+from app.models import Job
+from app.services import job_queue
+from app.services.job_queue import claim_jobs, enqueue_job, purge_finished, requeue_stale, run_job
+
+
+def test_jobs_are_claimed_once_in_order(user):
+    ids = [enqueue_job(user.id, "generate").id for _ in range(3)]
+    assert claim_jobs("w1", 2) == ids[:2]
+    assert claim_jobs("w2", 2) == ids[2:]
+    assert claim_jobs("w3", 2) == []
+    jobs = Job.query.order_by(Job.id).all()
+    assert [(j.status, j.locked_by, j.attempts) for j in jobs] == [
+        ("running", "w1", 1), ("running", "w1", 1), ("running", "w2", 1)]
+
+
+def test_stale_jobs_are_requeued_until_out_of_attempts(app, user):
+    max_attempts = app.config["JOB_MAX_ATTEMPTS"]
+    stale = datetime.utcnow() - timedelta(hours=1)
+    jobs = [Job(user_id=user.id, kind="generate", status="running", attempts=attempts, locked_by="w",
+                locked_at=locked_at)
+            for attempts, locked_at in ((1, stale), (max_attempts, stale), (1, datetime.utcnow()))]
+    db.session.add_all(jobs)
+    db.session.commit()
+
+    assert requeue_stale(60) == 1
+    db.session.expire_all()
+    assert [j.status for j in jobs] == ["queued", "failed", "running"]
+    assert jobs[0].locked_by is None
+
+
+@pytest.fixture
+def failing_handler(monkeypatch):
+    monkeypatch.setitem(job_queue.HANDLERS, "generate", lambda user_id, payload: 1 / 0)
+
+
+def test_a_failed_run_backs_off_before_the_retry(app, user, failing_handler):
+    job = enqueue_job(user.id, "generate")
+    [job_id] = claim_jobs("w1", 1)
+    before = datetime.utcnow()
+
+    run_job(job_id)
+
+    db.session.expire_all()
+    assert job.status == "queued" and job.locked_by is None and "division" in job.error
+    assert job.run_after >= before + timedelta(seconds=app.config["JOB_RETRY_BACKOFF"])
+    assert claim_jobs("w1", 1) == []
+    job.run_after = datetime.utcnow() - timedelta(seconds=1)
+    db.session.commit()
+    assert claim_jobs("w1", 1) == [job_id]
+
+
+def test_a_run_that_lost_its_lease_does_not_record_its_outcome(user, monkeypatch):
+    job = enqueue_job(user.id, "generate")
+    [job_id] = claim_jobs("w1", 1)
+
+    def slow_handler(user_id, payload):
+        # the lease expires mid-run and another worker claims the job
+        db.session.execute(update(Job).where(Job.id == job_id)
+                           .values(status="running", locked_by="w2", locked_at=datetime.utcnow(), attempts=2))
+        db.session.commit()
+        return {"late": True}
+
+    monkeypatch.setitem(job_queue.HANDLERS, "generate", slow_handler)
+    run_job(job_id)
+
+    db.session.expire_all()
+    assert (job.status, job.locked_by, job.result) == ("running", "w2", None)
+
+
+def test_finished_jobs_are_purged_after_the_retention(user):
+    old = datetime.utcnow() - timedelta(days=30)
+    jobs = [Job(user_id=user.id, kind="generate", status=status, finished_at=finished_at)
+            for status, finished_at in (("succeeded", old), ("failed", old), ("superseded", old),
+                                        ("succeeded", datetime.utcnow()), ("queued", None), ("running", None))]
+    db.session.add_all(jobs)
+    db.session.commit()
+    ids = [j.id for j in jobs]
+
+    assert purge_finished(86400) == 3
+    assert sorted(j.id for j in Job.query) == ids[3:]
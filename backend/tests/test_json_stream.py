@@ -0,0 +1,75 @@
+import json
+import time
+
+import pytest
+
+from app.services.json_stream import JSONObjectStream, first_json_value, iter_json_objects
+
+PLAN = [{"day": 1, "caption": "Open {house} on \"Friday\"", "tags": ["a", "b"]},
+        {"day": 2, "caption": "Back\\slash and } brace", "meta": {"nested": [1, {"x": 2}]}}]
+
+
+def test_objects_split_at_every_position():
+    text = "```json\n" + json.dumps(PLAN) + "\n```"
+    for cut in range(len(text) + 1):
+        assert list(iter_json_objects([text[:cut], text[cut:]])) == PLAN
+
+
+def test_one_character_chunks():
+    text = "Here you go: " + json.dumps(PLAN) + " Enjoy!"
+    assert list(iter_json_objects(text)) == PLAN
+
+
+def test_objects_come_out_as_they_close():
+    stream = JSONObjectStream()
+    text = json.dumps(PLAN)
+    first_end = text.index("}, {") + 1
+    assert stream.feed(text[:first_end]) == [PLAN[0]]
+    assert stream.feed(text[first_end:]) == [PLAN[1]]
+
+
+def test_escape_at_a_chunk_boundary():
+    text = json.dumps({"day": 1, "caption": 'say \\"hi\\" {'})
+    cut = text.index("\\") + 1
+    assert list(iter_json_objects([text[:cut], text[cut:]])) == [json.loads(text)]
+
+
+def test_prose_braces_are_dropped():
+    text = 'Dear {name}, here is day one: {"day": 1} and a stray } and ] too {"day": 2}'
+    assert list(iter_json_objects([text])) == [{"day": 1}, {"day": 2}]
+
+
+def test_an_unbalanced_run_is_abandoned():
+    assert list(iter_json_objects(['{"day": 1, "x": [1, 2}', ' {"day": 2}'])) == [{"day": 2}]
+
+
+def test_empty_chunks():
+    assert list(iter_json_objects(["", None, "", '{"a": 1}', ""])) == [{"a": 1}]
+
+
+@pytest.mark.parametrize("text, expected", [
+    ('{"a": 1}', {"a": 1}),
+    ("```json\n[1, 2]\n```", [1, 2]),
+    ('Sure! {"a": {"b": [1, 2]}} Anything else?', {"a": {"b": [1, 2]}}),
+    ('{bad} then {"ok": 1}', {"ok": 1}),
+    ('{ outer prose {"inner": true} }', {"inner": True}),
+    ('{"s": "}{ not a bracket"}', {"s": "}{ not a bracket"}),
+    ('{{{{ {"deep": 1}', {"deep": 1}),
+    ('] stray closers } first {"a": 1}', {"a": 1}),
+])
+def test_first_json_value(text, expected):
+    assert first_json_value(text) == expected
+
+
+@pytest.mark.parametrize("text", ["", None, "no json here", "{unclosed", "{name} and [x]"])
+def test_first_json_value_without_json(text):
+    with pytest.raises(ValueError):
+        first_json_value(text)
+
+
+def test_first_json_value_is_linear_on_unmatched_braces():
+    started = time.perf_counter()
+    with pytest.raises(ValueError):
+        first_json_value("{" * 50000)
+    assert first_json_value("{" * 50000 + '{"a": 1}') == {"a": 1}
+    assert time.perf_counter() - started < 1.0
@@ -0,0 +1,38 @@
+import os
+
+from app.services.llm_cache import DiskBackend
+
+
+def _on_disk(directory) -> int:
+    return sum(e.stat().st_size for e in os.scandir(directory) if e.name.endswith(".json"))
+
+
+def test_overwriting_a_key_keeps_the_size_exact(tmp_path):
+    backend = DiskBackend(str(tmp_path), max_bytes=10 ** 6)
+    backend.set("a", "x" * 1000, 12.0, ttl=60)
+    backend.set("b", "y" * 10, 3.0, ttl=60)
+    for _ in range(5):
+        backend.set("a", "z" * 500, 8.0, ttl=60)
+
+    assert backend.bytes == _on_disk(tmp_path)
+    assert backend.get("a") == ("z" * 500, 8.0)
+
+
+def test_eviction_drops_least_recently_used_entries(tmp_path):
+    backend = DiskBackend(str(tmp_path), max_bytes=800)
+    backend.set("old", "x" * 300, 1.0, ttl=60)
+    os.utime(tmp_path / "old.json", (1, 1))
+    backend.set("new", "y" * 300, 1.0, ttl=60)
+    assert backend.get("old") is not None
+    backend.set("newer", "z" * 300, 1.0, ttl=60)
+
+    assert backend.bytes == _on_disk(tmp_path) <= 800
+    assert backend.get("new") is None
+    assert backend.get("old") is not None and backend.get("newer") is not None
+
+
+def test_expired_entries_are_removed_on_read(tmp_path):
+    backend = DiskBackend(str(tmp_path), max_bytes=10 ** 6)
+    backend.set("a", "x", 1.0, ttl=-1)
+    assert backend.get("a") is None
+    assert backend.bytes == 0 and _on_disk(tmp_path) == 0
@@ -0,0 +1,46 @@
+import pytest
+from sqlalchemy.exc import OperationalError
+
+from app import db
+from app.utils.jwt_utils import generate_token
+from app.utils.metrics import metrics
+
+SQL_COUNT = "creatorflow_request_sql_statements"
+LATENCY = "creatorflow_http_request_duration_seconds"
+
+
+@pytest.fixture(autouse=True)
+def fresh_metrics():
+    metrics.reset()
+    yield
+    metrics.reset()
+
+
+def test_a_failed_statement_does_not_leak_its_start_time(app):
+    with db.engine.connect() as conn:
+        with pytest.raises(OperationalError):
+            conn.exec_driver_sql("SELEC 1")
+        assert not conn.info.get("metrics_query_start")
+
+
+def test_requests_are_recorded(app, user):
+    resp = app.test_client().get("/api/content/calendar",
+                                 headers={"Authorization": f"Bearer {generate_token(user.id)}"})
+    assert resp.status_code == 200
+    series = metrics.snapshot()
+    assert series[LATENCY][("content.get_calendar", "GET", "2xx")][-1] == 1
+    assert series[SQL_COUNT][("content.get_calendar",)][-2] > 0
+
+
+def test_a_stream_is_recorded_when_it_closes(app, user):
+    resp = app.test_client().post("/api/content/generate/stream", buffered=False,
+                                  headers={"Authorization": f"Bearer {generate_token(user.id)}"})
+    assert ("content.generate_content_stream",) not in metrics.snapshot()[SQL_COUNT]
+    body = resp.get_data(as_text=True)
+    resp.close()
+
+    assert "event: done" in body
+    series = metrics.snapshot()
+    assert series[LATENCY][("content.generate_content_stream", "POST", "2xx")][-1] == 1
+    # the calendar is written while streaming, so those statements count too
+    assert series[SQL_COUNT][("content.generate_content_stream",)][-2] >= 3
@@ -0,0 +1,45 @@
+import pytest
+
+from app.services.post_scorer import normalize_post, post_scorer
+from app.utils.jwt_utils import generate_token
+
+POST = {"platform": "instagram", "caption": "How we sold 3 homes this week. Comment below! #realestate",
+        "has_image": True}
+MODEL_RATING = {"score": 8, "reason": "Strong hook.", "suggestions": [], "source": "model"}
+
+
+@pytest.fixture
+def rate(app, user, monkeypatch):
+    app.config["GEMINI_API_KEY"] = "test-key"
+    post_scorer._cache.clear()
+    answers = []
+    monkeypatch.setattr("app.routes.content.model_rating", lambda post, api_key: answers.pop(0))
+    client = app.test_client()
+    headers = {"Authorization": f"Bearer {generate_token(user.id)}"}
+
+    def rate(*answer):
+        answers.extend(answer)
+        resp = client.post("/api/content/rate-post", headers=headers, json=POST)
+        assert resp.status_code == 200
+        return resp.get_json()
+
+    yield rate
+    post_scorer._cache.clear()
+
+
+def test_local_scores_are_deterministic_and_cached(app):
+    post = normalize_post(POST)
+    first = post_scorer.score(post)
+    assert first["source"] == "local" and 5 <= first["score"] <= 8
+    assert post_scorer.score_many([post, post]) == [first, first]
+
+
+def test_model_ratings_are_cached(rate):
+    assert rate(MODEL_RATING) == MODEL_RATING
+    # no answer queued: a second model call would fail
+    assert rate() == MODEL_RATING
+
+
+def test_a_failed_model_call_does_not_pin_the_local_score(rate):
+    assert rate(None)["source"] == "local"
+    assert rate(MODEL_RATING) == MODEL_RATING
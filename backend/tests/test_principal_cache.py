@@ -0,0 +1,66 @@
+import pytest
+
+from app import db
+from app.models import User
+from app.utils.jwt_utils import decode_token, generate_token
+from app.utils.principal_cache import principal_cache
+
+
+@pytest.fixture(autouse=True)
+def clean_cache():
+    principal_cache.clear()
+    yield
+    principal_cache.clear()
+
+
+def test_repeat_loads_hit_the_cache(user):
+    token = generate_token(user.id)
+    payload = decode_token(token)
+    assert principal_cache.load(token, payload).id == user.id
+    hits = principal_cache.stats()["hits"]
+    assert principal_cache.load(token, payload).email == user.email
+    assert principal_cache.stats()["hits"] == hits + 1
+
+
+def test_invalidate_drops_cached_tokens(user):
+    token = generate_token(user.id)
+    principal_cache.load(token, decode_token(token))
+    principal_cache.invalidate_user(user.id)
+    assert principal_cache._cache.get(token) is None
+
+
+def test_a_load_racing_an_invalidation_is_not_cached(user, monkeypatch):
+    token = generate_token(user.id)
+    real_get = db.session.get
+
+    def get_then_invalidate(model, ident):
+        row = real_get(model, ident)
+        # the profile write lands between our read and the cache set
+        principal_cache.invalidate_user(ident)
+        return row
+
+    monkeypatch.setattr(db.session, "get", get_then_invalidate)
+    assert principal_cache.load(token, decode_token(token)).id == user.id
+    assert principal_cache._cache.get(token) is None
+    monkeypatch.undo()
+
+    principal_cache.load(token, decode_token(token))
+    assert principal_cache._cache.get(token) is not None
+
+
+def test_diagnostics_needs_the_operator_token(app, user):
+    client = app.test_client()
+    headers = {"Authorization": f"Bearer {generate_token(user.id)}"}
+    assert client.get("/api/diagnostics", headers=headers).status_code == 404
+
+    app.config["DIAGNOSTICS_TOKEN"] = "s3cret"
+    assert client.get("/api/diagnostics", headers=headers).status_code == 403
+    resp = client.get("/api/diagnostics", headers={"X-Diagnostics-Token": "s3cret"})
+    assert resp.status_code == 200
+    assert "principal_cache" in resp.get_json()
+
+
+def test_unknown_user_is_not_cached(app):
+    token = generate_token(12345)
+    assert principal_cache.load(token, decode_token(token)) is None
+    assert User.query.count() == 0
@@ -0,0 +1,147 @@
+from datetime import datetime, timedelta
+from types import SimpleNamespace
+
+import pytest
+from requests import ReadTimeout
+from sqlalchemy import delete
+
+from app import db
+from app.models import ContentCalendar, SocialAccount
+from app.services import publisher
+from app.services.content_ops import generate_calendar
+from app.services.publisher import claim_due, publish_items
+
+PAST = datetime(2020, 1, 1)
+
+
+def _item(user, day, platform="facebook", **values):
+    item = ContentCalendar(user_id=user.id, day=day, platform=platform, content_idea=f"Idea {day}",
+                           caption=f"Caption {day}", **values)
+    db.session.add(item)
+    return item
+
+
+@pytest.fixture
+def account(user):
+    account = SocialAccount(user_id=user.id, platform="facebook", account_id="page-1", access_token="token",
+                            is_active=True)
+    db.session.add(account)
+    db.session.commit()
+    return account
+
+
+def test_only_due_items_are_claimed_and_leased(app, user):
+    due = _item(user, 1, scheduled_at=PAST)
+    _item(user, 2, scheduled_at=datetime.utcnow() + timedelta(days=1))
+    _item(user, 3)
+    _item(user, 4, scheduled_at=PAST, is_published=True)
+    _item(user, 5, scheduled_at=PAST, publish_attempts=app.config["PUBLISH_MAX_ATTEMPTS"])
+    _item(user, 6, scheduled_at=PAST, publish_not_before=datetime.utcnow() + timedelta(minutes=5))
+    db.session.commit()
+
+    assert claim_due(10) == [due.id]
+    db.session.expire_all()
+    assert due.publish_not_before > datetime.utcnow()
+    assert claim_due(10) == []
+
+
+@pytest.fixture
+def posts(monkeypatch):
+    sent = []
+
+    def request(method, url, **kwargs):
+        sent.append((method, url, kwargs.get("data", {}).get("message")))
+        return SimpleNamespace(status_code=200, text="", json=lambda: {"id": f"post-{len(sent)}"})
+
+    monkeypatch.setattr(publisher.http_client, "request", request)
+    return sent
+
+
+def test_facebook_items_are_published(user, account, posts):
+    item = _item(user, 1, scheduled_at=PAST)
+    db.session.commit()
+
+    assert publish_items(claim_due(10)) == {"published": 1, "failed": 0}
+    db.session.expire_all()
+    assert item.is_published and item.platform_post_id == "post-1" and item.publish_not_before is None
+    assert posts == [("POST", "https://graph.facebook.com/v18.0/page-1/feed", "Caption 1")]
+
+
+def test_media_platforms_are_rejected(user, account, posts):
+    items = [_item(user, 1, "instagram", scheduled_at=PAST), _item(user, 2, "youtube", scheduled_at=PAST)]
+    db.session.commit()
+
+    assert publish_items(claim_due(10)) == {"published": 0, "failed": 2}
+    db.session.expire_all()
+    assert posts == []
+    assert all("only Facebook feed posts are published" in i.publish_error for i in items)
+    assert claim_due(10) == []
+
+
+def test_a_read_timeout_is_not_retried(app, user, account, monkeypatch):
+    calls = []
+
+    def request(method, url, **kwargs):
+        calls.append(url)
+        raise ReadTimeout("read timed out")
+
+    monkeypatch.setattr(publisher.http_client, "request", request)
+    item = _item(user, 1, scheduled_at=PAST)
+    db.session.commit()
+
+    assert publish_items(claim_due(10)) == {"published": 0, "failed": 1}
+    db.session.expire_all()
+    assert len(calls) == 1
+    assert item.publish_attempts == app.config["PUBLISH_MAX_ATTEMPTS"]
+    assert "may have been published" in item.publish_error
+
+
+def test_items_past_the_lease_budget_are_released(user, account, posts):
+    item = _item(user, 1, scheduled_at=PAST)
+    db.session.commit()
+    ids = claim_due(10)
+    # too little of the lease left to finish a post
+    item.publish_not_before = datetime.utcnow() + timedelta(seconds=5)
+    db.session.commit()
+
+    assert publish_items(ids) == {"published": 0, "failed": 0}
+    db.session.expire_all()
+    assert posts == []
+    assert not item.is_published and item.publish_not_before is None and item.publish_attempts == 0
+    assert claim_due(10) == [item.id]
+
+
+def test_a_row_deleted_mid_batch_does_not_lose_the_others(app, user, account, make_user, monkeypatch):
+    other = make_user("g-2")
+    db.session.add(SocialAccount(user_id=other.id, platform="facebook", account_id="page-2", access_token="t",
+                                 is_active=True))
+    mine, theirs = _item(user, 1, scheduled_at=PAST), _item(other, 1, scheduled_at=PAST + timedelta(hours=1))
+    db.session.commit()
+    theirs_id, engine = theirs.id, db.engine
+
+    def request(method, url, **kwargs):
+        # the other user's calendar is replaced while the batch is posting
+        with engine.begin() as conn:
+            conn.execute(delete(ContentCalendar.__table__).where(ContentCalendar.id == theirs_id))
+        return SimpleNamespace(status_code=200, text="", json=lambda: {"id": url.split("/")[-2]})
+
+    monkeypatch.setattr(publisher.http_client, "request", request)
+    assert publish_items(claim_due(10)) == {"published": 2, "failed": 0}
+    db.session.expire_all()
+    assert mine.is_published and mine.platform_post_id == "page-1" and mine.publish_not_before is None
+    assert db.session.get(ContentCalendar, theirs_id) is None
+
+
+def test_replacing_a_calendar_keeps_scheduled_and_published_rows(user):
+    generate_calendar(user.id)
+    rows = {r.day: r for r in ContentCalendar.query.filter_by(user_id=user.id)}
+    rows[1].scheduled_at = datetime(2030, 1, 1)
+    rows[2].is_published = True
+    rows[3].scheduled_at, rows[3].publish_not_before = PAST, datetime.utcnow() + timedelta(minutes=5)
+    kept = {day: rows[day].id for day in (1, 2, 3)}
+    db.session.commit()
+
+    calendar = generate_calendar(user.id)
+
+    assert sorted(d["day"] for d in calendar) == [1, 2, 3, 4, 5]
+    assert {d["day"]: d["id"] for d in calendar if d["day"] <= 3} == kept
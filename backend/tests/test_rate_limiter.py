@@ -0,0 +1,51 @@
+import pytest
+
+from app.services.generation_engine import fallback_days, generate_plan
+from app.utils.rate_limiter import MemoryStore, SQLStore, gemini_limiter
+
+
+@pytest.fixture
+def limit(app):
+    def limit(**settings):
+        app.config.update({f"GEMINI_RATE_{k.upper()}": v for k, v in settings.items()})
+        gemini_limiter.init_app(app)
+        return gemini_limiter
+
+    yield limit
+    app.config.update(GEMINI_RATE_STORE="memory", GEMINI_RATE_PER_MINUTE=0, GEMINI_RATE_USER_PER_MINUTE=0)
+    gemini_limiter.init_app(app)
+
+
+@pytest.mark.parametrize("store", [MemoryStore, SQLStore])
+def test_bucket_grants_its_burst_then_reports_the_wait(app, store):
+    store = store()
+    assert [store.take("k", rate=1.0, burst=2) for _ in range(2)] == [0.0, 0.0]
+    delay = store.take("k", rate=1.0, burst=2)
+    assert 0.9 < delay <= 1.0
+    # other keys have their own bucket
+    assert store.take("other", rate=1.0, burst=2) == 0.0
+
+
+def test_one_user_cannot_drain_the_quota(limit):
+    limiter = limit(per_minute=60, burst=3, user_per_minute=60, user_burst=2, max_wait=0.0)
+    assert [limiter.acquire(1) for _ in range(3)] == [True, True, False]
+    assert limiter.acquire(2) is True
+    # the global bucket is now empty, and the token user 3 took is given back
+    assert limiter.acquire(3) is False
+    assert limiter.store.take("gemini:user:3", limiter.user_rate, limiter.user_burst, cost=2) == 0.0
+    stats = limiter.stats()
+    assert (stats["granted"], stats["rejected"]) == (3, 2)
+
+
+def test_acquire_waits_for_the_refill_within_its_budget(limit):
+    limiter = limit(per_minute=600, burst=1, max_wait=0.5)
+    assert limiter.acquire() and limiter.acquire()
+    assert limiter.stats()["waited"] == 1
+    assert limiter.acquire(wait=0) is False
+
+
+def test_exhausted_quota_degrades_to_templates(limit, profile):
+    limit(per_minute=60, burst=2, max_wait=0.0)
+    plan = generate_plan(profile, days=5)
+    assert [d["day"] for d in plan] == [1, 2, 3, 4, 5]
+    assert len(fallback_days(plan)) == 3
@@ -0,0 +1,54 @@
+import json
+from datetime import datetime
+
+import pytest
+
+from app import db
+from app.models import ContentCalendar, FirmProfile, SocialAccount
+from app.services.content_ops import generate_calendar
+from app.utils import serialize
+from app.utils.jwt_utils import generate_token
+from app.utils.principal_cache import principal_cache
+
+
+@pytest.fixture
+def get(app, user):
+    principal_cache.clear()
+    client = app.test_client()
+    headers = {"Authorization": f"Bearer {generate_token(user.id)}"}
+    yield lambda path: client.get(path, headers=headers).get_json()
+    principal_cache.clear()
+
+
+@pytest.mark.parametrize("fast", [True, False])
+def test_dumps_matches_isoformat_with_and_without_orjson(monkeypatch, fast):
+    if not fast:
+        monkeypatch.setattr(serialize, "orjson", None)
+    when = datetime(2030, 1, 2, 3, 4, 5, 678)
+    payload = {"at": when, "text": "café", "none": None}
+    assert json.loads(serialize.dumps(payload)) == {"at": when.isoformat(), "text": "café", "none": None}
+
+
+def test_calendar_listing_matches_to_dict(user, get):
+    generate_calendar(user.id)
+    listed = get("/api/content/calendar")["calendar"]
+    rows = ContentCalendar.query.filter_by(user_id=user.id).order_by(ContentCalendar.day, ContentCalendar.id)
+    assert listed == [{k: v for k, v in row.to_dict().items() if k != "user_id"} for row in rows]
+
+
+def test_accounts_listing_matches_to_dict(user, get):
+    account = SocialAccount(user_id=user.id, platform="facebook", account_id="page-1", account_name="Page",
+                            access_token="token", is_active=True)
+    db.session.add(account)
+    db.session.commit()
+    assert get("/api/social/accounts")["accounts"] == [account.to_dict()]
+
+
+def test_has_profile_is_loaded_with_the_user(make_user, get, user):
+    assert get("/api/auth/me")["has_profile"] is True
+
+    other = make_user("g-2")
+    db.session.delete(FirmProfile.query.filter_by(user_id=other.id).one())
+    db.session.commit()
+    db.session.expire_all()
+    assert other.to_dict()["has_profile"] is False
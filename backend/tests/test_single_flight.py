@@ -0,0 +1,64 @@
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+from app.utils.single_flight import SingleFlight, fcntl
+
+
+def _slow(calls: list, result="answer", error=None, flight=None, waiters=0):
+    def fn():
+        calls.append(threading.get_ident())
+        # hold the call open until the other callers have joined it
+        deadline = time.monotonic() + 5
+        while flight and flight.stats()["coalesced"] < waiters and time.monotonic() < deadline:
+            time.sleep(0.01)
+        if error:
+            raise error
+        return result
+    return fn
+
+
+def test_concurrent_callers_share_one_call():
+    flight, calls = SingleFlight("test"), []
+    with ThreadPoolExecutor(max_workers=4) as pool:
+        fn = _slow(calls, flight=flight, waiters=3)
+        results = list(pool.map(lambda _: flight.do("k", fn), range(4)))
+
+    assert results == ["answer"] * 4 and len(calls) == 1
+    assert flight.stats() == {"calls": 1, "coalesced": 3, "coalesced_across_workers": 0, "inflight": 0,
+                              "cross_worker": False}
+    # nothing in flight any more: the next caller leads a new call
+    assert flight.do("k", lambda: "again") == "again"
+
+
+def test_waiters_get_the_leaders_exception():
+    flight, calls = SingleFlight("test"), []
+    fn = _slow(calls, error=RuntimeError("upstream"), flight=flight, waiters=2)
+    with ThreadPoolExecutor(max_workers=3) as pool:
+        futures = [pool.submit(flight.do, "k", fn) for _ in range(3)]
+    for future in futures:
+        with pytest.raises(RuntimeError, match="upstream"):
+            future.result()
+    assert len(calls) == 1
+
+
+def test_different_keys_do_not_coalesce():
+    flight, calls = SingleFlight("test"), []
+    with ThreadPoolExecutor(max_workers=2) as pool:
+        list(pool.map(lambda key: flight.do(key, _slow(calls)), ["a", "b"]))
+    assert len(calls) == 2 and flight.stats()["coalesced"] == 0
+
+
+@pytest.mark.skipif(fcntl is None, reason="cross-worker locks need fcntl")
+def test_leader_rechecks_under_the_file_lock(app, tmp_path):
+    app.config["SINGLE_FLIGHT_LOCK_DIR"] = str(tmp_path)
+    flight = SingleFlight("test")
+    flight.init_app(app)
+    stored = {}
+
+    assert flight.do("k", lambda: stored.setdefault("k", "first"), recheck=lambda: stored.get("k")) == "first"
+    # what another worker stored is returned without calling again
+    assert flight.do("k", lambda: pytest.fail("called twice"), recheck=lambda: stored.get("k")) == "first"
+    assert flight.stats()["coalesced_across_workers"] == 1
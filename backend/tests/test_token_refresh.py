@@ -0,0 +1,112 @@
+from datetime import datetime, timedelta
+from types import SimpleNamespace
+
+import pytest
+from sqlalchemy import update
+
+from app import db
+from app.models import SocialAccount
+from app.routes.social import _save_account
+from app.services import token_refresh
+from app.services.token_refresh import claim_due, refresh_accounts
+
+
+def _response(status: int, body: dict):
+    def raise_for_status():
+        if status >= 400:
+            raise RuntimeError(f"{status} error")
+    return SimpleNamespace(status_code=status, text=str(body), json=lambda: body, raise_for_status=raise_for_status)
+
+
+@pytest.fixture
+def token_endpoint(monkeypatch):
+    """Answers token requests with the queued (status, body) pairs; records the refresh tokens sent."""
+    endpoint = SimpleNamespace(answers=[], sent=[])
+
+    def post(url, data=None, **kwargs):
+        endpoint.sent.append(data["refresh_token"])
+        return _response(*endpoint.answers.pop(0))
+
+    monkeypatch.setattr(token_refresh.http_client, "post", post)
+    return endpoint
+
+
+@pytest.fixture
+def account(user):
+    account = SocialAccount(user_id=user.id, platform="youtube", account_id="channel", access_token="old-access",
+                            refresh_token="refresh-1", token_expires_at=datetime.utcnow() + timedelta(minutes=5))
+    db.session.add(account)
+    db.session.commit()
+    return account
+
+
+def test_a_due_token_is_refreshed(account, token_endpoint):
+    token_endpoint.answers.append((200, {"access_token": "new-access", "expires_in": 3600}))
+
+    assert refresh_accounts(claim_due(10), 2) == {"refreshed": 1, "failed": 0}
+
+    db.session.expire_all()
+    assert token_endpoint.sent == ["refresh-1"]
+    assert account.access_token == "new-access"
+    # Google did not rotate it, so the stored refresh token stays
+    assert account.refresh_token == "refresh-1"
+    assert account.token_expires_at > datetime.utcnow() + timedelta(minutes=50)
+    assert claim_due(10) == []
+
+
+def test_a_transient_failure_backs_off(account, token_endpoint):
+    token_endpoint.answers.append((503, {"error": "backend_error"}))
+
+    assert refresh_accounts(claim_due(10), 2) == {"refreshed": 0, "failed": 1}
+
+    db.session.expire_all()
+    assert account.refresh_failures == 1 and not account.needs_reconnect
+    assert account.refresh_not_before > datetime.utcnow() + timedelta(seconds=30)
+
+
+def test_a_revoked_grant_waits_for_a_reconnect(user, account, token_endpoint):
+    token_endpoint.answers.append((400, {"error": "invalid_grant", "error_description": "Token has been revoked."}))
+
+    assert refresh_accounts(claim_due(10), 2) == {"refreshed": 0, "failed": 1}
+
+    db.session.expire_all()
+    assert account.needs_reconnect and account.refresh_not_before is None
+    assert claim_due(10) == []
+
+    _save_account(user.id, "youtube", access_token="reconnected", refresh_token="refresh-2",
+                  token_expires_at=datetime.utcnow() + timedelta(minutes=5))
+    db.session.expire_all()
+    assert not account.needs_reconnect
+    assert claim_due(10) == [account.id]
+
+
+def test_a_reconnect_during_the_refresh_wins(user, account, token_endpoint, monkeypatch):
+    engine, account_id = db.engine, account.id
+
+    def post(url, data=None, **kwargs):
+        # the user reconnects while the refresher waits on Google
+        with engine.begin() as conn:
+            conn.execute(update(SocialAccount.__table__).where(SocialAccount.id == account_id)
+                         .values(access_token="reconnected", refresh_token="refresh-2"))
+        return _response(200, {"access_token": "refreshed", "refresh_token": "refresh-rotated", "expires_in": 3600})
+
+    monkeypatch.setattr(token_refresh.http_client, "post", post)
+    refresh_accounts(claim_due(10), 2)
+
+    db.session.expire_all()
+    assert (account.access_token, account.refresh_token) == ("reconnected", "refresh-2")
+
+
+def test_an_invalid_meta_token_waits_for_a_reconnect(user, monkeypatch):
+    account = SocialAccount(user_id=user.id, platform="facebook", account_id="page", access_token="meta-token",
+                            token_expires_at=datetime.utcnow() + timedelta(days=1))
+    db.session.add(account)
+    db.session.commit()
+    error = {"error": {"message": "Error validating access token", "type": "OAuthException", "code": 190}}
+    monkeypatch.setattr(token_refresh.http_client, "get", lambda url, **kwargs: _response(400, error))
+
+    assert refresh_accounts(claim_due(10), 2) == {"refreshed": 0, "failed": 1}
+
+    db.session.expire_all()
+    assert account.needs_reconnect
+    assert claim_due(10) == []
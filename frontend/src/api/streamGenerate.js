@@ -0,0 +1,45 @@
+// Consume POST /content/generate/stream (Server-Sent Events over fetch,
+// since EventSource cannot send the Authorization header). Resolves with the
+// `done` event's data; a stream that ends without `done` is a failure.
+export default async function streamGenerate({ onDay, onDone }) {
+    const baseURL = import.meta.env.VITE_API_URL || "/api";
+    const token = localStorage.getItem("cf_token");
+    const res = await fetch(`${baseURL}/content/generate/stream`, {
+        method: "POST",
+        headers: token ? { Authorization: `Bearer ${token}` } : {},
+    });
+    // raw fetch skips the axios interceptor, so mirror its 401 handling here
+    if (res.status === 401) {
+        localStorage.removeItem("cf_token");
+        window.location.href = "/login";
+        throw new Error("Session expired.");
+    }
+    if (!res.ok) {
+        const body = await res.json().catch(() => ({}));
+        throw new Error(body.error || "Generation failed.");
+    }
+
+    const reader = res.body.getReader();
+    const decoder = new TextDecoder();
+    let buffer = "";
+    let result = null;
+    for (;;) {
+        const { value, done } = await reader.read();
+        if (done) break;
+        buffer += decoder.decode(value, { stream: true });
+        let boundary;
+        while ((boundary = buffer.indexOf("\n\n")) !== -1) {
+            const raw = buffer.slice(0, boundary);
+            buffer = buffer.slice(boundary + 2);
+            const event = raw.match(/^event: (.*)$/m)?.[1];
+            const data = JSON.parse(raw.match(/^data: (.*)$/m)?.[1] || "{}");
+            if (event === "day") onDay?.(data);
+            else if (event === "done") {
+                result = data;
+                onDone?.(data);
+            } else if (event === "error") throw new Error(data.error || "Generation failed.");
+        }
+    }
+    if (!result) throw new Error("Generation was interrupted.");
+    return result;
+}
@@ -1,5 +1,6 @@
 import { useState, useEffect, useCallback } from "react";
 import api from "../api/axiosClient";
+import streamGenerate from "../api/streamGenerate";
 import ContentCard from "../components/ContentCard";
 import toast from "react-hot-toast";
 import {
@@ -150,11 +151,21 @@ export default function ContentCalendar() {
     const generate = async () => {
         setGenerating(true);
         try {
-            const { data } = await api.post("/content/generate");
-            setCalendar(data.calendar || []);
+            // Preview each day as it arrives; the server stores the plan only at `done`
+            setCalendar([]);
+            const { calendar: stored } = await streamGenerate({
+                onDay: (day) => {
+                    setCalendar((prev) =>
+                        [...prev.filter((c) => c.day !== day.day), day].sort((a, b) => a.day - b.day)
+                    );
+                },
+            });
+            setCalendar(stored || []);
             toast.success("5-day content plan generated!");
         } catch (err) {
-            toast.error(err?.response?.data?.error || "Generation failed.");
+            toast.error(err?.message || "Generation failed.");
+            // the server keeps the previous calendar when a run fails
+            fetchCalendar();
         } finally {
             setGenerating(false);
         }
@@ -273,7 +284,7 @@ export default function ContentCalendar() {
             {!loading && filtered.length > 0 && (
                 <div className="grid grid-cols-1 lg:grid-cols-2 2xl:grid-cols-3 gap-5">
                     {filtered.map((item) => (
-                        <ContentCard key={item.id} item={item} onUpdate={updateItem} />
+                        <ContentCard key={item.id ?? `day-${item.day}`} item={item} onUpdate={updateItem} />
                     ))}
                 </div>
             )}
@@ -50,7 +50,7 @@ export default function Dashboard() {
 
     useEffect(() => {
         Promise.all([
-            api.get("/content/calendar"),
+            api.get("/content/calendar", { params: { fields: "id,day,platform,content_idea,hook,is_published" } }),
             api.get("/profile"),
         ]).then(([cal, prof]) => {
             setCalendar(cal.data.calendar || []);